@@ -0,0 +1,44 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from slow_query_log import slow_query_log
+
+
+router = APIRouter()
+
+
+@router.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum entries to return, newest first"),
+    min_ms: float = Query(0, ge=0, description="Only entries at least this slow"),
+):
+    """
+    Recent statements over the slow-query threshold.
+
+    Each entry has the SQL, parameter shapes (types only, never values),
+    duration, rows returned, approximate SQLite VM steps and the
+    EXPLAIN QUERY PLAN steps, with full_scan set when a table was scanned
+    without an index.
+    """
+    return {
+        "success": True,
+        **slow_query_log.summary(),
+        "entries": slow_query_log.entries(limit=limit, min_ms=min_ms),
+    }
+
+
+@router.put("/admin/slow-queries/config")
+async def configure_slow_queries(
+    threshold_ms: Optional[float] = Query(None, description="New threshold in ms; negative disables recording"),
+    capacity: Optional[int] = Query(None, ge=1, le=10000, description="Ring buffer size"),
+):
+    if threshold_ms is None and capacity is None:
+        raise HTTPException(status_code=400, detail="Provide threshold_ms and/or capacity")
+    slow_query_log.configure(threshold_ms=threshold_ms, capacity=capacity)
+    return {"success": True, **slow_query_log.summary()}
+
+
+@router.delete("/admin/slow-queries")
+async def clear_slow_queries():
+    return {"success": True, "cleared": slow_query_log.clear()}
@@ -2,16 +2,27 @@ from datetime import datetime
 import csv
 import io
 import json
+import logging
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Body, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from db_utils import get_connection, get_table_columns, resolve_table_name
+from db_utils import (
+    detail_join_clause,
+    get_connection,
+    get_detail_columns,
+    get_table_columns,
+    quote_identifier,
+    resolve_table_name,
+)
+from summary_cube import cube_has_rows, slice_cube
+from utils.cache import response_cache
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 class ExportRequest(BaseModel):
@@ -21,11 +32,6 @@ class ExportRequest(BaseModel):
     dataset: str = "default"
 
 
-def quote_identifier(identifier: str) -> str:
-    escaped = identifier.replace('"', '""')
-    return f'"{escaped}"'
-
-
 def normalize_export_request(
     request: Optional[ExportRequest],
     dataset: Optional[str],
@@ -53,16 +59,30 @@ def get_export_data(
 ):
     try:
         table_name = resolve_table_name(dataset)
-        valid_columns = set(get_table_columns(table_name))
+        hot_columns = get_table_columns(table_name)
+        detail_columns = [column for column in get_detail_columns(table_name) if column not in hot_columns]
+        valid_columns = set(hot_columns) | set(detail_columns)
+
+        def qualified(column: str) -> str:
+            alias = "d" if column in detail_columns else "h"
+            return f"{alias}.{quote_identifier(column)}"
 
         selected_fields = [field for field in (fields or []) if field in valid_columns]
-        select_clause = "*"
-        if selected_fields:
-            select_clause = ", ".join(quote_identifier(field) for field in selected_fields)
+        if not selected_fields:
+            selected_fields = hot_columns + detail_columns
+        select_clause = ", ".join(qualified(field) for field in selected_fields)
+
+        # Exports are the only list path that touches the wide detail table,
+        # and only when a requested or filtered column lives there.
+        filter_fields = [key for key in (filters or {}) if key in valid_columns]
+        needs_detail = any(field in detail_columns for field in selected_fields + filter_fields)
+        from_clause = f"{quote_identifier(table_name)} AS h"
+        if needs_detail:
+            from_clause = detail_join_clause(table_name)
 
         with get_connection() as conn:
             cursor = conn.cursor()
-            sql = f'SELECT {select_clause} FROM {quote_identifier(table_name)}'
+            sql = f'SELECT {select_clause} FROM {from_clause}'
             params = []
 
             if filters:
@@ -75,10 +95,10 @@ def get_export_data(
                         if not normalized_values:
                             continue
                         placeholders = ",".join(["?" for _ in normalized_values])
-                        conditions.append(f"{quote_identifier(key)} IN ({placeholders})")
+                        conditions.append(f"{qualified(key)} IN ({placeholders})")
                         params.extend(normalized_values)
                     else:
-                        conditions.append(f"{quote_identifier(key)} = ?")
+                        conditions.append(f"{qualified(key)} = ?")
                         params.append(value)
                 if conditions:
                     sql += " WHERE " + " AND ".join(conditions)
@@ -92,6 +112,7 @@ def get_export_data(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("export failed")
         raise HTTPException(status_code=500, detail=f"Failed to get data: {str(e)}")
 
 
@@ -132,6 +153,7 @@ async def export_csv(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("export failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -161,6 +183,7 @@ async def export_json(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("export failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -211,44 +234,65 @@ async def export_excel(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("export failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def scan_export_status(table_name: str):
+    """Status from table scans, for databases whose summary cube has not been built yet."""
+    logger.warning("summary cube is empty for %s; scanning (run python summary_cube.py to build it)", table_name)
+    available_columns = set(get_table_columns(table_name))
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
+        total_count = cursor.fetchone()[0]
+
+        income_stats = (None, None, None)
+        if "part_i_summary_12_total_revenue_cy" in available_columns:
+            cursor.execute(
+                f'SELECT MIN(part_i_summary_12_total_revenue_cy), MAX(part_i_summary_12_total_revenue_cy), AVG(part_i_summary_12_total_revenue_cy) FROM "{table_name}" WHERE part_i_summary_12_total_revenue_cy > 0'
+            )
+            income_stats = cursor.fetchone()
+
+        cursor.execute(f'SELECT COUNT(DISTINCT st) FROM "{table_name}"')
+        state_count = cursor.fetchone()[0]
+
+    return total_count, income_stats, state_count
+
+
 @router.get("/export/status")
 async def export_status(dataset: str = "default"):
     try:
         table_name = resolve_table_name(dataset)
-        available_columns = set(get_table_columns(table_name))
 
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
-            total_count = cursor.fetchone()[0]
-
-            income_stats = (None, None, None)
-            if "part_i_summary_12_total_revenue_cy" in available_columns:
-                cursor.execute(
-                    f'SELECT MIN(part_i_summary_12_total_revenue_cy), MAX(part_i_summary_12_total_revenue_cy), AVG(part_i_summary_12_total_revenue_cy) FROM "{table_name}" WHERE part_i_summary_12_total_revenue_cy > 0'
-                )
-                income_stats = cursor.fetchone()
-
-            cursor.execute(f'SELECT COUNT(DISTINCT st) FROM "{table_name}"')
-            state_count = cursor.fetchone()[0]
-
-        return {
-            "success": True,
-            "dataset": dataset,
-            "total_records": total_count,
-            "income_stats": {
-                "min": income_stats[0],
-                "max": income_stats[1],
-                "avg": income_stats[2],
-            },
-            "states_count": state_count,
-            "supported_formats": ["CSV", "JSON", "Excel"],
-            "max_export_limit": 10000,
-        }
+        def load_status():
+            # Served from the summary cube instead of COUNT/MIN/MAX/AVG scans
+            if cube_has_rows(dataset):
+                summary = slice_cube(dataset)
+                income_stats = summary["totals"]["positive_revenue"]
+                total_count = summary["totals"]["record_count"]
+                income = (income_stats["min"], income_stats["max"], income_stats["avg"])
+                state_count = summary["states_count"]
+            else:
+                total_count, income, state_count = scan_export_status(table_name)
+            return {
+                "success": True,
+                "dataset": dataset,
+                "total_records": total_count,
+                "income_stats": {
+                    "min": income[0],
+                    "max": income[1],
+                    "avg": income[2],
+                },
+                "states_count": state_count,
+                "supported_formats": ["CSV", "JSON", "Excel"],
+                "max_export_limit": 10000,
+            }
+
+        return response_cache.get_or_compute("export-status", dataset, None, load_status)
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("export failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,90 @@
+import json
+import logging
+import sqlite3
 from fastapi import APIRouter, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional, Union
 from pydantic import BaseModel
-from db_utils import get_connection, get_table_columns, resolve_table_name
+from db_utils import (
+    detail_table_name,
+    get_connection,
+    get_detail_columns,
+    get_table_columns,
+    quote_identifier,
+    resolve_table_name,
+)
+from summary_cube import cube_has_rows, load_cube_cells
+from utils.pagination import ROWID_COLUMN, decode_cursor, keyset_condition, order_by_clause, page_rows
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# /filter/enhanced paging; the default keeps the old single-response size
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+COUNT_MODES = ("estimated", "exact", "none")
+ENHANCED_SORT_KEYS = [("part_i_summary_12_total_revenue_cy", "DESC"), ("campus", "ASC")]
+MAX_SORT_KEYS = 3
+# EINs per IN (...) lookup in /filter/details, well under SQLite's variable limit
+DETAIL_LOOKUP_CHUNK = 500
+
+
+def parse_sort_keys(value: Any, available_columns: List[str]) -> List[tuple]:
+    """
+    Validate requested sort keys against the table's columns.
+
+    Accepts "field:desc,other" or a list of {"field", "direction"} objects;
+    direction defaults to ASC. An empty value keeps the default order.
+    """
+    if not value:
+        return list(ENHANCED_SORT_KEYS)
+    items = value.split(",") if isinstance(value, str) else value
+    if not isinstance(items, list):
+        raise ValueError("sort must be a string or a list")
+
+    sort_keys = []
+    for item in items:
+        if isinstance(item, dict):
+            field, direction = item.get("field"), item.get("direction") or "ASC"
+        else:
+            field, _, direction = str(item).strip().partition(":")
+            direction = direction or "ASC"
+        field = str(field or "").strip()
+        direction = str(direction).strip().upper()
+        if not field:
+            continue
+        if field not in available_columns:
+            raise ValueError(f"Cannot sort by unknown field '{field}'")
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Invalid sort direction '{direction}' for field '{field}'")
+        if field not in [column for column, _ in sort_keys]:
+            sort_keys.append((field, direction))
+    if len(sort_keys) > MAX_SORT_KEYS:
+        raise ValueError(f"At most {MAX_SORT_KEYS} sort keys are supported")
+    return sort_keys or list(ENHANCED_SORT_KEYS)
+
+
+def indexed_columns(conn, table_name: str) -> set:
+    """Columns an index can deliver in order under a fiscal_year filter: leading, or right after fiscal_year."""
+    columns = set()
+    for index_row in conn.execute(f'PRAGMA index_list("{table_name}")').fetchall():
+        index_columns = [info[2] for info in sorted(conn.execute(f'PRAGMA index_info("{index_row[1]}")').fetchall())]
+        if index_columns:
+            columns.add(index_columns[0])
+        if len(index_columns) > 1 and index_columns[0] == "fiscal_year":
+            columns.add(index_columns[1])
+    return columns
+
+
+def describe_sort_plan(conn, sql: str, params: List[Any]) -> str:
+    """"index" when SQLite reads rows already in order, "partial" when only trailing keys are sorted, else "sort"."""
+    details = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    sorting = [detail for detail in details if "TEMP B-TREE FOR" in detail and "ORDER BY" in detail]
+    if not sorting:
+        return "index"
+    if any("RIGHT PART" in detail or "LAST TERM" in detail for detail in sorting):
+        return "partial"
+    return "sort"
 
 def normalize_fiscal_years(value: Any) -> List[int]:
     if value is None:
@@ -198,6 +279,7 @@ async def advanced_filter(request: FilterRequest):
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("filter query failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/filter/fields")
@@ -207,6 +289,13 @@ async def get_filter_fields(dataset: str = "default"):
     """
     table_name = resolve_table_name(dataset)
     available_columns = set(get_table_columns(table_name))
+    # Every hot column is sortable in /filter/enhanced; indexed ones page without a full sort
+    with get_connection() as conn:
+        indexed = indexed_columns(conn, table_name)
+    sort_fields = [
+        {"name": column, "indexed": column in indexed}
+        for column in get_table_columns(table_name)
+    ]
     field_definitions = {
         "campus": {
             "type": "string",
@@ -263,6 +352,7 @@ async def get_filter_fields(dataset: str = "default"):
         "success": True,
         "dataset": dataset,
         "fields": {name: config for name, config in field_definitions.items() if name in available_columns},
+        "sort_fields": sort_fields,
         "logic_operators": ["AND", "OR"],
         "order_directions": ["ASC", "DESC"]
     }
@@ -406,8 +496,132 @@ async def get_revenue_bands(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("filter query failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_enhanced_conditions(request: Dict[str, Any], selected_years: List[int]) -> tuple:
+    """
+    WHERE conditions for the frontend QueryForm filters.
+
+    Returns (conditions, params, cube_filters, cube_exact): cube_filters are
+    the load_cube_cells kwargs for the year/state/form part of the filter,
+    and cube_exact is False once any other filter narrows the rows further.
+    """
+    fiscal_month = request.get('fiscal_month')
+    geo_filters = request.get('geo_filters')
+    financial_filters = request.get('financial_filters')
+    operational_filters = request.get('operational_filters')
+    workforce_filters = request.get('workforce_filters')
+    filing_filters = request.get('filing_filters')
+
+    conditions = []
+    params = []
+    cube_filters = {"fiscal_years": selected_years, "states": [], "form_types": []}
+    cube_exact = True
+
+    # Always filter by selected fiscal year(s).
+    year_placeholders = ", ".join(["?" for _ in selected_years])
+    conditions.append(f"fiscal_year IN ({year_placeholders})")
+    params.extend(selected_years)
+
+    # Filter by fiscal month if provided
+    if fiscal_month:
+        conditions.append("fiscal_month = ?")
+        params.append(fiscal_month)
+        cube_exact = False
+
+    # Geographic filters
+    if geo_filters:
+        st_value = geo_filters.get('st')
+        if st_value:
+            conditions.append("st = ?")
+            params.append(st_value.upper())
+            cube_filters["states"] = [st_value.upper()]
+
+        city_value = geo_filters.get('city')
+        if city_value:
+            conditions.append("city = ?")
+            params.append(city_value)
+            cube_exact = False
+
+    # Financial filters
+    if financial_filters:
+        if financial_filters.get('min_revenue') is not None:
+            conditions.append("part_i_summary_12_total_revenue_cy >= ?")
+            params.append(financial_filters['min_revenue'])
+            cube_exact = False
+
+        if financial_filters.get('max_revenue') is not None:
+            conditions.append("part_i_summary_12_total_revenue_cy <= ?")
+            params.append(financial_filters['max_revenue'])
+            cube_exact = False
+
+    # Operational filters kept for backward compatibility with the older frontend.
+    if operational_filters:
+        if operational_filters.get('min_ilu') is not None:
+            conditions.append("employees >= ?")
+            params.append(operational_filters['min_ilu'])
+            cube_exact = False
+
+        if operational_filters.get('max_ilu') is not None:
+            conditions.append("employees <= ?")
+            params.append(operational_filters['max_ilu'])
+            cube_exact = False
+
+    # Workforce filters for ProPublica-first query flow.
+    if workforce_filters:
+        if workforce_filters.get('min_employees') is not None:
+            conditions.append("employees >= ?")
+            params.append(workforce_filters['min_employees'])
+            cube_exact = False
+
+        if workforce_filters.get('max_employees') is not None:
+            conditions.append("employees <= ?")
+            params.append(workforce_filters['max_employees'])
+            cube_exact = False
+
+    # Filing filters for ProPublica form type selection.
+    if filing_filters:
+        form_types = filing_filters.get('form_types') or []
+        normalized_form_types = [str(form_type).strip() for form_type in form_types if str(form_type).strip()]
+        if normalized_form_types:
+            placeholders = ", ".join(["?" for _ in normalized_form_types])
+            conditions.append(f"propublica_form_type IN ({placeholders})")
+            params.extend(normalized_form_types)
+            cube_filters["form_types"] = normalized_form_types
+
+    return conditions, params, cube_filters, cube_exact
+
+
+def count_matches(
+    conn,
+    dataset: str,
+    table_name: str,
+    where_clause: str,
+    params: List[Any],
+    cube_filters: Dict[str, Any],
+    cube_exact: bool,
+    count_mode: str,
+) -> tuple:
+    """
+    (total, is_exact). "estimated" answers from the summary cube: exact when
+    every filter is a cube dimension, otherwise an upper bound for the
+    year/state/form scope. "exact" always runs COUNT(*), as does "estimated"
+    when the cube has not been built for the dataset or cannot be read.
+    """
+    if count_mode == "none":
+        return None, False
+    if count_mode == "estimated":
+        try:
+            if cube_has_rows(dataset):
+                cells = load_cube_cells(dataset, **cube_filters)
+                return sum(cell["record_count"] for cell in cells), cube_exact
+        except sqlite3.Error:
+            logger.warning("summary cube read failed for %s; counting with COUNT(*)", dataset, exc_info=True)
+    cursor = conn.execute(f'SELECT COUNT(*) FROM "{table_name}" WHERE {where_clause}', params)
+    return cursor.fetchone()[0], True
+
+
 @router.post("/filter/enhanced")
 async def enhanced_filter_for_frontend(
     request: dict = Body(...)
@@ -415,19 +629,42 @@ async def enhanced_filter_for_frontend(
     """
     Enhanced filter endpoint specifically designed for the frontend QueryForm
     Supports geographic, financial, and operational filtering with fiscal year/month
+
+    sort takes up to three keys ("field:desc,campus" or a list of
+    {"field", "direction"}) validated against the table's columns; the
+    default is revenue descending, then campus. With "explain": true the
+    response adds sort_plan, which reports whether SQLite could read the
+    page straight off an index.
+
+    Results are keyset-paginated: pass the returned next_cursor back as
+    cursor (with the same sort) to get the following page_size rows. format "ndjson" streams
+    every row after the cursor as newline-delimited JSON instead, with the
+    total in the X-Total-Count / X-Total-Exact headers. count_mode is
+    "exact" (COUNT(*), default), "estimated" (summary cube; total_exact is
+    false when the total is only an upper bound) or "none"; the total is
+    only computed for the first page.
     """
     try:
         # Extract values from request body
         fiscal_year = request.get('fiscal_year')
         fiscal_years = request.get('fiscal_years')
-        fiscal_month = request.get('fiscal_month')
-        geo_filters = request.get('geo_filters')
-        financial_filters = request.get('financial_filters')
-        operational_filters = request.get('operational_filters')
-        workforce_filters = request.get('workforce_filters')
-        filing_filters = request.get('filing_filters')
         dataset = request.get('dataset', 'default')
-        
+        cursor_token = request.get('cursor')
+        response_format = request.get('format', 'json')
+        count_mode = request.get('count_mode', 'exact')
+        explain = bool(request.get('explain'))
+        try:
+            page_size = int(request.get('page_size') or DEFAULT_PAGE_SIZE)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="page_size must be an integer")
+
+        if response_format not in ('json', 'ndjson'):
+            raise HTTPException(status_code=400, detail="format must be json or ndjson")
+        if count_mode not in COUNT_MODES:
+            raise HTTPException(status_code=400, detail=f"count_mode must be one of: {', '.join(COUNT_MODES)}")
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
         selected_years = normalize_fiscal_years(fiscal_years)
         if fiscal_year is not None:
             selected_years.extend(normalize_fiscal_years(fiscal_year))
@@ -437,104 +674,150 @@ async def enhanced_filter_for_frontend(
             raise HTTPException(status_code=400, detail="At least one fiscal year is required")
         
         table_name = resolve_table_name(dataset)
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        conditions = []
-        params = []
-        
-        # Always filter by selected fiscal year(s).
-        year_placeholders = ", ".join(["?" for _ in selected_years])
-        conditions.append(f"fiscal_year IN ({year_placeholders})")
-        params.extend(selected_years)
-        
-        # Filter by fiscal month if provided
-        if fiscal_month:
-            conditions.append("fiscal_month = ?")
-            params.append(fiscal_month)
-        
-        # Geographic filters
-        if geo_filters:
-            st_value = geo_filters.get('st')
-            if st_value:
-                conditions.append("st = ?")
-                params.append(st_value.upper())
-            
-            city_value = geo_filters.get('city')
-            if city_value:
-                conditions.append("city = ?")
-                params.append(city_value)
-        
-        # Financial filters
-        if financial_filters:
-            if financial_filters.get('min_revenue') is not None:
-                conditions.append("part_i_summary_12_total_revenue_cy >= ?")
-                params.append(financial_filters['min_revenue'])
-            
-            if financial_filters.get('max_revenue') is not None:
-                conditions.append("part_i_summary_12_total_revenue_cy <= ?")
-                params.append(financial_filters['max_revenue'])
-        
-        # Operational filters kept for backward compatibility with the older frontend.
-        if operational_filters:
-            if operational_filters.get('min_ilu') is not None:
-                conditions.append("employees >= ?")
-                params.append(operational_filters['min_ilu'])
-            
-            if operational_filters.get('max_ilu') is not None:
-                conditions.append("employees <= ?")
-                params.append(operational_filters['max_ilu'])
-
-        # Workforce filters for ProPublica-first query flow.
-        if workforce_filters:
-            if workforce_filters.get('min_employees') is not None:
-                conditions.append("employees >= ?")
-                params.append(workforce_filters['min_employees'])
-
-            if workforce_filters.get('max_employees') is not None:
-                conditions.append("employees <= ?")
-                params.append(workforce_filters['max_employees'])
-
-        # Filing filters for ProPublica form type selection.
-        if filing_filters:
-            form_types = filing_filters.get('form_types') or []
-            normalized_form_types = [str(form_type).strip() for form_type in form_types if str(form_type).strip()]
-            if normalized_form_types:
-                placeholders = ", ".join(["?" for _ in normalized_form_types])
-                conditions.append(f"propublica_form_type IN ({placeholders})")
-                params.extend(normalized_form_types)
-        
+        conditions, params, cube_filters, cube_exact = build_enhanced_conditions(request, selected_years)
         where_clause = " AND ".join(conditions)
-        
+        try:
+            sort_keys = parse_sort_keys(request.get('sort'), get_table_columns(table_name))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if cursor_token:
+            try:
+                values, rowid = decode_cursor(cursor_token, sort_keys)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            keyset_sql, keyset_params = keyset_condition(sort_keys, values, rowid)
+            page_conditions.append(keyset_sql)
+            page_params.extend(keyset_params)
+
         sql = f"""
-        SELECT * FROM "{table_name}" 
-        WHERE {where_clause}
-        ORDER BY part_i_summary_12_total_revenue_cy DESC, campus
-        LIMIT 1000
+        SELECT rowid AS {ROWID_COLUMN}, * FROM "{table_name}" 
+        WHERE {" AND ".join(page_conditions)}
+        ORDER BY {order_by_clause(sort_keys)}
         """
+
+        if response_format == 'ndjson':
+            conn = get_connection(check_same_thread=False)
+            total, total_exact = (None, False)
+            if not cursor_token:
+                try:
+                    total, total_exact = count_matches(conn, dataset, table_name, where_clause, params, cube_filters, cube_exact, count_mode)
+                except BaseException:
+                    # stream_ndjson closes the connection, but only once the response owns it
+                    conn.close()
+                    raise
+            headers = {"X-Total-Count": "" if total is None else str(total), "X-Total-Exact": str(total_exact).lower()}
+            return StreamingResponse(stream_ndjson(conn, sql, page_params), media_type="application/x-ndjson", headers=headers)
+
+        conn = get_connection()
+        try:
+            total, total_exact = (None, False)
+            if not cursor_token:
+                total, total_exact = count_matches(conn, dataset, table_name, where_clause, params, cube_filters, cube_exact, count_mode)
+            # EXPLAIN costs an extra round trip, so only on request
+            sort_plan = describe_sort_plan(conn, f"{sql} LIMIT ?", page_params + [page_size + 1]) if explain else None
+            cursor = conn.execute(f"{sql} LIMIT ?", page_params + [page_size + 1])
+            columns = [description[0] for description in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+        nonprofits, next_cursor = page_rows(rows, sort_keys, page_size)
         
-        cursor.execute(sql, params)
-        results = cursor.fetchall()
-        
-        # Get column names
-        columns = [description[0] for description in cursor.description]
-        
-        # Convert to dictionary list
-        nonprofits = []
-        for row in results:
-            nonprofit = dict(zip(columns, row))
-            nonprofits.append(nonprofit)
-        
-        conn.close()
-        
-        return {
+        response = {
             "success": True,
             "dataset": dataset,
             "fiscal_years": selected_years,
             "count": len(nonprofits),
+            "total": total,
+            "total_exact": total_exact,
+            "page_size": page_size,
+            "sort": [{"field": column, "direction": direction} for column, direction in sort_keys],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
             "results": nonprofits
         }
+        if explain:
+            response["sort_plan"] = sort_plan
+        return response
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("filter query failed")
         raise HTTPException(status_code=500, detail=str(e)) 
+
+
+def stream_ndjson(conn, sql: str, params: List[Any], batch_size: int = 500):
+    """Yield one JSON line per row, fetching in batches so memory stays flat."""
+    try:
+        cursor = conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            lines = []
+            for row in batch:
+                record = dict(zip(columns, row))
+                record.pop(ROWID_COLUMN, None)
+                lines.append(json.dumps(record, default=str))
+            yield "\n".join(lines) + "\n"
+    finally:
+        conn.close()
+
+
+@router.post("/filter/details")
+async def get_row_details(request: dict = Body(...)):
+    """
+    Detail-table values for specific rows.
+
+    /filter/enhanced and /search return hot columns only; the query form
+    calls this for the rows it previews when the user picks fields that
+    /api/fields tags as storage "detail". Body: dataset, keys (a list of
+    {"ein", "fiscal_year"}, at most MAX_PAGE_SIZE) and fields.
+    """
+    dataset = request.get('dataset', 'default')
+    keys = request.get('keys') or []
+    fields = request.get('fields') or []
+    try:
+        table_name = resolve_table_name(dataset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not isinstance(keys, list) or not isinstance(fields, list):
+        raise HTTPException(status_code=400, detail="keys and fields must be lists")
+    if len(keys) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} keys are supported")
+
+    detail_columns = get_detail_columns(table_name)
+    unknown = [field for field in fields if field not in detail_columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Not detail fields: {', '.join(map(str, unknown))}")
+    try:
+        wanted = {(str(key['ein']), key.get('fiscal_year')) for key in keys}
+    except (KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Each key needs an ein")
+    if not fields or not wanted:
+        return {"success": True, "dataset": dataset, "fields": fields, "results": []}
+
+    select_list = ", ".join(quote_identifier(column) for column in ["ein", "fiscal_year"] + fields)
+    eins = sorted({ein for ein, _ in wanted})
+    results = []
+    try:
+        with get_connection() as conn:
+            for start in range(0, len(eins), DETAIL_LOOKUP_CHUNK):
+                chunk = eins[start:start + DETAIL_LOOKUP_CHUNK]
+                cursor = conn.execute(
+                    f"SELECT {select_list} FROM {quote_identifier(detail_table_name(table_name))} "
+                    f"WHERE ein IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                )
+                columns = [description[0] for description in cursor.description]
+                for row in cursor.fetchall():
+                    record = dict(zip(columns, row))
+                    if (record["ein"], record["fiscal_year"]) in wanted:
+                        results.append(record)
+    except Exception as e:
+        logger.exception("detail lookup failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"success": True, "dataset": dataset, "fields": fields, "results": results}
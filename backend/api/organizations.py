@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from db_utils import (
+    detail_join_clause,
+    get_connection,
+    get_detail_columns,
+    get_table_columns,
+    get_table_version,
+    quote_identifier,
+    resolve_table_name,
+    table_exists,
+)
+from utils.cache import response_cache
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Raw per-filing rows written by the harvester's SQLite sink, which bumps its
+# own version in dataset_versions independently of propublica_nonprofits
+PROPUBLICA_FILINGS_TABLE = "propublica_filings"
+ORGANIZATION_FIELDS = ["ein", "campus", "address", "city", "st", "zip", "propublica_organization_name"]
+
+
+def ein_candidates(ein: str) -> List[str]:
+    """EINs are stored zero-padded in the ProPublica tables but may be unpadded in CSV imports."""
+    digits = "".join(ch for ch in str(ein) if ch.isdigit())
+    if not digits or len(digits) > 9:
+        raise HTTPException(status_code=400, detail=f"Invalid EIN: {ein}")
+    padded = digits.zfill(9)
+    return sorted({padded, padded.lstrip("0") or "0"})
+
+
+def load_organization(dataset: str, table_name: str, candidates: List[str], include_filings: bool) -> Dict[str, Any]:
+    hot_columns = get_table_columns(table_name)
+    detail_columns = [column for column in get_detail_columns(table_name) if column not in hot_columns]
+    select_list = [f"h.{quote_identifier(column)}" for column in hot_columns]
+    select_list += [f"d.{quote_identifier(column)}" for column in detail_columns]
+    from_clause = detail_join_clause(table_name) if detail_columns else f"{quote_identifier(table_name)} AS h"
+    placeholders = ", ".join("?" for _ in candidates)
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        # Single lookup on the ein index; every fiscal year comes back in one pass
+        cursor.execute(
+            f"SELECT {', '.join(select_list)} FROM {from_clause} "
+            f"WHERE h.ein IN ({placeholders}) "
+            f"ORDER BY h.fiscal_year IS NULL, h.fiscal_year DESC, h.fiscal_month DESC",
+            candidates,
+        )
+        columns = [description[0] for description in cursor.description]
+        history = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        filings = None
+        if include_filings and dataset == "propublica" and table_exists(PROPUBLICA_FILINGS_TABLE):
+            cursor.execute(
+                f"SELECT * FROM {quote_identifier(PROPUBLICA_FILINGS_TABLE)} "
+                f"WHERE ein IN ({placeholders}) ORDER BY tax_year DESC, filing_date DESC",
+                candidates,
+            )
+            filing_columns = [description[0] for description in cursor.description]
+            filings = [dict(zip(filing_columns, row)) for row in cursor.fetchall()]
+
+    if not history:
+        return {}
+
+    latest = history[0]
+    payload = {
+        "dataset": dataset,
+        "ein": latest["ein"],
+        "organization": {field: latest[field] for field in ORGANIZATION_FIELDS if field in latest},
+        "fiscal_years": sorted({row["fiscal_year"] for row in history if row.get("fiscal_year") is not None}, reverse=True),
+        "history": history,
+    }
+    if filings is not None:
+        payload["filings"] = filings
+    body = json.dumps(payload, default=str, sort_keys=True)
+    return {"body": body, "etag": f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'}
+
+
+@router.get("/organizations/{ein}")
+async def get_organization(
+    ein: str,
+    request: Request,
+    dataset: str = Query("default", description="Dataset name: default or propublica"),
+    include_filings: bool = Query(True, description="Include raw ProPublica filings (propublica dataset only)"),
+):
+    """
+    One organization with every fiscal year on file.
+
+    Responses are cached per dataset version (plus the filings table version
+    when filings are included) and carry an ETag; clients that send
+    If-None-Match with the current tag get an empty 304.
+    """
+    try:
+        table_name = resolve_table_name(dataset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    candidates = ein_candidates(ein)
+
+    try:
+        filings_version = None
+        if include_filings and dataset == "propublica":
+            with get_connection() as conn:
+                filings_version = get_table_version(conn, PROPUBLICA_FILINGS_TABLE)
+        cached = response_cache.get_or_compute(
+            "organization",
+            dataset,
+            (tuple(candidates), include_filings, filings_version),
+            lambda: load_organization(dataset, table_name, candidates, include_filings),
+        )
+    except Exception as e:
+        logger.exception("organization lookup failed")
+        raise HTTPException(status_code=500, detail=f"Failed to load organization: {str(e)}")
+
+    if not cached:
+        raise HTTPException(status_code=404, detail=f"Organization {ein} not found in dataset '{dataset}'")
+
+    headers = {"ETag": cached["etag"], "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if cached["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached["body"], media_type="application/json", headers=headers)
@@ -0,0 +1,169 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from api.organizations import ein_candidates
+from api.stats import split_list
+from db_utils import get_connection, quote_identifier, resolve_table_name, table_exists
+from utils.cache import response_cache
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Friendly names for the indexed (fiscal_year, metric) leaderboards; any other
+# numeric hot column can be ranked by its column name.
+RANKING_METRICS = {
+    "revenue": "part_i_summary_12_total_revenue_cy",
+    "employees": "employees",
+}
+RANKING_EXCLUDED_COLUMNS = {"fiscal_year", "fiscal_month"}
+DISPLAY_COLUMNS = ["ein", "campus", "city", "st", "fiscal_year", "propublica_form_type"]
+
+
+def numeric_columns(table_name: str) -> List[str]:
+    with get_connection() as conn:
+        cursor = conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+        return [
+            row[1]
+            for row in cursor.fetchall()
+            if row[2].upper() in ("INTEGER", "REAL", "NUMERIC", "FLOAT") and row[1] not in RANKING_EXCLUDED_COLUMNS
+        ]
+
+
+def resolve_metric(table_name: str, metric: str) -> str:
+    column = RANKING_METRICS.get(metric, metric)
+    if column not in numeric_columns(table_name):
+        valid = sorted(set(RANKING_METRICS) | set(numeric_columns(table_name)))
+        raise HTTPException(status_code=400, detail=f"Invalid metric '{metric}'. Valid metrics: {', '.join(valid)}")
+    return column
+
+
+def scope_condition(
+    column: str,
+    fiscal_years: List[int],
+    states: List[str],
+    form_types: List[str],
+    available: List[str],
+) -> tuple:
+    conditions = [f"{quote_identifier(column)} IS NOT NULL"]
+    params: List[Any] = []
+    for scope_column, values in (("fiscal_year", fiscal_years), ("st", states), ("propublica_form_type", form_types)):
+        if not values:
+            continue
+        if scope_column not in available:
+            conditions.append("0")
+            continue
+        conditions.append(f"{scope_column} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    return " AND ".join(conditions), params
+
+
+def percentile(rank: int, total: int) -> Optional[float]:
+    """Share of the scope ranked at or below this position (100 = top)."""
+    return round(100.0 * (total - rank + 1) / total, 2) if total else None
+
+
+def load_ranking(
+    table_name: str,
+    column: str,
+    fiscal_years: List[int],
+    states: List[str],
+    form_types: List[str],
+    limit: int,
+    candidates: List[str],
+) -> Dict[str, Any]:
+    with get_connection() as conn:
+        available = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})").fetchall()]
+        where_clause, params = scope_condition(column, fiscal_years, states, form_types, available)
+        metric = quote_identifier(column)
+        display = [quote_identifier(name) for name in DISPLAY_COLUMNS if name in available and name != column]
+        table = quote_identifier(table_name)
+
+        # The count is answered from the (fiscal_year, metric) index alone
+        total = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where_clause}", params).fetchone()[0]
+
+        # ORDER BY ... LIMIT walks the (fiscal_year, metric) index backwards for
+        # a single year; for several years SQLite's sorter keeps only the top N.
+        # RANK() over the top N equals the global rank since every higher value
+        # is inside the window.
+        cursor = conn.execute(
+            f"SELECT {', '.join(display)}, {metric} AS value, RANK() OVER (ORDER BY {metric} DESC) AS rank "
+            f"FROM (SELECT {', '.join(display)}, {metric} FROM {table} WHERE {where_clause} "
+            f"ORDER BY {metric} DESC LIMIT ?)",
+            params + [limit],
+        )
+        columns = [description[0] for description in cursor.description]
+        leaders = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        organization = None
+        if candidates:
+            placeholders = ", ".join("?" for _ in candidates)
+            cursor = conn.execute(
+                f"SELECT {', '.join(display)}, {metric} AS value FROM {table} "
+                f"WHERE {where_clause} AND ein IN ({placeholders}) ORDER BY {metric} DESC LIMIT 1",
+                params + candidates,
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                organization = dict(zip([description[0] for description in cursor.description], row))
+                higher = conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE {where_clause} AND {metric} > ?",
+                    params + [organization["value"]],
+                ).fetchone()[0]
+                organization["rank"] = higher + 1
+
+    for entry in leaders + ([organization] if organization else []):
+        entry["percentile"] = percentile(entry["rank"], total)
+    return {"total": total, "leaders": leaders, "organization": organization}
+
+
+@router.get("/rankings")
+async def get_rankings(
+    dataset: str = Query("default", description="Dataset name: default or propublica"),
+    metric: str = Query("revenue", description=f"{', '.join(RANKING_METRICS)} or any numeric column"),
+    fiscal_years: Optional[str] = Query(None, description="Comma-separated fiscal years"),
+    states: Optional[str] = Query(None, description="Comma-separated state codes"),
+    form_types: Optional[str] = Query(None, description="Comma-separated form types (propublica only)"),
+    limit: int = Query(25, ge=1, le=1000, description="Number of leaders to return"),
+    ein: Optional[str] = Query(None, description="Also report the rank of this organization"),
+):
+    """
+    Top-N organizations by a numeric column within a scope, with rank and percentile.
+
+    Ties share a rank. Responses are cached per dataset version.
+    """
+    try:
+        table_name = resolve_table_name(dataset)
+        year_list = [int(year) for year in split_list(fiscal_years)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not table_exists(table_name):
+        raise HTTPException(status_code=404, detail=f"Dataset '{dataset}' has not been loaded")
+
+    column = resolve_metric(table_name, metric)
+    state_list = [state.upper() for state in split_list(states)]
+    form_type_list = split_list(form_types)
+    candidates = ein_candidates(ein) if ein else []
+
+    try:
+        key = (column, tuple(year_list), tuple(state_list), tuple(form_type_list), limit, tuple(candidates))
+        result = response_cache.get_or_compute(
+            "rankings",
+            dataset,
+            key,
+            lambda: load_ranking(table_name, column, year_list, state_list, form_type_list, limit, candidates),
+        )
+    except Exception as e:
+        logger.exception("ranking query failed")
+        raise HTTPException(status_code=500, detail=f"Failed to load rankings: {str(e)}")
+
+    return {
+        "success": True,
+        "dataset": dataset,
+        "metric": metric,
+        "column": column,
+        "filters": {"fiscal_years": year_list, "states": state_list, "form_types": form_type_list},
+        **result,
+    }
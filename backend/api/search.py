@@ -1,9 +1,13 @@
+import logging
 from fastapi import APIRouter, Query, HTTPException, Body
 from typing import List, Optional
 # No longer need complex date parsing functions since data source is clean!
 from db_utils import get_connection, get_table_columns, resolve_table_name
+from logging_setup import debug_enabled
+from utils.cache import response_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 def normalize_fiscal_years(value):
     if value is None:
@@ -246,18 +250,22 @@ async def get_available_years(dataset: str = Query("default", description="Datas
     """
     try:
         table_name = resolve_table_name(dataset)
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # SQL query becomes extremely simple - directly use clean columns
-        cursor.execute(
-            f'SELECT DISTINCT fiscal_year FROM "{table_name}" WHERE fiscal_year IS NOT NULL ORDER BY fiscal_year DESC'
-        )
-        
-        # Directly get sorted year list
-        years = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
+
+        def load_years():
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            # SQL query becomes extremely simple - directly use clean columns
+            cursor.execute(
+                f'SELECT DISTINCT fiscal_year FROM "{table_name}" WHERE fiscal_year IS NOT NULL ORDER BY fiscal_year DESC'
+            )
+
+            # Directly get sorted year list
+            years = [row[0] for row in cursor.fetchall()]
+            conn.close()
+            return years
+
+        years = response_cache.get_or_compute("available-years", dataset, None, load_years)
         return {"dataset": dataset, "years": years}
         
     except HTTPException:
@@ -276,19 +284,23 @@ async def get_available_months(
     """
     try:
         table_name = resolve_table_name(dataset)
-        conn = get_connection()
-        cursor = conn.cursor()
 
-        # SQL query becomes extremely simple - directly use clean columns
-        cursor.execute(
-            f'SELECT DISTINCT fiscal_month FROM "{table_name}" WHERE fiscal_year = ? AND fiscal_month IS NOT NULL ORDER BY fiscal_month',
-            (year,)
-        )
-        
-        # Directly get sorted month list
-        months = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
+        def load_months():
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            # SQL query becomes extremely simple - directly use clean columns
+            cursor.execute(
+                f'SELECT DISTINCT fiscal_month FROM "{table_name}" WHERE fiscal_year = ? AND fiscal_month IS NOT NULL ORDER BY fiscal_month',
+                (year,)
+            )
+
+            # Directly get sorted month list
+            months = [row[0] for row in cursor.fetchall()]
+            conn.close()
+            return months
+
+        months = response_cache.get_or_compute("available-months", dataset, year, load_months)
         return {"dataset": dataset, "months": months}
 
     except HTTPException:
@@ -306,22 +318,26 @@ async def get_available_states(
     """
     try:
         table_name = resolve_table_name(dataset)
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        if fiscal_year:
-            cursor.execute(
-                f'SELECT DISTINCT st FROM "{table_name}" WHERE fiscal_year = ? AND st IS NOT NULL ORDER BY st',
-                (fiscal_year,)
-            )
-        else:
-            cursor.execute(
-                f'SELECT DISTINCT st FROM "{table_name}" WHERE st IS NOT NULL ORDER BY st'
-            )
-        
-        states = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
+
+        def load_states():
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            if fiscal_year:
+                cursor.execute(
+                    f'SELECT DISTINCT st FROM "{table_name}" WHERE fiscal_year = ? AND st IS NOT NULL ORDER BY st',
+                    (fiscal_year,)
+                )
+            else:
+                cursor.execute(
+                    f'SELECT DISTINCT st FROM "{table_name}" WHERE st IS NOT NULL ORDER BY st'
+                )
+
+            states = [row[0] for row in cursor.fetchall()]
+            conn.close()
+            return states
+
+        states = response_cache.get_or_compute("available-states", dataset, fiscal_year, load_states)
         return {"dataset": dataset, "states": states}
         
     except HTTPException:
@@ -340,31 +356,37 @@ async def get_available_cities(
     """
     try:
         table_name = resolve_table_name(dataset)
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        conditions = []
-        params = []
-        
-        if fiscal_year:
-            conditions.append("fiscal_year = ?")
-            params.append(fiscal_year)
-        
-        if state:
-            conditions.append("st = ?")
-            params.append(state.upper())
-        
-        # Always filter out null cities
-        conditions.append("city IS NOT NULL")
-        
-        where_clause = " AND ".join(conditions) if conditions else "city IS NOT NULL"
-        
-        sql = f'SELECT DISTINCT city FROM "{table_name}" WHERE {where_clause} ORDER BY city'
-        cursor.execute(sql, params)
-        
-        cities = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
+
+        def load_cities():
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            conditions = []
+            params = []
+
+            if fiscal_year:
+                conditions.append("fiscal_year = ?")
+                params.append(fiscal_year)
+
+            if state:
+                conditions.append("st = ?")
+                params.append(state.upper())
+
+            # Always filter out null cities
+            conditions.append("city IS NOT NULL")
+
+            where_clause = " AND ".join(conditions) if conditions else "city IS NOT NULL"
+
+            sql = f'SELECT DISTINCT city FROM "{table_name}" WHERE {where_clause} ORDER BY city'
+            cursor.execute(sql, params)
+
+            cities = [row[0] for row in cursor.fetchall()]
+            conn.close()
+            return cities
+
+        cities = response_cache.get_or_compute(
+            "available-cities", dataset, (fiscal_year, state.upper() if state else None), load_cities
+        )
         return {"dataset": dataset, "cities": cities}
         
     except HTTPException:
@@ -407,12 +429,13 @@ async def batch_search_api(
         # Build search conditions for multiple terms
         all_results = []
         
-        print(f"=== BATCH SEARCH DEBUG ===")
-        print(f"Search type: {search_type}")
-        print(f"Search terms: {search_terms}")
-        print(f"Fiscal years: {selected_years}")
-        print(f"Fiscal month: {fiscal_month}")
-        print(f"=========================")
+        debug = debug_enabled(logger)
+        if debug:
+            logger.debug(
+                "batch search started",
+                extra={"search_type": search_type, "term_count": len(search_terms),
+                       "fiscal_years": selected_years, "fiscal_month": fiscal_month},
+            )
         
         for term in search_terms:
             term = term.strip()
@@ -474,13 +497,14 @@ async def batch_search_api(
                 # Add sorting parameters for name search
                 params.extend([f"{term}%", f"%{term}%"])
             
-            print(f"Executing SQL for term '{term}': {sql}")
-            print(f"Parameters: {params}")
-            
             cursor.execute(sql, params)
             results = cursor.fetchall()
             
-            print(f"Found {len(results)} results for term '{term}'")
+            if debug:
+                logger.debug(
+                    "batch search term",
+                    extra={"term": term, "sql": " ".join(sql.split()), "params": params, "matches": len(results)},
+                )
             
             # Get column names
             columns = [description[0] for description in cursor.description]
@@ -494,7 +518,8 @@ async def batch_search_api(
         
         conn.close()
         
-        print(f"Total unique results: {len(all_results)}")
+        if debug:
+            logger.debug("batch search finished", extra={"unique_results": len(all_results)})
         
         return {
             "success": True,
@@ -508,5 +533,5 @@ async def batch_search_api(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in batch search: {str(e)}")
+        logger.exception("batch search failed")
         raise HTTPException(status_code=500, detail=str(e)) 
@@ -0,0 +1,120 @@
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from db_utils import resolve_table_name
+from quantile_sketch import SKETCH_METRICS, load_merged_sketch
+from summary_cube import CUBE_DIMENSIONS, slice_cube
+from utils.cache import response_cache
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+@router.get("/stats")
+async def get_stats(
+    dataset: str = Query("default", description="Dataset name: default or propublica"),
+    fiscal_years: Optional[str] = Query(None, description="Comma-separated fiscal years"),
+    states: Optional[str] = Query(None, description="Comma-separated state codes"),
+    form_types: Optional[str] = Query(None, description="Comma-separated form types (propublica only)"),
+    group_by: Optional[str] = Query(None, description=f"Comma-separated dimensions: {', '.join(CUBE_DIMENSIONS)}"),
+):
+    """
+    Dashboard statistics sliced from the pre-aggregated summary cube.
+
+    Totals (counts, revenue/employee sum, min, max, avg) are always returned;
+    group_by additionally rolls the slice up per dimension value.
+    """
+    try:
+        resolve_table_name(dataset)
+        year_list = [int(year) for year in split_list(fiscal_years)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    dimensions = split_list(group_by)
+    invalid = [dimension for dimension in dimensions if dimension not in CUBE_DIMENSIONS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by dimension: {', '.join(invalid)}")
+    state_list = [state.upper() for state in split_list(states)]
+    form_type_list = split_list(form_types)
+
+    try:
+        key = (tuple(year_list), tuple(state_list), tuple(form_type_list), tuple(dimensions))
+        result = response_cache.get_or_compute(
+            "stats",
+            dataset,
+            key,
+            lambda: slice_cube(dataset, dimensions, year_list, state_list, form_type_list),
+        )
+    except Exception as e:
+        logger.exception("statistics query failed")
+        raise HTTPException(status_code=500, detail=f"Failed to load statistics: {str(e)}")
+
+    return {
+        "success": True,
+        "filters": {"fiscal_years": year_list, "states": state_list, "form_types": form_type_list},
+        **result,
+    }
+
+
+@router.get("/stats/distribution")
+async def get_distribution(
+    dataset: str = Query("default", description="Dataset name: default or propublica"),
+    metric: str = Query("revenue", description=f"One of: {', '.join(SKETCH_METRICS)}"),
+    fiscal_years: Optional[str] = Query(None, description="Comma-separated fiscal years"),
+    states: Optional[str] = Query(None, description="Comma-separated state codes"),
+    percentiles: str = Query("0.1,0.25,0.5,0.75,0.9,0.99", description="Comma-separated quantiles in [0, 1]"),
+    bins: int = Query(10, ge=1, le=100, description="Histogram bin count"),
+):
+    """
+    Approximate percentiles and a histogram for revenue or employees.
+
+    Merges the stored per-(year, state) sketches for the slice, so the cost
+    depends on the number of cells, not on the number of filings.
+    """
+    try:
+        resolve_table_name(dataset)
+        year_list = [int(year) for year in split_list(fiscal_years)]
+        quantile_list = [float(value) for value in split_list(percentiles)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if metric not in SKETCH_METRICS:
+        raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
+    if any(not 0 <= value <= 1 for value in quantile_list):
+        raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 1")
+    state_list = [state.upper() for state in split_list(states)]
+
+    def load_distribution():
+        sketch = load_merged_sketch(dataset, metric, year_list, state_list)
+        return {
+            "count": sketch.count,
+            "min": sketch.min,
+            "max": sketch.max,
+            "mean": sketch.total / sketch.count if sketch.count else None,
+            "relative_accuracy": sketch.relative_accuracy,
+            "percentiles": {str(value): sketch.quantile(value) for value in quantile_list},
+            "histogram": sketch.histogram(bins),
+        }
+
+    try:
+        key = (metric, tuple(year_list), tuple(state_list), tuple(quantile_list), bins)
+        result = response_cache.get_or_compute("stats-distribution", dataset, key, load_distribution)
+    except Exception as e:
+        logger.exception("statistics query failed")
+        raise HTTPException(status_code=500, detail=f"Failed to load distribution: {str(e)}")
+
+    return {
+        "success": True,
+        "dataset": dataset,
+        "metric": metric,
+        "filters": {"fiscal_years": year_list, "states": state_list},
+        **result,
+    }
@@ -0,0 +1,223 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from api.organizations import ein_candidates
+from api.stats import split_list
+from db_utils import (
+    detail_join_clause,
+    detail_table_name,
+    get_connection,
+    get_table_columns,
+    quote_identifier,
+    resolve_table_name,
+    table_exists,
+)
+from utils.cache import response_cache
+
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# metric name -> source column; expenses live in the detail table
+TREND_METRICS = {
+    "revenue": "part_i_summary_12_total_revenue_cy",
+    "expenses": "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy",
+    "employees": "employees",
+}
+TREND_DIMENSIONS = {"st": "st", "form_type": "propublica_form_type"}
+
+
+def build_changes_cte(table_name: str, ein_filter: Optional[List[str]] = None) -> tuple:
+    """
+    WITH clause producing one row per (ein, fiscal_year) with the previous
+    filing's year and metric values, computed by LAG over the ein + fiscal_year
+    ordering so SQLite can walk the (ein, fiscal_year) index.
+    """
+    hot_columns = set(get_table_columns(table_name))
+    detail_name = detail_table_name(table_name)
+    detail_columns = set(get_table_columns(detail_name)) if table_exists(detail_name) else set()
+
+    def source(column: str) -> str:
+        if column in hot_columns:
+            return f"h.{quote_identifier(column)}"
+        if column in detail_columns:
+            return f"d.{quote_identifier(column)}"
+        return "NULL"
+
+    needs_detail = any(column not in hot_columns and column in detail_columns for column in TREND_METRICS.values())
+    from_clause = detail_join_clause(table_name) if needs_detail else f"{quote_identifier(table_name)} AS h"
+
+    select_list = ["h.ein AS ein", "h.fiscal_year AS fiscal_year"]
+    select_list += [f"COALESCE({source(column)}, '') AS {name}" for name, column in TREND_DIMENSIONS.items()]
+    select_list += [f"{source(column)} AS {metric}" for metric, column in TREND_METRICS.items()]
+
+    conditions = ["h.fiscal_year IS NOT NULL"]
+    params: List[Any] = []
+    if ein_filter:
+        conditions.append(f"h.ein IN ({', '.join('?' for _ in ein_filter)})")
+        params.extend(ein_filter)
+
+    lag_list = ["LAG(fiscal_year) OVER filings AS previous_year"]
+    lag_list += [f"LAG({metric}) OVER filings AS previous_{metric}" for metric in TREND_METRICS]
+
+    sql = (
+        f"WITH series AS (SELECT {', '.join(select_list)} FROM {from_clause} WHERE {' AND '.join(conditions)}), "
+        f"changes AS (SELECT series.*, {', '.join(lag_list)} FROM series "
+        f"WINDOW filings AS (PARTITION BY ein ORDER BY fiscal_year)) "
+    )
+    return sql, params
+
+
+def comparable(metric: str) -> str:
+    """Year-over-year only when the previous filing is for the immediately preceding year."""
+    return f"previous_year = fiscal_year - 1 AND {metric} IS NOT NULL AND previous_{metric} IS NOT NULL"
+
+
+def metric_summary(row: Dict[str, Any], metric: str) -> Dict[str, Any]:
+    current, previous = row[f"{metric}_current"], row[f"{metric}_previous"]
+    delta = current - previous if current is not None and previous is not None else None
+    return {
+        "organizations": row[f"{metric}_organizations"],
+        "current": current,
+        "previous": previous,
+        "delta": delta,
+        "growth_rate": delta / previous if delta is not None and previous else None,
+        "growing": row[f"{metric}_growing"],
+        "declining": row[f"{metric}_declining"],
+    }
+
+
+def load_trends(
+    table_name: str,
+    group_by: List[str],
+    fiscal_years: List[int],
+    states: List[str],
+    form_types: List[str],
+) -> List[Dict[str, Any]]:
+    cte, params = build_changes_cte(table_name)
+
+    aggregates = ["COUNT(*) AS organizations", "SUM(previous_year = fiscal_year - 1) AS comparable"]
+    for metric in TREND_METRICS:
+        condition = comparable(metric)
+        aggregates += [
+            f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END) AS {metric}_organizations",
+            f"SUM(CASE WHEN {condition} THEN {metric} END) AS {metric}_current",
+            f"SUM(CASE WHEN {condition} THEN previous_{metric} END) AS {metric}_previous",
+            f"SUM(CASE WHEN {condition} AND {metric} > previous_{metric} THEN 1 ELSE 0 END) AS {metric}_growing",
+            f"SUM(CASE WHEN {condition} AND {metric} < previous_{metric} THEN 1 ELSE 0 END) AS {metric}_declining",
+        ]
+
+    # Filters apply after the window so the previous year is still visible to LAG
+    conditions = ["1"]
+    for column, values in (("fiscal_year", fiscal_years), ("st", states), ("form_type", form_types)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+
+    keys = ["fiscal_year"] + group_by
+    sql = (
+        f"{cte}SELECT {', '.join(keys)}, {', '.join(aggregates)} FROM changes "
+        f"WHERE {' AND '.join(conditions)} GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}"
+    )
+    with get_connection() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    return [
+        {
+            **{key: row[key] for key in keys},
+            "organizations": row["organizations"],
+            "comparable": row["comparable"] or 0,
+            **{metric: metric_summary(row, metric) for metric in TREND_METRICS},
+        }
+        for row in rows
+    ]
+
+
+def load_organization_trend(table_name: str, candidates: List[str]) -> List[Dict[str, Any]]:
+    cte, params = build_changes_cte(table_name, candidates)
+    with get_connection() as conn:
+        cursor = conn.execute(f"{cte}SELECT * FROM changes ORDER BY ein, fiscal_year", params)
+        columns = [description[0] for description in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    for row in rows:
+        consecutive = row["previous_year"] == row["fiscal_year"] - 1 if row["previous_year"] is not None else False
+        for metric in TREND_METRICS:
+            current, previous = row[metric], row.pop(f"previous_{metric}")
+            delta = current - previous if consecutive and current is not None and previous is not None else None
+            row[f"{metric}_delta"] = delta
+            row[f"{metric}_growth_rate"] = delta / previous if delta is not None and previous else None
+    return rows
+
+
+@router.get("/trends")
+async def get_trends(
+    dataset: str = Query("default", description="Dataset name: default or propublica"),
+    group_by: Optional[str] = Query(None, description=f"Comma-separated dimensions: {', '.join(TREND_DIMENSIONS)}"),
+    fiscal_years: Optional[str] = Query(None, description="Comma-separated fiscal years to report"),
+    states: Optional[str] = Query(None, description="Comma-separated state codes"),
+    form_types: Optional[str] = Query(None, description="Comma-separated form types (propublica only)"),
+    ein: Optional[str] = Query(None, description="Return the per-year series for one organization instead"),
+):
+    """
+    Year-over-year revenue, expense and employee changes.
+
+    Each organization's filing is compared with its filing for the previous
+    fiscal year (gaps are not compared), then rolled up per fiscal year and
+    the requested dimensions. With ein, the per-year series for that
+    organization is returned instead. Results are cached per dataset version.
+    """
+    try:
+        table_name = resolve_table_name(dataset)
+        year_list = [int(year) for year in split_list(fiscal_years)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    dimensions = split_list(group_by)
+    invalid = [dimension for dimension in dimensions if dimension not in TREND_DIMENSIONS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by dimension: {', '.join(invalid)}")
+    state_list = [state.upper() for state in split_list(states)]
+    form_type_list = split_list(form_types)
+    candidates = ein_candidates(ein) if ein else []
+
+    if not table_exists(table_name):
+        raise HTTPException(status_code=404, detail=f"Dataset '{dataset}' has not been loaded")
+
+    try:
+        if candidates:
+            series = response_cache.get_or_compute(
+                "trends-organization",
+                dataset,
+                tuple(candidates),
+                lambda: load_organization_trend(table_name, candidates),
+            )
+        else:
+            key = (tuple(dimensions), tuple(year_list), tuple(state_list), tuple(form_type_list))
+            groups = response_cache.get_or_compute(
+                "trends",
+                dataset,
+                key,
+                lambda: load_trends(table_name, dimensions, year_list, state_list, form_type_list),
+            )
+    except Exception as e:
+        logger.exception("trend query failed")
+        raise HTTPException(status_code=500, detail=f"Failed to compute trends: {str(e)}")
+
+    if candidates:
+        if not series:
+            raise HTTPException(status_code=404, detail=f"Organization {ein} not found in dataset '{dataset}'")
+        return {"success": True, "dataset": dataset, "ein": series[-1]["ein"], "metrics": list(TREND_METRICS), "series": series}
+
+    return {
+        "success": True,
+        "dataset": dataset,
+        "group_by": dimensions,
+        "metrics": list(TREND_METRICS),
+        "filters": {"fiscal_years": year_list, "states": state_list, "form_types": form_type_list},
+        "groups": groups,
+    }
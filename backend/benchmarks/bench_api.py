@@ -0,0 +1,274 @@
+"""
+API 基准测试：在合成数据集上进程内（ASGI，不经过网络）压测主要查询和导出接口，
+统计吞吐量和 p50/p95/p99 延迟，并与保存的基线对比以发现性能回退。
+
+场景: search, filter, filter_enhanced, filter_enhanced_ndjson, search_batch, export_csv, export_json，
+每个场景对 default 和 propublica 两个数据集各跑一遍。请求参数从已导入数据中随机抽取，
+--cold 会在每次请求前清空响应缓存，测的是未命中缓存的查询成本。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_api.py --rows 100000 --requests 50
+    python benchmarks/bench_api.py --rows 1000000 --save-baseline    # 写入 benchmarks/baselines/
+    python benchmarks/bench_api.py --rows 1000000 --compare          # 与基线对比，回退时退出码为 1
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, "benchmarks", "baselines")
+sys.path.insert(0, BACKEND_DIR)
+
+SCENARIOS = [
+    "search",
+    "filter",
+    "filter_enhanced",
+    "filter_enhanced_ndjson",
+    "search_batch",
+    "export_csv",
+    "export_json",
+]
+DEFAULT_TOLERANCE = 0.25
+
+
+def default_baseline_path(rows):
+    return os.path.join(BASELINE_DIR, f"api_{rows}.json")
+
+
+def sample_context(db_path, table_name, seed):
+    """从已导入数据中抽取请求参数：名称关键词、州、财年和营收分位点"""
+    rng = np.random.default_rng(seed)
+    with sqlite3.connect(db_path) as conn:
+        names = [row[0] for row in conn.execute(f'SELECT campus FROM "{table_name}" ORDER BY RANDOM() LIMIT 200')]
+        states = [row[0] for row in conn.execute(f'SELECT DISTINCT st FROM "{table_name}"')]
+        years = [row[0] for row in conn.execute(f'SELECT DISTINCT fiscal_year FROM "{table_name}" ORDER BY 1 DESC')]
+        revenues = sorted(
+            row[0] for row in conn.execute(
+                f'SELECT part_i_summary_12_total_revenue_cy FROM "{table_name}" '
+                f'WHERE part_i_summary_12_total_revenue_cy IS NOT NULL ORDER BY RANDOM() LIMIT 1000'
+            )
+        )
+    return {
+        "rng": rng,
+        # 名称前两个词（如 "Grace Manor"），命中率与真实搜索接近
+        "keywords": sorted({" ".join(name.split()[:2]) for name in names}),
+        "names": names,
+        "states": states,
+        "years": years,
+        "revenue_p90": revenues[int(len(revenues) * 0.9)] if revenues else 0,
+    }
+
+
+def build_request(scenario, dataset, context):
+    """返回 (method, path, kwargs)"""
+    rng = context["rng"]
+    state = str(rng.choice(context["states"]))
+    year = int(rng.choice(context["years"]))
+    keyword = str(rng.choice(context["keywords"]))
+
+    if scenario == "search":
+        return "GET", "/api/search", {"params": {"q": keyword, "limit": 50, "dataset": dataset}}
+    if scenario == "filter":
+        return "POST", "/api/filter", {"json": {
+            "dataset": dataset,
+            "conditions": [
+                {"field": "st", "operator": "equals", "value": state},
+                {"field": "fiscal_year", "operator": "equals", "value": year},
+            ],
+            "limit": 100,
+        }}
+    if scenario == "filter_enhanced":
+        return "POST", "/api/filter/enhanced", {"json": {
+            "dataset": dataset,
+            "fiscal_years": [year],
+            "geo_filters": {"st": state},
+            "page_size": 1000,
+        }}
+    if scenario == "filter_enhanced_ndjson":
+        # 全部财年中营收前 10% 的机构，流式返回
+        return "POST", "/api/filter/enhanced", {"json": {
+            "dataset": dataset,
+            "fiscal_years": context["years"],
+            "financial_filters": {"min_revenue": context["revenue_p90"]},
+            "format": "ndjson",
+        }}
+    if scenario == "search_batch":
+        terms = [str(name) for name in rng.choice(context["names"], size=10)]
+        return "POST", "/api/search/batch", {"json": {
+            "dataset": dataset,
+            "fiscal_years": context["years"][:2],
+            "search_terms": terms,
+            "search_type": "name",
+        }}
+    if scenario == "export_csv":
+        return "POST", "/api/export/csv", {"json": {"dataset": dataset, "filters": {"st": state}, "limit": 5000}}
+    if scenario == "export_json":
+        return "POST", "/api/export/json", {"json": {"dataset": dataset, "filters": {"st": state}, "limit": 5000}}
+    raise ValueError(f"未知场景: {scenario}")
+
+
+def run_scenario(client, scenario, dataset, context, requests, warmup, cold):
+    from utils.cache import response_cache
+
+    latencies = []
+    errors = 0
+    response_bytes = 0
+    total = 0.0
+    for iteration in range(warmup + requests):
+        method, path, kwargs = build_request(scenario, dataset, context)
+        if cold:
+            response_cache.clear()
+        start = time.perf_counter()
+        response = client.request(method, path, **kwargs)
+        body = response.content
+        elapsed = time.perf_counter() - start
+        if iteration < warmup:
+            continue
+        total += elapsed
+        latencies.append(elapsed * 1000)
+        response_bytes += len(body)
+        if response.status_code != 200:
+            errors += 1
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / total, 2) if total else None,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_bytes": int(response_bytes / requests),
+    }
+
+
+def print_results(results):
+    print(f"\n{'场景':<34} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'平均字节':>11} {'错误':>5}")
+    for name, result in results.items():
+        print(
+            f"{name:<36} {result['throughput_rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['mean_bytes']:>13,} {result['errors']:>5}"
+        )
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """p95 变慢或吞吐量下降超过 tolerance 即视为回退；返回回退的场景列表"""
+    regressions = []
+    print(f"\n与基线对比（{baseline['meta']['created_at']}，容差 {tolerance:.0%}）:")
+    for name, result in results.items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"  {name:<36} 基线中没有该场景")
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = result["throughput_rps"] / base["throughput_rps"] - 1 if base["throughput_rps"] else 0.0
+        regressed = p95_change > tolerance or rps_change < -tolerance or result["errors"] > base["errors"]
+        marker = "回退" if regressed else "ok"
+        print(f"  {name:<36} p95 {p95_change:+7.1%}  吞吐量 {rps_change:+7.1%}  {marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 接口基准测试（合成数据，进程内 ASGI）")
+    parser.add_argument("--rows", type=int, default=100_000, help="每个数据集的行数（1 万到 500 万）")
+    parser.add_argument("--datasets", default="default,propublica")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=50, help="每个场景计时的请求数")
+    parser.add_argument("--warmup", type=int, default=3, help="每个场景不计时的预热请求数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cold", action="store_true", help="每次请求前清空响应缓存")
+    parser.add_argument("--db", help="合成数据库路径（默认临时文件，结束后删除）")
+    parser.add_argument("--reuse-db", action="store_true", help="--db 已存在时跳过数据生成")
+    parser.add_argument("--baseline", help="基线文件路径（默认 benchmarks/baselines/api_<rows>.json）")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--compare", action="store_true", help="与基线对比，出现回退时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", help="另存本次结果 JSON")
+    args = parser.parse_args()
+
+    datasets = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="irs_bench_"), "irs_bench.db")
+    # 必须在导入 main / db_utils 之前设置，API 才会连到合成数据库；访问日志只保留警告以上
+    os.environ["IRS_DB_PATH"] = db_path
+    os.environ.setdefault("IRS_LOG_LEVEL", "WARNING")
+
+    from fastapi.testclient import TestClient
+
+    from benchmarks.synthetic_data import build_synthetic_dataset
+    from db_utils import resolve_table_name
+    import main as api_main
+
+    if not (args.reuse_db and os.path.exists(db_path)):
+        for dataset in datasets:
+            start = time.perf_counter()
+            build_synthetic_dataset(db_path, dataset, args.rows, args.seed)
+            print(f"生成 {dataset}: {args.rows:,} 行，用时 {time.perf_counter() - start:.1f}s")
+    print(f"数据库: {db_path}")
+
+    results = {}
+    with TestClient(api_main.app) as client:
+        for dataset in datasets:
+            context = sample_context(db_path, resolve_table_name(dataset), args.seed)
+            for scenario in scenarios:
+                name = f"{dataset}/{scenario}"
+                results[name] = run_scenario(client, scenario, dataset, context, args.requests, args.warmup, args.cold)
+                print(f"  {name:<36} 完成")
+
+    print_results(results)
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": args.rows,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "cold": args.cold,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+        },
+        "scenarios": results,
+    }
+
+    exit_code = 0
+    baseline_path = args.baseline or default_baseline_path(args.rows)
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            print(f"\n基线不存在: {baseline_path}（先用 --save-baseline 生成）")
+            exit_code = 2
+        else:
+            with open(baseline_path, encoding="utf-8") as f:
+                regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+            if regressions:
+                print(f"\n性能回退: {', '.join(regressions)}")
+                exit_code = 1
+
+    for path in [baseline_path] * args.save_baseline + ([args.output] if args.output else []):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已写入: {path}")
+
+    if not args.db:
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+财年日期解析基准测试：逐行 apply（旧实现） vs fiscal_dates 向量化实现。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_fiscal_dates.py --rows 1000000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fiscal_dates import parse_fiscal_dates, parse_tax_period_months  # noqa: E402
+
+
+def legacy_parse_date(date_str):
+    """重构前 data_pipeline.parse_date 的逐行实现，仅用于对照"""
+    if pd.isna(date_str):
+        return None
+    date_str = str(date_str).strip()
+    match = re.fullmatch(r'(\d{1,2})/(\d{4})', date_str)
+    if match:
+        month, year = map(int, match.groups())
+        return year, month
+    match = re.fullmatch(r'(\d{4})/(\d{1,2})/\d{1,2}', date_str)
+    if match:
+        year, month = map(int, match.groups())
+        return year, month
+    match = re.fullmatch(r'(\d{1,2})/\d{1,2}/(\d{4})', date_str)
+    if match:
+        month, year = int(match.group(1)), int(match.group(2))
+        return year, month
+    match = re.fullmatch(r'(\d{4})-(\d{1,2})-\d{1,2}', date_str)
+    if match:
+        year, month = map(int, match.groups())
+        return year, month
+    return None
+
+
+def legacy_parse_fiscal_month(value):
+    """重构前 propublica_to_backend_snapshot.parse_fiscal_month 的逐行实现"""
+    if pd.isna(value):
+        return None
+    digits = "".join(ch for ch in str(value).strip() if ch.isdigit())
+    if len(digits) >= 6:
+        month = int(digits[4:6])
+        return month if 1 <= month <= 12 else None
+    return None
+
+
+def build_fiscal_date_column(rows: int, seed: int) -> pd.Series:
+    """模拟真实数据：少量不同取值（各种格式 + 脏值 + 缺失）重复出现"""
+    pool = []
+    for year in range(2015, 2026):
+        for month in (3, 6, 8, 9, 12):
+            pool.extend([
+                f"{month}/{year}",
+                f"{year}/{month:02d}/30",
+                f"{month}/30/{year}",
+                f"{year}-{month:02d}-30",
+            ])
+    pool.extend(["N/A", "", " 6/2023 ", "FY2023", None])
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.array(pool, dtype=object)[rng.integers(0, len(pool), rows)])
+
+
+def build_tax_period_column(rows: int, seed: int) -> pd.Series:
+    pool = [f"{year}{month:02d}" for year in range(2015, 2026) for month in range(1, 13)]
+    pool.extend(["", "2023-06", "201913", None])
+    rng = np.random.default_rng(seed + 1)
+    return pd.Series(np.array(pool, dtype=object)[rng.integers(0, len(pool), rows)])
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:8.3f}s  {rows / elapsed:>14,.0f} 行/秒")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="财年日期解析基准测试")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-legacy", action="store_true", help="只测向量化实现")
+    args = parser.parse_args()
+
+    fiscal_dates = build_fiscal_date_column(args.rows, args.seed)
+    tax_periods = build_tax_period_column(args.rows, args.seed)
+    print(f"行数: {args.rows:,}  不同日期取值: {fiscal_dates.nunique(dropna=False)}  "
+          f"不同 tax_prd 取值: {tax_periods.nunique(dropna=False)}")
+
+    print("\nfiscal_year / fiscal_month:")
+    vectorized, vectorized_time = timed("vectorized (fiscal_dates)", args.rows, lambda: parse_fiscal_dates(fiscal_dates))
+    if not args.skip_legacy:
+        def legacy():
+            parsed = fiscal_dates.apply(legacy_parse_date)
+            return pd.DataFrame({
+                'fiscal_year': parsed.apply(lambda x: x[0] if x else None).astype('Int64'),
+                'fiscal_month': parsed.apply(lambda x: x[1] if x else None).astype('Int64'),
+            })
+        expected, legacy_time = timed("legacy apply", args.rows, legacy)
+        pd.testing.assert_frame_equal(vectorized, expected)
+        print(f"  结果一致，加速 {legacy_time / vectorized_time:.1f}x")
+
+    print("\ntax_prd -> fiscal_month:")
+    months, vectorized_time = timed("vectorized (fiscal_dates)", args.rows, lambda: parse_tax_period_months(tax_periods))
+    if not args.skip_legacy:
+        expected, legacy_time = timed(
+            "legacy apply", args.rows, lambda: tax_periods.apply(legacy_parse_fiscal_month).astype('Int64')
+        )
+        pd.testing.assert_series_equal(months, expected, check_names=False)
+        print(f"  结果一致，加速 {legacy_time / vectorized_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
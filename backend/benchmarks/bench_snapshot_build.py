@@ -0,0 +1,134 @@
+"""
+ProPublica 快照构建基准测试：逐行 apply（旧实现） vs field_normalization 向量化实现，
+以及 build_backend_snapshot_from_filings 的整体耗时。
+
+申报记录由 synthetic_data 的机构载荷经 propublica_mapper 生成，并混入带连字符的 EIN、
+数字表单代码和缺失值，接近真实 yearly filings CSV。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_snapshot_build.py --organizations 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "data_harvester"))
+
+from benchmarks.synthetic_data import iter_organization_payloads  # noqa: E402
+from field_normalization import (  # noqa: E402
+    normalize_ein,
+    normalize_eins,
+    normalize_form_type,
+    normalize_form_types,
+)
+from propublica_mapper import payload_to_canonical_rows  # noqa: E402
+from propublica_to_backend_snapshot import build_backend_snapshot_from_filings  # noqa: E402
+
+DIRTY_FORM_TYPES = np.array(["0", "1.0", " 2 ", "nan", None], dtype=object)
+
+
+def build_filings(organizations: int, seed: int) -> pd.DataFrame:
+    """合成 yearly filings，并按 CSV 读回的形式（ein 为字符串）返回"""
+    rows = [
+        row
+        for ein, payload in iter_organization_payloads(organizations, seed)
+        for row in payload_to_canonical_rows(ein, payload)
+    ]
+    filings = pd.DataFrame(rows)
+    rng = np.random.default_rng(seed)
+    dashed = rng.random(len(filings)) < 0.05
+    filings.loc[dashed, "ein"] = filings.loc[dashed, "ein"].str[:2] + "-" + filings.loc[dashed, "ein"].str[2:]
+    filings.loc[rng.random(len(filings)) < 0.01, "ein"] = None
+    filings["form_type"] = filings["form_type"].astype(object)
+    dirty = rng.random(len(filings)) < 0.1
+    filings.loc[dirty, "form_type"] = rng.choice(DIRTY_FORM_TYPES, size=int(dirty.sum()))
+    return filings
+
+
+def legacy_year_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """重构前 build_backend_snapshot_from_filings 中按 EIN 逐组调用 lambda 的年份汇总"""
+    return (
+        df[df["fiscal_year"].notna()]
+        .groupby("ein")["fiscal_year"]
+        .agg(
+            propublica_filing_count="count",
+            propublica_has_2024_plus=lambda years: bool((years >= 2024).any()),
+            propublica_has_2025_plus=lambda years: bool((years >= 2025).any()),
+        )
+        .reset_index()
+    )
+
+
+def vectorized_year_summary(df: pd.DataFrame) -> pd.DataFrame:
+    dated = df[df["fiscal_year"].notna()]
+    return (
+        dated.assign(
+            has_2024_plus=(dated["fiscal_year"] >= 2024).astype(bool),
+            has_2025_plus=(dated["fiscal_year"] >= 2025).astype(bool),
+        )
+        .groupby("ein")
+        .agg(
+            propublica_filing_count=("fiscal_year", "count"),
+            propublica_has_2024_plus=("has_2024_plus", "any"),
+            propublica_has_2025_plus=("has_2025_plus", "any"),
+        )
+        .reset_index()
+    )
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:8.3f}s  {rows / elapsed:>14,.0f} 行/秒")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProPublica 快照构建基准测试")
+    parser.add_argument("--organizations", type=int, default=50_000, help="机构数（每个机构 4 条申报）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-legacy", action="store_true", help="只测向量化实现")
+    args = parser.parse_args()
+
+    filings = build_filings(args.organizations, args.seed)
+    rows = len(filings)
+    print(f"申报记录: {rows:,}  不同 EIN: {filings['ein'].nunique():,}  "
+          f"不同表单类型: {filings['form_type'].nunique(dropna=False)}")
+
+    print("\nEIN 标准化:")
+    eins, vectorized_time = timed("vectorized", rows, lambda: normalize_eins(filings["ein"]))
+    if not args.skip_legacy:
+        expected, legacy_time = timed("legacy apply", rows, lambda: filings["ein"].apply(normalize_ein))
+        pd.testing.assert_series_equal(eins, expected, check_names=False)
+        print(f"  结果一致，加速 {legacy_time / vectorized_time:.1f}x")
+
+    print("\n表单类型标准化:")
+    form_types, vectorized_time = timed("vectorized", rows, lambda: normalize_form_types(filings["form_type"]))
+    if not args.skip_legacy:
+        expected, legacy_time = timed("legacy apply", rows, lambda: filings["form_type"].apply(normalize_form_type))
+        pd.testing.assert_series_equal(form_types, expected, check_names=False)
+        print(f"  结果一致，加速 {legacy_time / vectorized_time:.1f}x")
+
+    print("\n按 EIN 汇总申报年份:")
+    dated = pd.DataFrame({"ein": eins, "fiscal_year": pd.to_numeric(filings["tax_year"]).astype("Int64")})
+    summary, vectorized_time = timed("vectorized groupby", rows, lambda: vectorized_year_summary(dated))
+    if not args.skip_legacy:
+        expected, legacy_time = timed("legacy lambda agg", rows, lambda: legacy_year_summary(dated))
+        pd.testing.assert_frame_equal(summary, expected, check_dtype=False)
+        print(f"  结果一致，加速 {legacy_time / vectorized_time:.1f}x")
+
+    print("\nbuild_backend_snapshot_from_filings:")
+    lookup = pd.DataFrame(columns=["ein", "campus", "city", "st"], dtype=object)
+    snapshot, _ = timed("vectorized", rows, lambda: build_backend_snapshot_from_filings(filings, lookup))
+    print(f"  输出 {len(snapshot):,} 行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""
+合成 IRS 990 数据，供管道、采集器和 API 的离线压测使用。
+
+每个机构连续若干个财年各有一条申报记录；营收服从对数正态分布并逐年小幅波动，
+州按大致的机构数量加权，财年结束月份集中在 12 月和 6 月，与真实 990 数据的分布相近。
+数据按块生成（每块用独立的随机种子），因此 500 万行也只占用一个块的内存。
+
+三种输出：
+  sqlite   直接导入 nonprofits / propublica_nonprofits（与正式导入相同的影子表流程）
+  csv      四行语义化表头的 IRS extract CSV（与 data/nonprofits_100.csv 同格式，
+           日期格式混杂并带少量脏值），可直接交给 data_pipeline.py --csv
+  payloads ProPublica /organizations/{ein}.json 形状的 JSON（filings_with_data），每行一个机构
+
+用法（在 backend 目录下）:
+    python benchmarks/synthetic_data.py --rows 1000000 --db /tmp/irs_bench.db
+    python benchmarks/synthetic_data.py --format csv --rows 1000000 --out /tmp/nonprofits_1m.csv
+    python benchmarks/synthetic_data.py --format payloads --rows 400000 --out /tmp/propublica.jsonl
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_pipeline import create_shadow_tables, insert_split_rows, swap_in_shadow  # noqa: E402
+from db_utils import resolve_table_name  # noqa: E402
+from logging_setup import configure_logging  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# 州及其权重（大致按机构数量）
+STATE_WEIGHTS = {
+    "CA": 12, "NY": 9, "TX": 8, "FL": 7, "PA": 6, "IL": 5, "OH": 5, "MA": 4, "NJ": 4, "MI": 4,
+    "NC": 3, "VA": 3, "WA": 3, "GA": 3, "MN": 3, "WI": 2, "MO": 2, "CO": 2, "MD": 2, "IN": 2,
+    "TN": 2, "AZ": 2, "OR": 1, "CT": 1, "IA": 1, "KY": 1, "LA": 1, "SC": 1, "KS": 1, "NE": 1,
+}
+# 财年结束月份权重：多数机构按自然年或 6 月结账
+FISCAL_MONTH_WEIGHTS = {12: 48, 6: 26, 9: 9, 3: 5, 8: 4, 4: 2, 5: 2, 7: 2, 10: 1, 11: 1}
+FORM_TYPE_WEIGHTS = {"990": 70, "990EO": 20, "990PF": 10}
+
+NAME_PREFIXES = np.array([
+    "Saint", "Good", "Grace", "Heritage", "Riverside", "Lakeview", "Mount", "Covenant",
+    "Presbyterian", "Lutheran", "Methodist", "Community", "Sunrise", "Oak", "Valley", "Harbor",
+])
+NAME_NOUNS = np.array([
+    "Village", "Manor", "Gardens", "Pointe", "Terrace", "Commons", "Place", "Park",
+    "Haven", "Meadows", "Crossing", "Ridge", "Court", "Heights", "Square", "Estates",
+])
+NAME_SUFFIXES = np.array(["Retirement Community", "Senior Living", "Health Services", "Foundation", "Inc"])
+CITY_NAMES = np.array([f"City{i}" for i in range(400)])
+
+# 与 data_pipeline 从四行表头得到的列名一致
+DEFAULT_COLUMN_TYPES = {
+    "system": "TEXT",
+    "campus": "TEXT",
+    "address": "TEXT",
+    "city": "TEXT",
+    "st": "TEXT",
+    "zip": "TEXT",
+    "type": "TEXT",
+    "ein": "TEXT",
+    "fy_ending": "TEXT",
+    "employees": "INTEGER",
+    "part_i_summary_12_total_revenue_cy": "REAL",
+    "part_i_summary_total_revenue_py": "INTEGER",
+    "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy": "INTEGER",
+    "part_x_balance_sheet_16_total_assets": "INTEGER",
+    "part_x_balance_sheet_22_net_assets_or_fund_balances": "INTEGER",
+    "fiscal_year": "INTEGER",
+    "fiscal_month": "INTEGER",
+}
+# 与 propublica_to_backend_snapshot 生成的快照列一致
+PROPUBLICA_COLUMN_TYPES = {
+    "ein": "TEXT",
+    "campus": "TEXT",
+    "propublica_organization_name": "TEXT",
+    "city": "TEXT",
+    "st": "TEXT",
+    "fiscal_year": "INTEGER",
+    "fiscal_month": "INTEGER",
+    "part_i_summary_12_total_revenue_cy": "REAL",
+    "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy": "REAL",
+    "part_x_balance_sheet_16_total_assets_eoy": "REAL",
+    "part_x_balance_sheet_22_net_assets_or_fund_balances_eoy": "REAL",
+    "employees": "REAL",
+    "propublica_form_type": "TEXT",
+    "propublica_filing_date": "TEXT",
+    "propublica_tax_prd": "INTEGER",
+    "propublica_record_status": "TEXT",
+    "propublica_filing_count": "INTEGER",
+    "propublica_source": "TEXT",
+}
+COLUMN_TYPES = {"default": DEFAULT_COLUMN_TYPES, "propublica": PROPUBLICA_COLUMN_TYPES}
+
+DEFAULT_CHUNK_ROWS = 200_000
+FILINGS_PER_ORGANIZATION = 4
+LAST_FISCAL_YEAR = 2024
+EIN_OFFSET = 10_000_000
+EIN_STRIDE = 7
+
+# 与 data/nonprofits_100.csv 完全一致的四行语义化表头（外加首行标题），第一列是无名行号
+IRS_EXTRACT_HEADER = [
+    ["IRS extract"] + [""] * 15,
+    [""] * 11 + ["Part I Summary", "", "Part IX Statement of Functional Expenses", "Part X Balance Sheet", ""],
+    [""] * 11 + ["12", "", "25", "16", "22"],
+    ["", "System", "Campus", "Address", "City", "St", "Zip", "Type", "EIN", "FY Ending", "Employees",
+     "Total Revenue", "Total Revenue", "Total Functional Expenses", "Total Assets", "Net Assets or Fund Balances"],
+    [""] * 11 + ["CY", "PY", "CY", "EOY", "EOY"],
+]
+# FY Ending 的几种写法及权重：M/YYYY、YYYY/MM/DD、M/D/YYYY、YYYY-MM-DD
+FY_ENDING_FORMAT_WEIGHTS = {0: 40, 1: 20, 2: 25, 3: 15}
+DIRTY_FY_ENDING_VALUES = np.array(["", "N/A", "bad", "FY"])
+DEFAULT_DIRTY_RATE = 0.005
+
+# ProPublica 的 formtype 代码（field_normalization.FORM_TYPE_CODE_MAP 的反向）
+PROPUBLICA_FORM_CODES = {"990": 0, "990EO": 1, "990PF": 2}
+PROPUBLICA_DATA_SOURCE = "ProPublica Nonprofit Explorer API: https://projects.propublica.org/nonprofits/api/"
+
+
+def weighted_choice(rng, weights, size):
+    keys = np.array(list(weights))
+    probabilities = np.array(list(weights.values()), dtype=float)
+    return keys[rng.choice(len(keys), size=size, p=probabilities / probabilities.sum())]
+
+
+def organization_frame(first_org, org_count, seed):
+    """每个机构一行的固定属性：EIN、名称、地址、州、结账月份和营收规模"""
+    rng = np.random.default_rng(seed)
+    org_ids = np.arange(first_org, first_org + org_count)
+    names = (
+        pd.Series(NAME_PREFIXES[rng.integers(0, len(NAME_PREFIXES), org_count)])
+        + " " + NAME_NOUNS[rng.integers(0, len(NAME_NOUNS), org_count)]
+        + " " + NAME_SUFFIXES[rng.integers(0, len(NAME_SUFFIXES), org_count)]
+        + " " + pd.Series(org_ids).astype(str)
+    )
+    return pd.DataFrame({
+        "org_id": org_ids,
+        # 7 的倍数加偏移，避免 EIN 连续，同时保证唯一
+        "ein": pd.Series(org_ids * EIN_STRIDE + EIN_OFFSET).astype(str).str.zfill(9),
+        "campus": names,
+        "city": CITY_NAMES[rng.integers(0, len(CITY_NAMES), org_count)],
+        "st": weighted_choice(rng, STATE_WEIGHTS, org_count),
+        "fiscal_month": weighted_choice(rng, FISCAL_MONTH_WEIGHTS, org_count).astype(int),
+        # 营收中位数约 120 万美元，长尾到数亿
+        "base_revenue": rng.lognormal(mean=14.0, sigma=1.8, size=org_count),
+        "form_type": weighted_choice(rng, FORM_TYPE_WEIGHTS, org_count),
+    })
+
+
+def filing_frame(first_row, rows, seed, filings_per_org=FILINGS_PER_ORGANIZATION, last_year=LAST_FISCAL_YEAR):
+    """
+    第 first_row 行起的 rows 条申报记录（两种数据集共用的语义列）。
+    行号 r 属于机构 r // filings_per_org，财年依次倒推；first_row 需落在机构边界上，
+    否则同一机构会在两个块里得到不同的属性。
+    """
+    row_ids = np.arange(first_row, first_row + rows)
+    org_index = row_ids // filings_per_org
+    first_org = int(org_index[0])
+    orgs = organization_frame(first_org, int(org_index[-1]) - first_org + 1, seed + first_org)
+    filings = orgs.iloc[org_index - first_org].reset_index(drop=True)
+
+    rng = np.random.default_rng(seed + first_row + 1)
+    filings["fiscal_year"] = last_year - (row_ids % filings_per_org)
+    # 逐年 ±15% 左右的波动，约 1% 缺失营收
+    revenue = filings["base_revenue"] * rng.lognormal(mean=0.0, sigma=0.15, size=rows)
+    revenue = np.where(rng.random(rows) < 0.01, np.nan, np.round(revenue, 2))
+    filings["revenue"] = revenue
+    filings["revenue_py"] = np.round(revenue / rng.lognormal(mean=0.03, sigma=0.12, size=rows))
+    filings["expenses"] = np.round(revenue * rng.uniform(0.80, 1.05, rows))
+    filings["assets"] = np.round(revenue * rng.lognormal(mean=0.7, sigma=0.6, size=rows))
+    filings["net_assets"] = np.round(filings["assets"] * rng.uniform(-0.2, 0.8, rows))
+    filings["employees"] = np.maximum(0, np.round(np.nan_to_num(revenue) / 85_000 * rng.lognormal(0, 0.4, rows)))
+    return filings
+
+
+def to_default_schema(filings):
+    """转换为 data_pipeline 导入后的 nonprofits 列"""
+    rows = len(filings)
+    month = filings["fiscal_month"]
+    return pd.DataFrame({
+        "system": "System " + (filings["org_id"] // 25).astype(str),
+        "campus": filings["campus"],
+        "address": (filings["org_id"] % 9000 + 1).astype(str) + " Main St",
+        "city": filings["city"],
+        "st": filings["st"],
+        "zip": (filings["org_id"] % 99_999).astype(str).str.zfill(5),
+        "type": np.where(filings["org_id"] % 3 == 0, "CCRC", "SNF"),
+        "ein": filings["ein"],
+        "fy_ending": month.astype(str) + "/" + filings["fiscal_year"].astype(str),
+        "employees": filings["employees"].astype("Int64"),
+        "part_i_summary_12_total_revenue_cy": filings["revenue"],
+        "part_i_summary_total_revenue_py": filings["revenue_py"].astype("Int64"),
+        "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy": filings["expenses"].astype("Int64"),
+        "part_x_balance_sheet_16_total_assets": filings["assets"].astype("Int64"),
+        "part_x_balance_sheet_22_net_assets_or_fund_balances": filings["net_assets"].astype("Int64"),
+        "fiscal_year": filings["fiscal_year"].astype("Int64"),
+        "fiscal_month": month.astype("Int64"),
+    }, index=pd.RangeIndex(rows))
+
+
+def to_propublica_schema(filings, filings_per_org=FILINGS_PER_ORGANIZATION):
+    """转换为 propublica_to_backend_snapshot 输出的快照列"""
+    tax_prd = filings["fiscal_year"] * 100 + filings["fiscal_month"]
+    filing_date = pd.to_datetime({
+        "year": filings["fiscal_year"] + 1,
+        "month": (filings["fiscal_month"] + 4) % 12 + 1,
+        "day": 15,
+    })
+    return pd.DataFrame({
+        "ein": filings["ein"],
+        "campus": filings["campus"],
+        "propublica_organization_name": filings["campus"].str.upper(),
+        "city": filings["city"],
+        "st": filings["st"],
+        "fiscal_year": filings["fiscal_year"].astype("Int64"),
+        "fiscal_month": filings["fiscal_month"].astype("Int64"),
+        "part_i_summary_12_total_revenue_cy": filings["revenue"],
+        "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy": filings["expenses"],
+        "part_x_balance_sheet_16_total_assets_eoy": filings["assets"],
+        "part_x_balance_sheet_22_net_assets_or_fund_balances_eoy": filings["net_assets"],
+        "employees": filings["employees"],
+        "propublica_form_type": filings["form_type"],
+        "propublica_filing_date": filing_date.dt.strftime("%Y-%m-%d"),
+        "propublica_tax_prd": tax_prd.astype("Int64"),
+        "propublica_record_status": "matched",
+        "propublica_filing_count": filings_per_org,
+        "propublica_source": "synthetic",
+    })
+
+
+SCHEMA_BUILDERS = {"default": to_default_schema, "propublica": to_propublica_schema}
+
+
+def iter_filing_chunks(rows, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS, filings_per_org=FILINGS_PER_ORGANIZATION):
+    """按块生成申报记录；同一 seed、chunk_rows 和 filings_per_org 下结果可复现"""
+    # 块大小取机构申报数的整数倍，保证每个机构完整落在一个块内
+    chunk_rows = max(filings_per_org, chunk_rows - chunk_rows % filings_per_org)
+    for first_row in range(0, rows, chunk_rows):
+        yield filing_frame(first_row, min(chunk_rows, rows - first_row), seed, filings_per_org)
+
+
+def iter_synthetic_chunks(dataset, rows, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """按块生成指定数据集（导入后的列）的合成数据"""
+    build = SCHEMA_BUILDERS[dataset]
+    for filings in iter_filing_chunks(rows, seed, chunk_rows):
+        yield build(filings)
+
+
+def render_fy_ending(filings, rng, dirty_rate=DEFAULT_DIRTY_RATE):
+    """按权重混用几种日期写法，并以 dirty_rate 的比例写入无法解析的值"""
+    period_end = pd.to_datetime({"year": filings["fiscal_year"], "month": filings["fiscal_month"], "day": 1})
+    period_end = period_end + pd.offsets.MonthEnd(0)
+    year = period_end.dt.year.astype(str)
+    month = period_end.dt.month.astype(str)
+    day = period_end.dt.day.astype(str)
+    candidates = [
+        month + "/" + year,
+        year + "/" + month.str.zfill(2) + "/" + day,
+        month + "/" + day + "/" + year,
+        year + "-" + month.str.zfill(2) + "-" + day,
+    ]
+    choice = weighted_choice(rng, FY_ENDING_FORMAT_WEIGHTS, len(filings))
+    rendered = np.select([choice == index for index in range(len(candidates))], candidates)
+    dirty = rng.random(len(filings)) < dirty_rate
+    rendered[dirty] = DIRTY_FY_ENDING_VALUES[rng.integers(0, len(DIRTY_FY_ENDING_VALUES), int(dirty.sum()))]
+    return rendered
+
+
+def to_irs_extract_frame(filings, first_row, seed, dirty_rate=DEFAULT_DIRTY_RATE):
+    """转换为 IRS extract CSV 的 16 列（行号 + 表头第四行的 15 个字段），顺序与表头一致"""
+    rng = np.random.default_rng(seed + first_row + 2)
+    default = to_default_schema(filings)
+    return pd.DataFrame({
+        "row": np.arange(first_row, first_row + len(filings)),
+        "system": default["system"],
+        "campus": default["campus"],
+        "address": default["address"],
+        "city": default["city"],
+        "st": default["st"],
+        "zip": default["zip"],
+        "type": default["type"],
+        "ein": default["ein"],
+        "fy_ending": render_fy_ending(filings, rng, dirty_rate),
+        "employees": default["employees"],
+        "revenue_cy": default["part_i_summary_12_total_revenue_cy"],
+        "revenue_py": default["part_i_summary_total_revenue_py"],
+        "expenses_cy": default["part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy"],
+        "assets_eoy": default["part_x_balance_sheet_16_total_assets"],
+        "net_assets_eoy": default["part_x_balance_sheet_22_net_assets_or_fund_balances"],
+    })
+
+
+def write_irs_extract_csv(path, rows, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS, dirty_rate=DEFAULT_DIRTY_RATE):
+    """写出四行语义化表头的 IRS extract CSV，返回数据行数"""
+    start = time.perf_counter()
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(IRS_EXTRACT_HEADER)
+        for filings in iter_filing_chunks(rows, seed, chunk_rows):
+            to_irs_extract_frame(filings, written, seed, dirty_rate).to_csv(f, header=False, index=False)
+            written += len(filings)
+    elapsed = time.perf_counter() - start
+    logger.info(f"IRS extract CSV {path}: {written:,} 行，用时 {elapsed:.1f}s ({written / elapsed:,.0f} 行/秒)")
+    return written
+
+
+def ein_to_org_id(ein):
+    """合成 EIN 对应的机构序号；不是合成数据生成的 EIN 时返回 None"""
+    digits = "".join(ch for ch in str(ein) if ch.isdigit())
+    if not digits:
+        return None
+    offset = int(digits) - EIN_OFFSET
+    if offset < 0 or offset % EIN_STRIDE:
+        return None
+    return offset // EIN_STRIDE
+
+
+def optional_number(value):
+    """NaN -> None，整数值的浮点数转 int，与 ProPublica JSON 的写法一致"""
+    if value is None or pd.isna(value):
+        return None
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def organization_payload(records):
+    """同一机构的若干申报记录（按财年倒序） -> ProPublica /organizations/{ein}.json 形状的字典"""
+    latest = records[0]
+    filings = []
+    for record in records:
+        tax_prd = int(record["fiscal_year"]) * 100 + int(record["fiscal_month"])
+        filings.append({
+            "tax_prd": tax_prd,
+            "tax_prd_yr": int(record["fiscal_year"]),
+            "formtype": PROPUBLICA_FORM_CODES[record["form_type"]],
+            "pdf_url": None,
+            "updated": f"{int(record['fiscal_year']) + 1}-{int(record['fiscal_month']) % 12 + 1:02d}-15T00:00:00.000Z",
+            "totrevenue": optional_number(record["revenue"]),
+            "totfuncexpns": optional_number(record["expenses"]),
+            "totassetsend": optional_number(record["assets"]),
+            "totliabend": optional_number(
+                record["assets"] - record["net_assets"] if pd.notna(record["assets"]) else None
+            ),
+            "totnetassetend": optional_number(record["net_assets"]),
+            "noemployees": optional_number(record["employees"]),
+        })
+    ein = latest["ein"]
+    return {
+        "organization": {
+            "id": int(ein),
+            "ein": int(ein),
+            "strein": f"{ein[:2]}-{ein[2:]}",
+            "name": latest["campus"].upper(),
+            "careofname": None,
+            "address": f"{latest['org_id'] % 9000 + 1} MAIN ST",
+            "city": latest["city"].upper(),
+            "state": latest["st"],
+            "zipcode": f"{latest['org_id'] % 99_999:05d}",
+            "subsection_code": 3,
+            "ntee_code": "E91",
+            "tax_period": filings[0]["tax_prd"],
+            "revenue_amount": filings[0]["totrevenue"],
+            "asset_amount": filings[0]["totassetsend"],
+            "have_filings": True,
+            "have_extracts": True,
+            "have_pdfs": False,
+            "data_source": "synthetic",
+        },
+        "filings_with_data": filings,
+        "filings_without_data": [],
+        "data_source": PROPUBLICA_DATA_SOURCE,
+        "api_version": 2,
+    }
+
+
+def payloads_from_filings(filings):
+    """把按机构连续排列的申报记录拆成 (ein, payload)"""
+    records = filings.to_dict("records")
+    start = 0
+    while start < len(records):
+        end = start
+        while end < len(records) and records[end]["org_id"] == records[start]["org_id"]:
+            end += 1
+        yield records[start]["ein"], organization_payload(records[start:end])
+        start = end
+
+
+def iter_organization_payloads(organizations, seed=42, filings_per_org=FILINGS_PER_ORGANIZATION,
+                               chunk_rows=DEFAULT_CHUNK_ROWS):
+    """生成 organizations 个机构的 ProPublica 形状载荷"""
+    for filings in iter_filing_chunks(organizations * filings_per_org, seed, chunk_rows, filings_per_org):
+        yield from payloads_from_filings(filings)
+
+
+def synthetic_organization_payload(ein, seed=42, filings_per_org=FILINGS_PER_ORGANIZATION):
+    """按 EIN 单独生成一个机构的载荷（模拟服务按需返回）；不是合成 EIN 时返回 None"""
+    org_id = ein_to_org_id(ein)
+    if org_id is None:
+        return None
+    filings = filing_frame(org_id * filings_per_org, filings_per_org, seed, filings_per_org)
+    return organization_payload(filings.to_dict("records"))
+
+
+def write_organization_payloads(path, organizations, seed=42, filings_per_org=FILINGS_PER_ORGANIZATION):
+    """每行一个机构载荷的 JSONL，返回机构数"""
+    start = time.perf_counter()
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for _, payload in iter_organization_payloads(organizations, seed, filings_per_org):
+            f.write(json.dumps(payload) + "\n")
+            written += 1
+    elapsed = time.perf_counter() - start
+    logger.info(f"ProPublica 载荷 {path}: {written:,} 个机构，用时 {elapsed:.1f}s ({written / elapsed:,.0f} 个/秒)")
+    return written
+
+
+def build_synthetic_dataset(db_path, dataset, rows, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    生成并导入一个数据集：与 data_pipeline 相同的影子表 -> 建索引 -> 原子切换 -> 重建统计立方体流程，
+    因此基准测试看到的表结构、索引和立方体与正式导入一致。
+    """
+    table_name = resolve_table_name(dataset)
+    start = time.perf_counter()
+    with sqlite3.connect(db_path) as conn:
+        layout = create_shadow_tables(conn, table_name, COLUMN_TYPES[dataset])
+        written = 0
+        for chunk in iter_synthetic_chunks(dataset, rows, seed, chunk_rows):
+            written += insert_split_rows(conn, layout, chunk)
+        swap_in_shadow(conn, table_name, layout, written)
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    logger.info(f"合成数据 {table_name}: {written:,} 行，用时 {elapsed:.1f}s ({written / elapsed:,.0f} 行/秒)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成 IRS 990 数据（SQLite 表、IRS extract CSV 或 ProPublica 载荷）")
+    parser.add_argument("--format", choices=["sqlite", "csv", "payloads"], default="sqlite")
+    parser.add_argument("--rows", type=int, default=100_000, help="申报记录行数（payloads 为机构数 x 每机构申报数）")
+    parser.add_argument("--db", help="sqlite 格式的目标文件（表会被整体替换）")
+    parser.add_argument("--out", help="csv / payloads 格式的输出文件")
+    parser.add_argument("--datasets", default="default,propublica", help="sqlite 格式导入的数据集，逗号分隔")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--dirty-rate", type=float, default=DEFAULT_DIRTY_RATE, help="csv 中无法解析的 FY Ending 比例")
+    parser.add_argument("--filings-per-org", type=int, default=FILINGS_PER_ORGANIZATION, help="payloads 每个机构的申报数")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    configure_logging(level=args.log_level, log_format="text")
+    if args.format == "sqlite":
+        if not args.db:
+            parser.error("--format sqlite 需要 --db")
+        for dataset in [name.strip() for name in args.datasets.split(",") if name.strip()]:
+            build_synthetic_dataset(args.db, dataset, args.rows, args.seed, args.chunk_rows)
+        return
+
+    if not args.out:
+        parser.error(f"--format {args.format} 需要 --out")
+    if args.format == "csv":
+        write_irs_extract_csv(args.out, args.rows, args.seed, args.chunk_rows, args.dirty_rate)
+    else:
+        organizations = max(1, args.rows // args.filings_per_org)
+        write_organization_payloads(args.out, organizations, args.seed, args.filings_per_org)
+
+
+if __name__ == "__main__":
+    main()
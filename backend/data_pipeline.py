@@ -2,8 +2,34 @@ import pandas as pd
 import sqlite3
 import re
 import os
-from typing import Optional, Tuple
-# 不再需要旧的日期解析函数，现在使用内置的 parse_date 函数
+import argparse
+import logging
+from typing import List, Optional, Tuple
+from db_utils import (
+    DETAIL_KEY_COLUMNS,
+    detail_table_name,
+    ensure_index,
+    prepare_shadow_table,
+    split_hot_detail_columns,
+    swap_tables,
+    validate_shadow_table,
+)
+from sqlite_loader import analyze_tables, bulk_load_pragmas, create_table, insert_dataframe
+from summary_cube import dataset_for_table, refresh_summary_cube
+from fiscal_dates import parse_fiscal_date, parse_fiscal_dates
+from logging_setup import configure_logging
+from pipeline_profiler import PipelineProfiler
+from schema_inference import (
+    DEFAULT_SAMPLE_ROWS,
+    coerce_dataframe,
+    infer_schema,
+    report_coercion_failures,
+    report_schema,
+)
+
+REQUIRED_COLUMNS = ['fiscal_year', 'fiscal_month']
+
+logger = logging.getLogger(__name__)
 
 def sanitize_name(name):
     """清理列名：将字符串转为小写，用下划线替换所有空格和特殊字符。"""
@@ -22,45 +48,32 @@ def is_pure_numeric(value):
 def parse_date(date_str: str) -> Optional[Tuple[int, int]]:
     """
     从各种不规则的日期字符串中解析出（年份, 月份）。
-    能够处理 "M/YYYY", "YYYY/MM/DD", "M/D/YYYY" 等格式。
-    这是彻底解决日期问题的核心函数。
+    能够处理 "M/YYYY", "YYYY/MM/DD", "M/D/YYYY", "YYYY-MM-DD" 等格式。
+    单值版本，整列解析请使用 fiscal_dates.parse_fiscal_dates。
     """
-    if pd.isna(date_str):
-        return None
-    date_str = str(date_str).strip()
-
-    # 格式 1: "M/YYYY" 或 "MM/YYYY" (e.g., "6/2023", "12/2022")
-    match = re.fullmatch(r'(\d{1,2})/(\d{4})', date_str)
-    if match:
-        month, year = map(int, match.groups())
-        return year, month
-
-    # 格式 2: "YYYY/MM/DD" (e.g., "2022/12/31")
-    match = re.fullmatch(r'(\d{4})/(\d{1,2})/\d{1,2}', date_str)
-    if match:
-        year, month = map(int, match.groups())
-        return year, month
-
-    # 格式 3: "M/D/YYYY" (e.g., "6/30/2023")
-    match = re.fullmatch(r'(\d{1,2})/\d{1,2}/(\d{4})', date_str)
-    if match:
-        month, year = int(match.group(1)), int(match.group(2))
-        return year, month
-
-    # 格式 4: "YYYY-MM-DD" (e.g., "2023-06-30")
-    match = re.fullmatch(r'(\d{4})-(\d{1,2})-\d{1,2}', date_str)
-    if match:
-        year, month = map(int, match.groups())
-        return year, month
-
-    # 如果都匹配不上，返回None
-    return None
+    return parse_fiscal_date(date_str)
 
-def process_four_row_semantic_header(csv_file_path):
+def create_nonprofits_indexes(conn, table_name):
+    """为 nonprofits 表的常用查询列建立索引（只为实际存在的列建立）"""
+    existing_columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()}
+    index_specs = {
+        "ein": ["ein"],
+        "ein_fiscal_year": ["ein", "fiscal_year"],
+        "fiscal_year_month": ["fiscal_year", "fiscal_month"],
+        "state_city": ["st", "city"],
+        # 排行榜按年份倒序遍历这两个索引，避免对整个范围排序
+        "fiscal_year_revenue": ["fiscal_year", "part_i_summary_12_total_revenue_cy"],
+        "fiscal_year_employees": ["fiscal_year", "employees"],
+    }
+    for suffix, columns in index_specs.items():
+        if all(column in existing_columns for column in columns):
+            ensure_index(conn, table_name, f"idx_{table_name}_{suffix}", columns)
+
+def build_semantic_column_names(csv_file_path):
     """
-    处理四行语义化表头并返回处理后的数据和新列名
+    读取前5行表头，按四行语义化规则生成列名
     """
-    print("正在读取CSV文件的表头信息...")
+    logger.info("正在读取CSV文件的表头信息...")
     
     # 读取前5行来获取表头信息（第2、3、4、5行，即索引1、2、3、4）
     header_rows = pd.read_csv(csv_file_path, nrows=5, header=None)
@@ -71,15 +84,15 @@ def process_four_row_semantic_header(csv_file_path):
     row4_field_desc = header_rows.iloc[3]     # 第4行：字段描述
     row5_year_info = header_rows.iloc[4]      # 第5行：年份信息
     
-    print(f"  > 表头行数: {len(header_rows)}")
-    print(f"  > 总列数: {len(row2_part_info)}")
+    logger.info(f"  > 表头行数: {len(header_rows)}")
+    logger.info(f"  > 总列数: {len(row2_part_info)}")
     
     # 处理第2行：向前填充
-    print("正在处理第2行（Part信息）：执行向前填充...")
-    row2_filled = row2_part_info.fillna(method='ffill')
+    logger.info("正在处理第2行（Part信息）：执行向前填充...")
+    row2_filled = row2_part_info.ffill()
     
     # 处理第3行：只保留纯数字
-    print("正在处理第3行（行号）：只保留纯数字...")
+    logger.info("正在处理第3行（行号）：只保留纯数字...")
     row3_processed = []
     for value in row3_line_numbers:
         if is_pure_numeric(value):
@@ -88,10 +101,10 @@ def process_four_row_semantic_header(csv_file_path):
             row3_processed.append('')
     
     # 第4行和第5行保持原样
-    print("第4行（字段描述）和第5行（年份信息）保持原样...")
+    logger.info("第4行（字段描述）和第5行（年份信息）保持原样...")
     
     # 创建新的列名
-    print("正在组合创建新列名...")
+    logger.info("正在组合创建新列名...")
     new_column_names = []
     
     for i in range(len(row2_filled)):
@@ -125,184 +138,443 @@ def process_four_row_semantic_header(csv_file_path):
         final_name = sanitize_name(final_name)
         new_column_names.append(final_name)
     
-    print(f"  > 成功创建 {len(new_column_names)} 个语义化列名")
-    
-    # 读取真正的数据（从第6行开始，跳过前5行）
-    print("正在读取真正的数据内容（从第6行开始）...")
-    data_df = pd.read_csv(csv_file_path, skiprows=5, header=None)
-    
-    # 确保列名数量与数据列数匹配
-    if len(new_column_names) != len(data_df.columns):
-        print(f"警告：列名数量 ({len(new_column_names)}) 与数据列数 ({len(data_df.columns)}) 不匹配")
+    logger.info(f"  > 成功创建 {len(new_column_names)} 个语义化列名")
+    return new_column_names
+
+def align_column_names(column_names, data_column_count):
+    """确保列名数量与数据列数匹配"""
+    column_names = list(column_names)
+    if len(column_names) != data_column_count:
+        logger.warning(f"警告：列名数量 ({len(column_names)}) 与数据列数 ({data_column_count}) 不匹配")
         # 调整以匹配实际数据列数
-        if len(new_column_names) > len(data_df.columns):
-            new_column_names = new_column_names[:len(data_df.columns)]
+        if len(column_names) > data_column_count:
+            column_names = column_names[:data_column_count]
         else:
-            for i in range(len(new_column_names), len(data_df.columns)):
-                new_column_names.append(f'extra_column_{i}')
+            for i in range(len(column_names), data_column_count):
+                column_names.append(f'extra_column_{i}')
+    return column_names
+
+def process_four_row_semantic_header(csv_file_path):
+    """
+    处理四行语义化表头并返回处理后的数据和新列名
+    """
+    new_column_names = build_semantic_column_names(csv_file_path)
+    
+    # 读取真正的数据（从第6行开始，跳过前5行）
+    logger.info("正在读取真正的数据内容（从第6行开始）...")
+    # 一律按字符串读入，保留前导零，类型由 schema_inference 统一决定
+    data_df = pd.read_csv(csv_file_path, skiprows=5, header=None, dtype=str)
     
     # 应用新的语义化列名
+    new_column_names = align_column_names(new_column_names, len(data_df.columns))
     data_df.columns = new_column_names
-    print(f"  > 成功读取 {len(data_df)} 行数据")
+    logger.info(f"  > 成功读取 {len(data_df)} 行数据")
     
     return data_df, new_column_names
 
-def run_data_pipeline():
-    """主数据处理管道函数，负责将CSV数据清洗并存入SQLite数据库。"""
-    # --- 配置区 ---
-    # 获取脚本所在目录的绝对路径
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_file_path = os.path.join(script_dir, 'data', 'nonprofits_100.csv')
-    db_path = os.path.join(script_dir, 'irs.db')  # 数据库文件在backend目录
-    table_name = 'nonprofits'
-
-    print("=== 开始执行四行语义化表头数据管道 ===")
-    print(f"脚本目录: {script_dir}")
-    print(f"源文件: {csv_file_path}")
-    print(f"目标数据库: {db_path}")
-    print(f"目标表名: {table_name}")
-    print("-" * 50)
-
-    # 步骤1：处理四行语义化表头并读取数据
-    print("步骤 1/4: 处理四行语义化表头...")
-    try:
-        if not os.path.exists(csv_file_path):
-            print(f"错误：找不到文件 '{csv_file_path}'")
-            print(f"请确认文件是否存在于: {os.path.dirname(csv_file_path)}")
-            return
-        
-        df, column_names = process_four_row_semantic_header(csv_file_path)
-        
-    except Exception as e:
-        print(f"错误：处理表头时发生异常: {e}")
-        return
-
+def plan_column_layout(column_names) -> Tuple[List[int], List[str]]:
+    """
+    步骤2和3：删除第一个无用列、重命名重复列名、删除空列名。
+    返回需要保留的列位置和对应的最终列名，整表模式和分块模式共用同一份规划。
+    """
     # 步骤2：删除第一个无用列
-    print("\n步骤 2/4: 删除第一个无用列...")
-    if len(df.columns) > 0:
-        first_column = str(df.columns[0])
-        print(f"  > 删除第一列: '{first_column}'")
-        df = df.drop(columns=[first_column])
-        print(f"  > 删除后剩余列数: {len(df.columns)}")
+    logger.info("步骤 2/4: 删除第一个无用列...")
+    positions = list(range(len(column_names)))
+    if positions:
+        logger.info(f"  > 删除第一列: '{column_names[0]}'")
+        positions = positions[1:]
+        logger.info(f"  > 删除后剩余列数: {len(positions)}")
     else:
-        print("  > 警告：没有列可删除")
+        logger.warning("  > 警告：没有列可删除")
 
     # 步骤3：处理重复列名和空列名
-    print("\n步骤 3/4: 处理重复列名和空列名...")
+    logger.info("步骤 3/4: 处理重复列名和空列名...")
     
     # 处理重复的列名
-    original_columns = list(df.columns)
     seen = {}
     new_columns = []
     
-    for col in original_columns:
+    for position in positions:
+        col = column_names[position]
         if col in seen:
             seen[col] += 1
             new_col = f"{col}_{seen[col]}"
             new_columns.append(new_col)
-            print(f"  > 重复列名 '{col}' 重命名为 '{new_col}'")
+            logger.info(f"  > 重复列名 '{col}' 重命名为 '{new_col}'")
         else:
             seen[col] = 0
             new_columns.append(col)
     
-    df.columns = new_columns
-    
     # 删除空列名的列
-    empty_cols = [col for col in df.columns if str(col).strip() == '']
-    if empty_cols:
-        print(f"  > 删除空列名的列: {len(empty_cols)} 个")
-        df = df.drop(columns=empty_cols)
+    kept = [(position, col) for position, col in zip(positions, new_columns) if str(col).strip() != '']
+    empty_count = len(new_columns) - len(kept)
+    if empty_count:
+        logger.info(f"  > 删除空列名的列: {empty_count} 个")
     
-    print(f"  > 最终列数: {len(df.columns)}")
+    logger.info(f"  > 最终列数: {len(kept)}")
+    return [position for position, _ in kept], [col for _, col in kept]
 
-    # 关键步骤：标准化财年和月份（V2版本 - 彻底治本）
-    print("\n步骤 4/5: 标准化财年和月份（治本方案）...")
-    
-    # 查找财年结束日期列
-    fy_end_column_name = None
-    for col in df.columns:
+def apply_column_layout(df, positions, names):
+    """按规划选取列并应用最终列名"""
+    df = df.iloc[:, positions]
+    df.columns = names
+    return df
+
+def find_fiscal_date_column(columns) -> Optional[str]:
+    """查找财年结束日期列"""
+    for col in columns:
         if 'fy_ending' in col.lower() or 'fiscal' in col.lower():
-            fy_end_column_name = col
-            break
+            return col
+    return None
+
+def add_fiscal_columns(df, fy_end_column_name):
+    """向量化解析日期列，创建干净的 fiscal_year 和 fiscal_month 列"""
+    parsed_dates = parse_fiscal_dates(df[fy_end_column_name])
+    df['fiscal_year'] = parsed_dates['fiscal_year']
+    df['fiscal_month'] = parsed_dates['fiscal_month']
+    return df
+
+def report_fiscal_quality(df, fy_end_column_name):
+    """打印日期标准化的抽样检查和数据质量统计"""
+    # 数据标准化抽样检查
+    logger.info(f"  > 数据标准化抽样检查:")
+    sample_data = df[[fy_end_column_name, 'fiscal_year', 'fiscal_month']].head(10)
+    for idx, row in sample_data.iterrows():
+        original = row[fy_end_column_name]
+        year = row['fiscal_year']
+        month = row['fiscal_month']
+        logger.debug(f"    '{original}' -> FY:{year}, Month:{month}")
+    
+    # 数据质量统计
+    logger.info(f"  > 数据质量统计:")
+    total_records = len(df)
+    successful_parses = df['fiscal_year'].notna().sum()
+    logger.info(f"    总记录数: {total_records}")
+    logger.info(f"    成功解析: {successful_parses}")
+    if total_records:
+        logger.info(f"    解析成功率: {successful_parses/total_records*100:.1f}%")
     
-    if fy_end_column_name:
-        print(f"  > 找到财年结束日期列: '{fy_end_column_name}'")
-        print(f"  > 正在应用强大的日期解析逻辑...")
+    # 年份分布
+    logger.info(f"  > 财年分布:")
+    fiscal_year_counts = df['fiscal_year'].value_counts().head(5)
+    for year, count in fiscal_year_counts.items():
+        logger.debug(f"    FY {year}: {count} 条记录")
         
-        # 应用我们强大的解析函数
-        parsed_dates = df[fy_end_column_name].apply(parse_date)
+    # 月份分布
+    logger.info(f"  > 财报结束月份分布:")
+    fiscal_month_counts = df['fiscal_month'].value_counts().sort_index()
+    for month, count in fiscal_month_counts.items():
+        logger.debug(f"    {month}月: {count} 条记录")
 
-        # 创建新的、干净的列
-        df['fiscal_year'] = parsed_dates.apply(lambda x: x[0] if x else None).astype('Int64')
-        df['fiscal_month'] = parsed_dates.apply(lambda x: x[1] if x else None).astype('Int64')
+def report_missing_fiscal_column(columns):
+    logger.warning(f"  > 严重警告: 未找到财年结束日期列，日期标准化失败！")
+    # 尝试查找其他可能的日期列
+    date_columns = [col for col in columns if any(keyword in col.lower() for keyword in ['date', 'year', 'period'])]
+    if date_columns:
+        logger.info(f"  > 发现可能的日期列: {date_columns[:3]}")
 
-        print(f"  > 成功创建 'fiscal_year' 和 'fiscal_month' 列")
-        
-        # 数据标准化抽样检查
-        print(f"  > 数据标准化抽样检查:")
-        sample_data = df[[fy_end_column_name, 'fiscal_year', 'fiscal_month']].head(10)
-        for idx, row in sample_data.iterrows():
-            original = row[fy_end_column_name]
-            year = row['fiscal_year']
-            month = row['fiscal_month']
-            print(f"    '{original}' -> FY:{year}, Month:{month}")
-        
-        # 数据质量统计
-        print(f"  > 数据质量统计:")
-        total_records = len(df)
-        successful_parses = df['fiscal_year'].notna().sum()
-        print(f"    总记录数: {total_records}")
-        print(f"    成功解析: {successful_parses}")
-        print(f"    解析成功率: {successful_parses/total_records*100:.1f}%")
-        
-        # 年份分布
-        print(f"  > 财年分布:")
-        fiscal_year_counts = df['fiscal_year'].value_counts().head(5)
-        for year, count in fiscal_year_counts.items():
-            print(f"    FY {year}: {count} 条记录")
-            
-        # 月份分布
-        print(f"  > 财报结束月份分布:")
-        fiscal_month_counts = df['fiscal_month'].value_counts().sort_index()
-        for month, count in fiscal_month_counts.items():
-            print(f"    {month}月: {count} 条记录")
-            
-    else:
-        print(f"  > 严重警告: 未找到财年结束日期列，日期标准化失败！")
-        # 尝试查找其他可能的日期列
-        date_columns = [col for col in df.columns if any(keyword in col.lower() for keyword in ['date', 'year', 'period'])]
-        if date_columns:
-            print(f"  > 发现可能的日期列: {date_columns[:3]}")
-        return
+def create_shadow_tables(conn, table_name, column_types):
+    """
+    创建热表（列表/筛选接口使用的窄表）和明细表（其余宽列，按 ein + fiscal_year 关联）的影子表。
+    返回 {正式表名: (影子表名, 列列表)}
+    """
+    hot_columns, detail_columns = split_hot_detail_columns(column_types)
+    detail_name = detail_table_name(table_name)
+    layout = {
+        table_name: (prepare_shadow_table(conn, table_name), hot_columns),
+        detail_name: (prepare_shadow_table(conn, detail_name), detail_columns),
+    }
+    for shadow_name, columns in layout.values():
+        create_table(conn, shadow_name, columns, column_types)
+    logger.info(f"  > 热表 {len(hot_columns)} 列，明细表 {len(detail_columns) - len(DETAIL_KEY_COLUMNS)} 列")
+    return layout
 
-    # 步骤5：连接数据库并彻底重建数据
-    print(f"\n步骤 5/5: 连接数据库并彻底重建数据...")
+def insert_split_rows(conn, layout, df):
+    """把同一批数据按列拆分写入热表和明细表"""
+    for shadow_name, columns in layout.values():
+        insert_dataframe(conn, shadow_name, df[columns])
+    return len(df)
+
+def swap_in_shadow(conn, table_name, layout, expected_rows, profiler=None):
+    """建索引、校验影子表，然后把热表和明细表一起原子切换到正式表名"""
+    profiler = profiler or PipelineProfiler("data_pipeline")
+    hot_shadow = layout[table_name][0]
+    detail_shadow = layout[detail_table_name(table_name)][0]
+    # 数据全部写入后再建索引，比边写边维护索引快得多
+    with profiler.stage("create_indexes", rows=expected_rows), bulk_load_pragmas(conn):
+        create_nonprofits_indexes(conn, hot_shadow)
+        ensure_index(conn, detail_shadow, f"idx_{detail_shadow}_ein_fiscal_year", DETAIL_KEY_COLUMNS)
+
+    with profiler.stage("validate", rows=expected_rows):
+        row_count = validate_shadow_table(conn, hot_shadow, REQUIRED_COLUMNS, min_rows=max(1, expected_rows))
+        validate_shadow_table(conn, detail_shadow, DETAIL_KEY_COLUMNS, min_rows=row_count)
+        logger.info(f"  > 影子表校验通过: {row_count} 行")
+
+        # 明细按 ein + fiscal_year 关联，重复键会让明细查询返回多行，这里提前提示
+        duplicate_keys = conn.execute(
+            f'SELECT COUNT(*) FROM (SELECT 1 FROM "{hot_shadow}" GROUP BY ein, fiscal_year HAVING COUNT(*) > 1)'
+        ).fetchone()[0]
+        if duplicate_keys:
+            logger.warning(f"  > 警告: {duplicate_keys} 组 (ein, fiscal_year) 重复，明细关联时会返回多行")
+
+    # 全量重载后重建该数据集的统计立方体；放在切换事务内提交，
+    # 否则新版本号可见而立方体仍是旧数据时，API 会把旧统计缓存到新版本下。
+    # 重建耗时计入 swap_tables 阶段（阶段不能嵌套）
+    dataset = dataset_for_table(table_name)
+    cube_rows = []
+
+    def rebuild_cube(swap_conn):
+        cube_rows.append(refresh_summary_cube(swap_conn, dataset))
+
+    with profiler.stage("swap_tables", rows=row_count):
+        versions = swap_tables(
+            conn,
+            {live_name: shadow_name for live_name, (shadow_name, _) in layout.items()},
+            before_commit=rebuild_cube if dataset is not None else None,
+        )
+    for live_name, (shadow_name, _) in layout.items():
+        logger.info(f"  > 已原子切换 '{shadow_name}' -> '{live_name}' (数据版本 {versions[live_name]})")
+    if cube_rows:
+        logger.info(f"  > 统计立方体已重建: {cube_rows[0]} 个单元")
+
+    # 统计信息按表名保存，改名不会带过去，所以切换后对正式表名执行 ANALYZE
+    with profiler.stage("analyze", rows=row_count):
+        analyze_tables(conn, layout)
+
+def ingest_csv_in_chunks(csv_file_path, db_path, table_name, chunksize, profiler=None):
+    """
+    分块流式导入：表头只解析一次，每个数据块按同一份列规划重命名、解析日期，
+    再用 executemany 批量写入影子表。所有数据块在同一个事务中提交，内存占用只与 chunksize 有关。
+    """
+    profiler = profiler or PipelineProfiler("data_pipeline")
+    # 步骤1：只处理表头
+    logger.info("步骤 1/4: 处理四行语义化表头（分块模式）...")
+    with profiler.stage("header"):
+        column_names = build_semantic_column_names(csv_file_path)
+
+    reader = pd.read_csv(csv_file_path, skiprows=5, header=None, dtype=str, chunksize=chunksize)
+    chunks = profiler.iterate("read_csv", reader)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        logger.error("错误：CSV 文件中没有数据行")
+        return None
+
+    with profiler.stage("column_layout"):
+        column_names = align_column_names(column_names, len(first_chunk.columns))
+        positions, final_names = plan_column_layout(column_names)
+
+    logger.info("步骤 4/5: 标准化财年和月份（逐块处理）...")
+    fy_end_column_name = find_fiscal_date_column(final_names)
+    if not fy_end_column_name:
+        report_missing_fiscal_column(final_names)
+        return None
+    logger.info(f"  > 找到财年结束日期列: '{fy_end_column_name}'")
+
+    # 类型推断使用独立的抽样，不受 chunksize 大小影响
+    logger.info(f"  > 正在根据前 {DEFAULT_SAMPLE_ROWS} 行推断列类型...")
+    with profiler.stage("schema_inference", rows=DEFAULT_SAMPLE_ROWS):
+        sample = pd.read_csv(csv_file_path, skiprows=5, header=None, dtype=str, nrows=DEFAULT_SAMPLE_ROWS)
+        sample = add_fiscal_columns(apply_column_layout(sample, positions, final_names), fy_end_column_name)
+        column_types = infer_schema(sample)
+    report_schema(column_types)
+
+    logger.info(f"步骤 5/5: 分块写入影子表并原子切换 (chunksize={chunksize})...")
+    conn = sqlite3.connect(db_path)
     try:
-        # 删除旧数据库文件以确保完全重建
-        if os.path.exists(db_path):
-            os.remove(db_path)
-            print(f"  > 已删除旧的数据库文件: {db_path}")
-            
-        print(f"  > 正在连接新数据库: {db_path}")
-        conn = sqlite3.connect(db_path)
-        
-        print(f"  > 正在写入表 '{table_name}' 包含标准化的日期列...")
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
+        with profiler.stage("create_tables"):
+            layout = create_shadow_tables(conn, table_name, column_types)
+
+        total_rows = 0
+        parsed_rows = 0
+        chunk_count = 0
+        failures = {}
+        # 导入期间关闭同步、日志放内存，结束后恢复原设置
+        with bulk_load_pragmas(conn):
+            conn.execute("BEGIN")
+            for chunk in _chain_chunks(first_chunk, chunks):
+                with profiler.stage("fiscal_dates", rows=len(chunk)):
+                    chunk = apply_column_layout(chunk, positions, final_names)
+                    chunk = add_fiscal_columns(chunk, fy_end_column_name)
+                with profiler.stage("coerce_types", rows=len(chunk)):
+                    chunk, failures = coerce_dataframe(chunk, column_types, failures)
+                with profiler.stage("insert_rows", rows=len(chunk)):
+                    total_rows += insert_split_rows(conn, layout, chunk)
+                parsed_rows += int(chunk['fiscal_year'].notna().sum())
+                chunk_count += 1
+                logger.info(f"  > 第 {chunk_count} 块: 累计写入 {total_rows} 行")
+            with profiler.stage("insert_rows"):
+                conn.commit()
+
+        logger.info(f"  > 数据质量统计: 总记录数 {total_rows}，成功解析 {parsed_rows}")
+        report_coercion_failures(failures)
+        swap_in_shadow(conn, table_name, layout, total_rows, profiler)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
-        print(f"  > 成功写入 {len(df)} 行数据，{len(df.columns)} 列")
-        print(f"  > 其中包含干净的 'fiscal_year' 和 'fiscal_month' 列")
-        
-    except Exception as e:
-        print(f"错误：写入数据库时发生异常: {e}")
+
+    return total_rows, len(final_names) + 2
+
+def _chain_chunks(first_chunk, reader):
+    yield first_chunk
+    for chunk in reader:
+        yield chunk
+
+def run_data_pipeline(
+    chunksize: Optional[int] = None,
+    csv_file_path: Optional[str] = None,
+    db_path: Optional[str] = None,
+    profiler: Optional[PipelineProfiler] = None,
+):
+    """
+    主数据处理管道函数，负责将CSV数据清洗并存入SQLite数据库。
+    传入启用的 profiler 时记录各阶段耗时、行数和内存峰值。
+    """
+    profiler = profiler or PipelineProfiler("data_pipeline")
+    # --- 配置区 ---
+    # 获取脚本所在目录的绝对路径；未指定时使用仓库内的样例 CSV 和 backend 目录下的数据库
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_file_path = csv_file_path or os.path.join(script_dir, 'data', 'nonprofits_100.csv')
+    db_path = db_path or os.path.join(script_dir, 'irs.db')
+    table_name = 'nonprofits'
+
+    logger.info("=== 开始执行四行语义化表头数据管道 ===")
+    logger.info(f"脚本目录: {script_dir}")
+    logger.info(f"源文件: {csv_file_path}")
+    logger.info(f"目标数据库: {db_path}")
+    logger.info(f"目标表名: {table_name}")
+    logger.info("-" * 50)
+
+    if not os.path.exists(csv_file_path):
+        logger.error(f"错误：找不到文件 '{csv_file_path}'")
+        logger.info(f"请确认文件是否存在于: {os.path.dirname(csv_file_path)}")
         return
 
-    print("\n" + "=" * 60)
-    print("[OK] V2版数据管道执行成功！")
-    print(f"[OK] 数据库 {db_path} 已被全新的、干净的数据覆盖")
-    print("[OK] 日期标准化完成：fiscal_year 和 fiscal_month 列已创建")
-    print("=" * 60)
+    if chunksize:
+        try:
+            result = ingest_csv_in_chunks(csv_file_path, db_path, table_name, chunksize, profiler)
+        except Exception as e:
+            logger.error(f"错误：分块导入时发生异常: {e}")
+            return
+        if result is None:
+            return
+        row_count, column_count = result
+        logger.info(f"  > 成功写入 {row_count} 行数据，{column_count} 列")
+    else:
+        # 步骤1：处理四行语义化表头并读取数据
+        logger.info("步骤 1/4: 处理四行语义化表头...")
+        try:
+            with profiler.stage("read_csv") as stage:
+                df, column_names = process_four_row_semantic_header(csv_file_path)
+                stage.add_rows(len(df))
+        except Exception as e:
+            logger.error(f"错误：处理表头时发生异常: {e}")
+            return
+
+        # 步骤2和3：删除第一个无用列，处理重复列名和空列名
+        with profiler.stage("column_layout"):
+            positions, final_names = plan_column_layout(list(df.columns))
+            df = apply_column_layout(df, positions, final_names)
+
+        # 关键步骤：标准化财年和月份（V2版本 - 彻底治本）
+        logger.info("步骤 4/5: 标准化财年和月份（治本方案）...")
+        fy_end_column_name = find_fiscal_date_column(df.columns)
+        if not fy_end_column_name:
+            report_missing_fiscal_column(df.columns)
+            return
+
+        logger.info(f"  > 找到财年结束日期列: '{fy_end_column_name}'")
+        logger.info(f"  > 正在应用强大的日期解析逻辑...")
+        with profiler.stage("fiscal_dates", rows=len(df)):
+            df = add_fiscal_columns(df, fy_end_column_name)
+        logger.info(f"  > 成功创建 'fiscal_year' 和 'fiscal_month' 列")
+        report_fiscal_quality(df, fy_end_column_name)
+
+        # 根据抽样推断列类型，并按类型转换整表
+        logger.info(f"  > 正在根据前 {DEFAULT_SAMPLE_ROWS} 行推断列类型...")
+        with profiler.stage("schema_inference", rows=min(len(df), DEFAULT_SAMPLE_ROWS)):
+            column_types = infer_schema(df.head(DEFAULT_SAMPLE_ROWS))
+        report_schema(column_types)
+        with profiler.stage("coerce_types", rows=len(df)):
+            df, failures = coerce_dataframe(df, column_types)
+        report_coercion_failures(failures)
+
+        # 步骤5：在影子表中重建数据，校验后原子切换（不再删除整个数据库，users 表得以保留）
+        logger.info(f"步骤 5/5: 构建影子表并原子切换...")
+        try:
+            logger.info(f"  > 正在连接数据库: {db_path}")
+            conn = sqlite3.connect(db_path)
+            try:
+                with profiler.stage("create_tables"):
+                    layout = create_shadow_tables(conn, table_name, column_types)
+                logger.info(f"  > 正在写入影子表 '{layout[table_name][0]}'（显式列类型）包含标准化的日期列...")
+                with profiler.stage("insert_rows", rows=len(df)), bulk_load_pragmas(conn):
+                    conn.execute("BEGIN")
+                    insert_split_rows(conn, layout, df)
+                swap_in_shadow(conn, table_name, layout, len(df), profiler)
+            finally:
+                conn.close()
+            logger.info(f"  > 成功写入 {len(df)} 行数据，{len(df.columns)} 列")
+            logger.info(f"  > 其中包含干净的 'fiscal_year' 和 'fiscal_month' 列")
+            
+        except Exception as e:
+            logger.error(f"错误：写入数据库时发生异常: {e}")
+            return
+
+    logger.info("" + "=" * 60)
+    logger.info("[OK] V2版数据管道执行成功！")
+    logger.info(f"[OK] 数据库 {db_path} 中的 '{table_name}' 表已被全新的、干净的数据替换")
+    logger.info("[OK] 日期标准化完成：fiscal_year 和 fiscal_month 列已创建")
+    logger.info("=" * 60)
+
+def main():
+    parser = argparse.ArgumentParser(description="四行语义化表头 CSV -> SQLite nonprofits 表")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=0,
+        help="分块导入的每块行数；0 表示整表读取（默认）。大文件建议 50000 左右。",
+    )
+    parser.add_argument(
+        "--csv",
+        help="源 CSV 路径（默认 backend/data/nonprofits_100.csv），例如 benchmarks/synthetic_data.py 生成的文件。",
+    )
+    parser.add_argument(
+        "--db",
+        help="目标 SQLite 路径（默认 backend/irs.db）。",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="记录各阶段耗时、行数/秒和内存峰值（tracemalloc），并写出 JSON 报告。",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="性能报告 JSON 路径（默认 backend/profiles/data_pipeline_<时间>.json，同目录追加 history.jsonl）。",
+    )
+    parser.add_argument(
+        "--cprofile",
+        help="同时用 cProfile 记录整个运行并把统计写到该路径（需配合 --profile）。",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="日志级别（DEBUG 会输出抽样、分布等明细）。",
+    )
+    args = parser.parse_args()
+    configure_logging(level=args.log_level, log_format="text")
+    profiler = PipelineProfiler("data_pipeline", enabled=args.profile, cprofile_path=args.cprofile)
+    profiler.meta.update({"csv": args.csv, "chunksize": args.chunksize or None})
+    with profiler:
+        run_data_pipeline(
+            chunksize=args.chunksize or None, csv_file_path=args.csv, db_path=args.db, profiler=profiler
+        )
+    if args.profile:
+        profiler.meta["rows"] = profiler.stages["insert_rows"].rows if "insert_rows" in profiler.stages else None
+        profiler.log_summary()
+        profiler.write_report(args.profile_output)
 
 # 脚本入口点
 if __name__ == "__main__":
-    run_data_pipeline()
\ No newline at end of file
+    main()
@@ -0,0 +1,148 @@
+"""
+sqlite3 connection and cursor subclasses that time every statement.
+
+A SELECT does most of its work while rows are fetched, so a statement's
+time is the execute call plus every fetch until the cursor is exhausted,
+re-executed or closed; only then is it reported to metrics.observe_query.
+Statements over the slow-query threshold are also written to
+slow_query_log with their EXPLAIN QUERY PLAN and an approximate count of
+SQLite VM steps (a progress handler ticks every PROGRESS_INTERVAL
+instructions). db_utils.get_connection() returns these connections, so
+every API query and pandas.read_sql call made through it is measured.
+"""
+import sqlite3
+import time
+from typing import Any, List, Optional
+
+from metrics import observe_query
+from slow_query_log import slow_query_log
+
+
+PROGRESS_INTERVAL = 1000
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sql: Optional[str] = None
+        self._parameters: Any = None
+        self._explainable = False
+        self._elapsed = 0.0
+        self._rows = 0
+        self._start_ticks = 0
+
+    def _begin(self, sql: str, parameters: Any, explainable: bool) -> None:
+        self._finish()
+        self._sql, self._parameters, self._explainable = sql, parameters, explainable
+        self._elapsed, self._rows = 0.0, 0
+        self._start_ticks = getattr(self.connection, "progress_ticks", 0)
+
+    def _finish(self) -> None:
+        if self._sql is None:
+            return
+        sql, self._sql = self._sql, None
+        observe_query(sql, self._elapsed, self._rows)
+        if slow_query_log.is_slow(self._elapsed):
+            ticks = getattr(self.connection, "progress_ticks", None)
+            vm_steps = (ticks - self._start_ticks) * PROGRESS_INTERVAL if ticks is not None else None
+            plan = explain_query_plan(self.connection, sql, self._parameters) if self._explainable else None
+            slow_query_log.record(sql, self._parameters, self._elapsed, self._rows, vm_steps, plan)
+
+    def _timed(self, call, *args):
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def execute(self, sql: str, parameters: Any = ()):
+        self._begin(sql, parameters, explainable=True)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        self._begin(sql, None, explainable=False)
+        result = self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, parameters: Any) -> Optional[List[str]]:
+    """Plan steps for a statement, indented by depth; None if it cannot be explained."""
+    keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    if keyword not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE"):
+        return None
+    try:
+        # A plain cursor, so explaining does not feed back into the metrics or this log
+        cursor = sqlite3.Connection.cursor(conn)
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters or ()).fetchall()
+        cursor.close()
+    except sqlite3.Error:
+        return None
+    depth = {0: -1}
+    steps = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        steps.append("  " * depth[node_id] + detail)
+    return steps
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.progress_ticks = 0
+        self.set_progress_handler(self._tick, PROGRESS_INTERVAL)
+
+    def _tick(self) -> int:
+        self.progress_ticks += 1
+        return 0
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute does not go through cursor(), so route it explicitly
+    def execute(self, sql: str, parameters: Any = ()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -1,10 +1,13 @@
 import os
 import sqlite3
-from typing import Iterable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from db_instrumentation import InstrumentedConnection
 
 
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BACKEND_DIR, "irs.db")
+# IRS_DB_PATH points the API and pipelines at another database (benchmarks, scratch copies)
+DB_PATH = os.environ.get("IRS_DB_PATH") or os.path.join(BACKEND_DIR, "irs.db")
 DEFAULT_DATASET = "default"
 
 DATASET_TABLES = {
@@ -17,8 +20,9 @@ def get_db_path() -> str:
     return DB_PATH
 
 
-def get_connection() -> sqlite3.Connection:
-    return sqlite3.connect(DB_PATH)
+def get_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    # Streaming responses read from the connection on threadpool workers
+    return sqlite3.connect(DB_PATH, check_same_thread=check_same_thread, factory=InstrumentedConnection)
 
 
 def resolve_table_name(dataset: Optional[str] = None) -> str:
@@ -64,3 +68,249 @@ def ensure_columns(table_name: str, required_columns: Iterable[str]) -> None:
     if missing_columns:
         missing = ", ".join(missing_columns)
         raise ValueError(f"Table '{table_name}' is missing required columns: {missing}")
+
+
+# List, filter and facet endpoints only read these columns, so each dataset is
+# stored as a narrow "hot" table (the name in DATASET_TABLES) plus a wide
+# "{table}_detail" table holding everything else, joined on ein + fiscal_year.
+HOT_COLUMNS = [
+    "ein",
+    "campus",
+    "address",
+    "city",
+    "st",
+    "zip",
+    "fiscal_year",
+    "fiscal_month",
+    "part_i_summary_12_total_revenue_cy",
+    "employees",
+    "propublica_form_type",
+    "propublica_filing_date",
+]
+DETAIL_KEY_COLUMNS = ["ein", "fiscal_year"]
+DETAIL_TABLE_SUFFIX = "_detail"
+
+
+def detail_table_name(table_name: str) -> str:
+    return f"{table_name}{DETAIL_TABLE_SUFFIX}"
+
+
+def split_hot_detail_columns(columns: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Return (hot columns, detail columns); detail columns start with the join keys."""
+    columns = list(columns)
+    hot_columns = [column for column in columns if column in HOT_COLUMNS]
+    detail_columns = [column for column in DETAIL_KEY_COLUMNS if column in columns]
+    detail_columns += [column for column in columns if column not in HOT_COLUMNS]
+    return hot_columns, detail_columns
+
+
+def get_detail_columns(table_name: str) -> List[str]:
+    """Columns that live only in the detail table (empty if there is none)."""
+    detail_name = detail_table_name(table_name)
+    if not table_exists(detail_name):
+        return []
+    return [column for column in get_table_columns(detail_name) if column not in DETAIL_KEY_COLUMNS]
+
+
+def detail_join_clause(table_name: str, hot_alias: str = "h", detail_alias: str = "d") -> str:
+    """FROM clause joining a hot table to its detail rows (NULL-safe on fiscal_year)."""
+    return (
+        f"{quote_identifier(table_name)} AS {hot_alias} "
+        f"LEFT JOIN {quote_identifier(detail_table_name(table_name))} AS {detail_alias} "
+        f"ON {detail_alias}.ein = {hot_alias}.ein AND {detail_alias}.fiscal_year IS {hot_alias}.fiscal_year"
+    )
+
+
+def fiscal_year_condition(fiscal_years: Optional[Iterable], column: str = "fiscal_year") -> Tuple[str, List[int]]:
+    """SQL condition + params matching the given fiscal years; a missing year (None/NaN/NA) matches NULL."""
+    if fiscal_years is None:
+        return "1", []
+    years = set()
+    include_null = False
+    for year in fiscal_years:
+        try:
+            years.add(int(year))
+        except (TypeError, ValueError):
+            include_null = True
+    parts = []
+    if years:
+        parts.append(f"{column} IN ({', '.join('?' for _ in years)})")
+    if include_null:
+        parts.append(f"{column} IS NULL")
+    return "(" + (" OR ".join(parts) or "0") + ")", sorted(years)
+
+
+DATASET_VERSION_TABLE = "dataset_versions"
+
+
+def quote_identifier(identifier: str) -> str:
+    escaped = identifier.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def ensure_dataset_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {DATASET_VERSION_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def get_table_version(conn: sqlite3.Connection, table_name: str) -> int:
+    try:
+        row = conn.execute(
+            f"SELECT version FROM {DATASET_VERSION_TABLE} WHERE table_name = ?",
+            (table_name,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+def get_dataset_version(dataset: Optional[str] = None) -> int:
+    """Monotonic data version for a dataset; API caches include it in their keys."""
+    table_name = resolve_table_name(dataset)
+    with get_connection() as conn:
+        return get_table_version(conn, table_name)
+
+
+def bump_table_version(conn: sqlite3.Connection, table_name: str) -> int:
+    ensure_dataset_version_table(conn)
+    conn.execute(
+        f"""
+        INSERT INTO {DATASET_VERSION_TABLE} (table_name, version, updated_at)
+        VALUES (?, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(table_name) DO UPDATE SET
+            version = version + 1,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (table_name,),
+    )
+    return get_table_version(conn, table_name)
+
+
+def ensure_index(
+    conn: sqlite3.Connection,
+    table_name: str,
+    index_name: str,
+    columns: List[str],
+    unique: bool = False,
+) -> None:
+    """
+    Create an index unless the table already has one on the same columns.
+
+    Tables built by a shadow reload keep the index names they were built with,
+    so matching on columns (not names) avoids duplicate indexes after a swap.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA index_list({quote_identifier(table_name)})")
+    for index_row in cursor.fetchall():
+        existing_name, existing_unique = index_row[1], bool(index_row[2])
+        cursor.execute(f"PRAGMA index_info({quote_identifier(existing_name)})")
+        existing_columns = [info[2] for info in sorted(cursor.fetchall())]
+        if existing_columns == list(columns) and (existing_unique or not unique):
+            return
+    column_list = ", ".join(quote_identifier(column) for column in columns)
+    unique_clause = "UNIQUE " if unique else ""
+    cursor.execute(
+        f"CREATE {unique_clause}INDEX IF NOT EXISTS {quote_identifier(index_name)} "
+        f"ON {quote_identifier(table_name)} ({column_list})"
+    )
+
+
+def shadow_table_prefix(table_name: str) -> str:
+    return f"{table_name}__v"
+
+
+def drop_shadow_tables(conn: sqlite3.Connection, table_name: str) -> List[str]:
+    """Remove shadow and retired tables left behind by an interrupted reload."""
+    prefix = shadow_table_prefix(table_name)
+    retired_name = f"{table_name}__retired"
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    stale = [row[0] for row in cursor.fetchall() if row[0].startswith(prefix) or row[0] == retired_name]
+    for name in stale:
+        cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(name)}")
+    conn.commit()
+    return stale
+
+
+def prepare_shadow_table(conn: sqlite3.Connection, table_name: str) -> str:
+    """Return a fresh shadow table name for a full reload of table_name."""
+    drop_shadow_tables(conn, table_name)
+    return f"{shadow_table_prefix(table_name)}{get_table_version(conn, table_name) + 1}"
+
+
+def validate_shadow_table(
+    conn: sqlite3.Connection,
+    shadow_name: str,
+    required_columns: Iterable[str],
+    min_rows: int = 1,
+) -> int:
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({quote_identifier(shadow_name)})")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    if not existing_columns:
+        raise ValueError(f"Shadow table '{shadow_name}' was not created")
+    missing_columns = [column for column in required_columns if column not in existing_columns]
+    if missing_columns:
+        raise ValueError(f"Shadow table '{shadow_name}' is missing required columns: {', '.join(missing_columns)}")
+    cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(shadow_name)}")
+    row_count = cursor.fetchone()[0]
+    if row_count < min_rows:
+        raise ValueError(f"Shadow table '{shadow_name}' has {row_count} rows; expected at least {min_rows}")
+    return row_count
+
+
+def swap_tables(
+    conn: sqlite3.Connection,
+    table_map: Dict[str, str],
+    before_commit: Optional[Callable[[sqlite3.Connection], None]] = None,
+) -> Dict[str, int]:
+    """
+    Atomically replace each live table with its validated shadow.
+
+    All renames and version bumps commit together, so readers see either the
+    old data or the new data, never an empty or half-built table.
+    before_commit runs inside the same transaction after the renames, so
+    derived tables (e.g. the summary cube) are rebuilt from the new data
+    before the bumped version becomes visible to API caches.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    versions = {}
+    retired_tables = []
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table_name, shadow_name in table_map.items():
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name = ?",
+                (table_name,),
+            )
+            if cursor.fetchone() is not None:
+                retired_name = f"{table_name}__retired"
+                cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(retired_name)}")
+                cursor.execute(
+                    f"ALTER TABLE {quote_identifier(table_name)} RENAME TO {quote_identifier(retired_name)}"
+                )
+                retired_tables.append(retired_name)
+            cursor.execute(f"ALTER TABLE {quote_identifier(shadow_name)} RENAME TO {quote_identifier(table_name)}")
+            versions[table_name] = bump_table_version(conn, table_name)
+        if before_commit is not None:
+            before_commit(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Freeing the old pages can take a while on big tables; do it after the
+    # swap has committed so readers never wait on it.
+    for retired_name in retired_tables:
+        cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(retired_name)}")
+    conn.commit()
+    return versions
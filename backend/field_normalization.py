@@ -0,0 +1,79 @@
+"""
+EIN and form type normalization shared by the ProPublica snapshot builders,
+the harvesters and propublica_pipeline.
+
+Columns hold far fewer distinct values than rows (a handful of form types,
+several filings per EIN), so the vectorized versions factorize first, clean
+only the unique values and map them back through the codes, as fiscal_dates
+does. The scalar versions follow the same rules for row-at-a-time callers.
+"""
+import numpy as np
+import pandas as pd
+
+
+# ProPublica reports formtype as a numeric code; read back from CSV it may carry ".0"
+FORM_TYPE_CODE_MAP = {
+    "0": "990",
+    "0.0": "990",
+    "1": "990EO",
+    "1.0": "990EO",
+    "2": "990PF",
+    "2.0": "990PF",
+}
+_MISSING_TEXT = {"", "nan", "None"}
+
+
+def _map_uniques(values: pd.Series, transform) -> pd.Series:
+    """Apply transform to the unique values and expand back; missing values (code -1) become ''."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    mapped = transform(pd.Series(uniques, dtype=object).astype(str)).to_numpy(dtype=object)
+    # A trailing '' lets the -1 code of missing values index straight into it
+    mapped = np.append(mapped, "")
+    return pd.Series(mapped[codes], index=values.index, dtype=object)
+
+
+def _normalize_unique_eins(text: pd.Series) -> pd.Series:
+    digits = text.str.replace(r"\D", "", regex=True).str[-9:]
+    return digits.where(digits == "", digits.str.zfill(9))
+
+
+def normalize_eins(values: pd.Series) -> pd.Series:
+    """
+    Keep digits only, take the last nine and zero-pad to nine; missing or
+    digitless values become ''. Same rules as normalize_ein.
+    """
+    return _map_uniques(values, _normalize_unique_eins)
+
+
+def normalize_ein(value) -> str:
+    """Scalar normalize_eins."""
+    if pd.isna(value):
+        return ""
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    if not digits:
+        return ""
+    return digits[-9:].zfill(9)
+
+
+def _normalize_unique_form_types(text: pd.Series) -> pd.Series:
+    text = text.str.strip()
+    text = text.where(~text.isin(_MISSING_TEXT), "")
+    return text.replace(FORM_TYPE_CODE_MAP)
+
+
+def normalize_form_types(values: pd.Series) -> pd.Series:
+    """
+    Map numeric codes to 990 / 990EO / 990PF and keep other values stripped;
+    missing values become ''. Same rules as normalize_form_type.
+    """
+    return _map_uniques(values, _normalize_unique_form_types)
+
+
+def normalize_form_type(value) -> str:
+    """Scalar normalize_form_types."""
+    if pd.isna(value):
+        return ""
+    text = str(value).strip()
+    if text in _MISSING_TEXT:
+        return ""
+    return FORM_TYPE_CODE_MAP.get(text, text)
@@ -0,0 +1,92 @@
+"""
+向量化的财年日期标准化工具，data_pipeline 和 ProPublica 快照共用。
+
+原始日期列里不同取值的数量通常远小于行数，因此先 factorize 得到唯一值，
+只对唯一值做一次合并正则 str.extract，再按 codes 映射回整列。
+"""
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# 四种格式合并为一个正则，每种格式使用各自的命名分组：
+#   M/YYYY, YYYY/MM/DD, M/D/YYYY, YYYY-MM-DD
+FISCAL_DATE_PATTERN = (
+    r'^(?:'
+    r'(?P<m1>\d{1,2})/(?P<y1>\d{4})'
+    r'|(?P<y2>\d{4})/(?P<m2>\d{1,2})/\d{1,2}'
+    r'|(?P<m3>\d{1,2})/\d{1,2}/(?P<y3>\d{4})'
+    r'|(?P<y4>\d{4})-(?P<m4>\d{1,2})-\d{1,2}'
+    r')$'
+)
+_FISCAL_DATE_REGEX = re.compile(FISCAL_DATE_PATTERN)
+_YEAR_GROUPS = ['y1', 'y2', 'y3', 'y4']
+_MONTH_GROUPS = ['m1', 'm2', 'm3', 'm4']
+
+
+def _first_group(extracted: pd.DataFrame, groups) -> pd.Series:
+    """每行只会有一种格式命中，取第一个非空分组并转为可空整数"""
+    combined = extracted[groups[0]]
+    for group in groups[1:]:
+        combined = combined.fillna(extracted[group])
+    return pd.to_numeric(combined, errors='coerce').astype('Int64')
+
+
+def _broadcast(values: pd.Series, parse_uniques) -> pd.DataFrame:
+    """factorize 后只解析唯一值，再按 codes 扩展回原始长度（-1 表示缺失值）"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    unique_text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    parsed = parse_uniques(unique_text)
+
+    # 在末尾追加一行全空值，让缺失值的 code(-1) 直接取到它
+    parsed = parsed.reindex(range(len(parsed) + 1))
+    take = np.where(codes < 0, len(parsed) - 1, codes)
+    result = parsed.iloc[take].reset_index(drop=True)
+    result.index = values.index
+    return result
+
+
+def _parse_unique_fiscal_dates(unique_text: pd.Series) -> pd.DataFrame:
+    extracted = unique_text.str.extract(FISCAL_DATE_PATTERN)
+    return pd.DataFrame({
+        'fiscal_year': _first_group(extracted, _YEAR_GROUPS),
+        'fiscal_month': _first_group(extracted, _MONTH_GROUPS),
+    })
+
+
+def parse_fiscal_dates(values: pd.Series) -> pd.DataFrame:
+    """
+    向量化解析财年结束日期列，返回与输入同索引的 fiscal_year / fiscal_month（Int64）。
+    解析规则与 parse_fiscal_date 完全一致，无法识别的值为 <NA>。
+    """
+    return _broadcast(values, _parse_unique_fiscal_dates)
+
+
+def parse_fiscal_date(date_str) -> Optional[Tuple[int, int]]:
+    """单值版本：返回 (年份, 月份) 或 None"""
+    if pd.isna(date_str):
+        return None
+    match = _FISCAL_DATE_REGEX.match(str(date_str).strip())
+    if not match:
+        return None
+    groups = match.groupdict()
+    year = next(groups[g] for g in _YEAR_GROUPS if groups[g] is not None)
+    month = next(groups[g] for g in _MONTH_GROUPS if groups[g] is not None)
+    return int(year), int(month)
+
+
+def _parse_unique_tax_period_months(unique_text: pd.Series) -> pd.DataFrame:
+    digits = unique_text.str.replace(r'\D', '', regex=True)
+    month = pd.to_numeric(digits.where(digits.str.len() >= 6).str.slice(4, 6), errors='coerce')
+    month = month.where(month.between(1, 12))
+    return pd.DataFrame({'fiscal_month': month.astype('Int64')})
+
+
+def parse_tax_period_months(values: pd.Series) -> pd.Series:
+    """
+    向量化解析 ProPublica tax_prd（如 202306 / "2023-06"）中的月份，
+    取所有数字的第5-6位，超出 1-12 的视为缺失。
+    """
+    return _broadcast(values, _parse_unique_tax_period_months)['fiscal_month']
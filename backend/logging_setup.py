@@ -0,0 +1,164 @@
+"""
+Structured, asynchronous logging for the API and the pipelines.
+
+configure_logging() routes the root logger through a QueueHandler, so a
+log call only formats its message and enqueues it; a QueueListener thread
+does the actual writing. Records carry the current request's correlation
+ID (request_id_var, set by RequestContextMiddleware from X-Request-ID or a
+fresh UUID). DEBUG output is sampled per request: only a fraction of
+requests (IRS_LOG_DEBUG_SAMPLE_RATE) log their debug events, and hot paths
+guard expensive debug work with debug_enabled(logger).
+
+Environment: IRS_LOG_LEVEL (INFO), IRS_LOG_FORMAT (json or text),
+IRS_LOG_DEBUG_SAMPLE_RATE (0.01).
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from typing import Optional
+
+
+DEFAULT_LEVEL = os.environ.get("IRS_LOG_LEVEL", "INFO").upper()
+DEFAULT_FORMAT = os.environ.get("IRS_LOG_FORMAT", "json").lower()
+DEFAULT_DEBUG_SAMPLE_RATE = float(os.environ.get("IRS_LOG_DEBUG_SAMPLE_RATE", "0.01"))
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s"
+REQUEST_ID_HEADER = "x-request-id"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+# Outside a request (pipelines, CLIs) every debug event passes once the level allows it
+debug_sampled_var: contextvars.ContextVar[bool] = contextvars.ContextVar("debug_sampled", default=True)
+
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+_listener: Optional[logging.handlers.QueueListener] = None
+_debug_sample_rate = DEFAULT_DEBUG_SAMPLE_RATE
+
+
+class ContextFilter(logging.Filter):
+    """Attach the correlation ID and drop DEBUG records from unsampled requests."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return record.levelno > logging.DEBUG or debug_sampled_var.get()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        # Anything passed through extra= becomes a top-level field
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def debug_enabled(logger: logging.Logger) -> bool:
+    """True when a debug event on this logger would be written; check before building costly messages."""
+    return logger.isEnabledFor(logging.DEBUG) and debug_sampled_var.get()
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None,
+) -> None:
+    """Install the queue handler on the root logger; calling it again reconfigures."""
+    global _listener, _debug_sample_rate
+    if debug_sample_rate is not None:
+        _debug_sample_rate = debug_sample_rate
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if (log_format or DEFAULT_FORMAT) == "text":
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel((level or DEFAULT_LEVEL).upper())
+
+
+def stop_logging() -> None:
+    """Flush queued records; registered at exit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware assigning each request a correlation ID, echoing it
+    in the X-Request-ID response header, deciding debug sampling, and
+    writing one access record when the response completes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("api.access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER.encode("latin-1"), b"").decode("latin-1")
+        request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        sample_token = debug_sampled_var.set(random.random() < _debug_sample_rate)
+        start = time.perf_counter()
+        state = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.logger.info(
+                "%s %s %s",
+                scope.get("method", ""),
+                scope.get("path", ""),
+                state["status"],
+                extra={
+                    "method": scope.get("method", ""),
+                    "path": scope.get("path", ""),
+                    "status": state["status"],
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                },
+            )
+            debug_sampled_var.reset(sample_token)
+            request_id_var.reset(id_token)
@@ -1,5 +1,9 @@
-from fastapi import FastAPI, HTTPException, Query, Depends
+import hmac
+import os
+
+from fastapi import FastAPI, HTTPException, Query, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
@@ -13,7 +17,16 @@ from passlib.context import CryptContext
 from api.search import router as search_router
 from api.export import router as export_router
 from api.filter import router as filter_router
-from db_utils import get_available_datasets, get_db_path, resolve_table_name
+from api.organizations import router as organizations_router
+from api.stats import router as stats_router
+from api.trends import router as trends_router
+from api.rankings import router as rankings_router
+from api.admin import router as admin_router
+from db_utils import detail_table_name, get_available_datasets, get_db_path, resolve_table_name
+from logging_setup import RequestContextMiddleware, configure_logging
+from metrics import MetricsMiddleware, render_metrics
+
+configure_logging()
 
 # Data models
 class UserLogin(BaseModel):
@@ -25,9 +38,16 @@ class UserRegister(BaseModel):
     password: str
 
 # Configuration
-SECRET_KEY = "your-secret-key-here-change-in-production"
+DEFAULT_SECRET_KEY = "your-secret-key-here-change-in-production"
+SECRET_KEY = os.environ.get("IRS_SECRET_KEY", DEFAULT_SECRET_KEY)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Slow-query admin exposes SQL text and internals; off unless enabled. Anyone can
+# register, so a login alone is not enough: admin calls also send IRS_ADMIN_TOKEN.
+ADMIN_ENABLED = os.environ.get("IRS_ENABLE_ADMIN", "").lower() in ("1", "true", "yes")
+ADMIN_TOKEN = os.environ.get("IRS_ADMIN_TOKEN", "")
+# Static bearer token for Prometheus scrapes; /api/metrics is only served when set
+METRICS_TOKEN = os.environ.get("IRS_METRICS_TOKEN", "")
 DATABASE_URL = f"sqlite:///{get_db_path()}"
 
 # Create FastAPI application
@@ -45,11 +65,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency includes CORS handling and streamed bodies
+app.add_middleware(MetricsMiddleware)
+# Added last so it wraps everything, including the metrics middleware
+app.add_middleware(RequestContextMiddleware)
 
 # Register new API routes
 app.include_router(search_router, prefix="/api", tags=["Search"])
 app.include_router(export_router, prefix="/api", tags=["Export"])
 app.include_router(filter_router, prefix="/api", tags=["Filter"])
+app.include_router(organizations_router, prefix="/api", tags=["Organizations"])
+app.include_router(stats_router, prefix="/api", tags=["Stats"])
+app.include_router(trends_router, prefix="/api", tags=["Trends"])
+app.include_router(rankings_router, prefix="/api", tags=["Rankings"])
 
 # Database configuration
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
@@ -73,6 +101,48 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def get_current_username(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """Username from a bearer token issued by /api/login."""
+    try:
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    username = payload.get("sub")
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return username
+
+def check_admin_config(secret_key: str, admin_token: str) -> None:
+    """Refuse to serve admin routes with a guessable JWT key or no admin token."""
+    if secret_key == DEFAULT_SECRET_KEY:
+        raise RuntimeError("IRS_ENABLE_ADMIN requires IRS_SECRET_KEY to be set to a non-default value")
+    if not admin_token:
+        raise RuntimeError("IRS_ENABLE_ADMIN requires IRS_ADMIN_TOKEN")
+
+def require_admin(
+    username: str = Depends(get_current_username),
+    x_admin_token: Optional[str] = Header(None),
+) -> str:
+    """Logged-in user who also presents the X-Admin-Token header."""
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return username
+
+def require_metrics_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> None:
+    """Bearer token matching IRS_METRICS_TOKEN; user JWTs are not accepted."""
+    if not METRICS_TOKEN or not hmac.compare_digest(credentials.credentials, METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+# Admin routes require IRS_ENABLE_ADMIN, a valid bearer token and the admin token
+if ADMIN_ENABLED:
+    check_admin_config(SECRET_KEY, ADMIN_TOKEN)
+    app.include_router(
+        admin_router,
+        prefix="/api",
+        tags=["Admin"],
+        dependencies=[Depends(require_admin)],
+    )
+
 # API endpoints
 @app.get("/")
 async def root():
@@ -98,6 +168,13 @@ async def health_check():
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
+async def metrics():
+    """Request, response-size, row-count and SQLite timing metrics in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+if METRICS_TOKEN:
+    app.add_api_route("/api/metrics", metrics, methods=["GET"], dependencies=[Depends(require_metrics_token)])
+
 @app.post("/api/register")
 async def register(user_data: UserRegister):
     try:
@@ -144,17 +221,23 @@ async def get_available_fields(dataset: str = Query("default", description="Data
     try:
         table_name = resolve_table_name(dataset)
         with engine.connect() as conn:
-            result = conn.execute(text(f'PRAGMA table_info("{table_name}")'))
-            columns = result.fetchall()
             fields = []
-            for col in columns:
-                fields.append({
-                    "name": col[1],
-                    "type": col[2],
-                    "notnull": bool(col[3]),
-                    "default": col[4],
-                    "primary_key": bool(col[5])
-                })
+            seen = set()
+            # Hot (list/filter) columns first, then the detail-only columns used by exports
+            for storage, source_table in (("hot", table_name), ("detail", detail_table_name(table_name))):
+                result = conn.execute(text(f'PRAGMA table_info("{source_table}")'))
+                for col in result.fetchall():
+                    if col[1] in seen:
+                        continue
+                    seen.add(col[1])
+                    fields.append({
+                        "name": col[1],
+                        "type": col[2],
+                        "notnull": bool(col[3]),
+                        "default": col[4],
+                        "primary_key": bool(col[5]),
+                        "storage": storage
+                    })
             return {"dataset": dataset, "table": table_name, "fields": fields, "count": len(fields)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get field information: {str(e)}")
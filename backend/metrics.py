@@ -0,0 +1,183 @@
+"""
+In-process request and query metrics, rendered in the Prometheus text format.
+
+MetricsMiddleware times every request and records status, response bytes
+and the number of database rows the request fetched (collected by the
+instrumented connections in db_instrumentation.py through a per-request
+context variable). GET /api/metrics returns render_metrics(); main.py only
+registers it when IRS_METRICS_TOKEN is set, and a scrape must send that
+token as its bearer token.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else format_value(bound)
+                    bucket_labels = format_labels(self.label_names + ("le",), labels + (le,))
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {format_value(total)}")
+                lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+HTTP_REQUESTS = Counter("irs_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+HTTP_LATENCY = Histogram(
+    "irs_http_request_duration_seconds", "HTTP request latency.", ["method", "route"], LATENCY_BUCKETS
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "irs_http_response_size_bytes", "HTTP response body size.", ["method", "route"], SIZE_BUCKETS
+)
+HTTP_ROWS = Histogram(
+    "irs_http_request_db_rows", "Database rows fetched while serving a request.", ["method", "route"], ROW_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "irs_db_query_duration_seconds", "SQLite statement time including fetches.", ["statement"], LATENCY_BUCKETS
+)
+DB_ROWS = Counter("irs_db_rows_fetched_total", "Rows fetched from SQLite.", ["statement"])
+REGISTRY = [HTTP_REQUESTS, HTTP_LATENCY, HTTP_RESPONSE_BYTES, HTTP_ROWS, DB_QUERY_LATENCY, DB_ROWS]
+
+# Per-request accumulator for database work; None outside a request
+request_db_stats: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_db_stats", default=None)
+
+
+def statement_type(sql: str) -> str:
+    words = sql.lstrip().split(None, 1)
+    keyword = words[0].upper() if words else ""
+    # Keep the label set small: CTEs are reads, everything unusual is "OTHER"
+    if keyword == "WITH":
+        return "SELECT"
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "PRAGMA", "EXPLAIN") else "OTHER"
+
+
+def observe_query(sql: str, duration: float, rows: int) -> None:
+    statement = statement_type(sql)
+    DB_QUERY_LATENCY.observe((statement,), duration)
+    if rows:
+        DB_ROWS.inc((statement,), rows)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["rows"] += rows
+        stats["seconds"] += duration
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def route_template(scope: dict) -> str:
+    """Route path pattern (e.g. /api/organizations/{ein}) so label values stay bounded."""
+    # Imported here so the pipelines can use instrumented connections without starlette
+    from starlette.routing import Match
+
+    app = scope.get("app")
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are measured to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = {"status": 500, "bytes": 0}
+        stats = {"queries": 0, "rows": 0, "seconds": 0.0}
+        token = request_db_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_db_stats.reset(token)
+            method = scope.get("method", "")
+            route = route_template(scope)
+            HTTP_REQUESTS.inc((method, route, str(state["status"])))
+            HTTP_LATENCY.observe((method, route), time.perf_counter() - start)
+            HTTP_RESPONSE_BYTES.observe((method, route), state["bytes"])
+            HTTP_ROWS.observe((method, route), stats["rows"])
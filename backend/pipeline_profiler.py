@@ -0,0 +1,198 @@
+"""
+Stage timing for the import pipelines (data_pipeline.py, propublica_pipeline.py --profile).
+
+Wrap each step in profiler.stage(name, rows=...); a disabled profiler makes
+stage() a no-op, so the pipelines call it unconditionally. When enabled, each
+stage records wall time, rows and rows/second, and the peak traced memory
+inside the stage (tracemalloc, which itself slows allocation-heavy code
+noticeably, so compare profiled runs with profiled runs). A stage entered
+repeatedly (e.g. once per chunk) accumulates into one entry; stages should
+not nest. iterate() times the production of each item of an iterator, such
+as the chunks of a CSV reader. Optionally the whole run is also recorded
+with cProfile.
+
+write_report() saves the run as JSON and appends a one-line summary to
+<pipeline>_history.jsonl next to it, for tracking stages across runs.
+"""
+import cProfile
+import json
+import logging
+import os
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_DIR = os.path.join(BACKEND_DIR, "profiles")
+
+logger = logging.getLogger(__name__)
+
+
+class StageRecord:
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows: Optional[int] = None
+        self.peak_memory_bytes = 0
+
+    def add_rows(self, rows: int) -> None:
+        self.rows = (self.rows or 0) + int(rows)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "seconds": round(self.seconds, 6),
+            "calls": self.calls,
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.rows and self.seconds else None,
+            "peak_memory_bytes": self.peak_memory_bytes,
+        }
+
+
+class PipelineProfiler:
+    def __init__(self, pipeline: str, enabled: bool = False, cprofile_path: Optional[str] = None):
+        self.pipeline = pipeline
+        self.enabled = enabled
+        self.cprofile_path = cprofile_path if enabled else None
+        self.stages: Dict[str, StageRecord] = {}
+        self.meta: Dict[str, Any] = {}
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_at: Optional[datetime] = None
+        self._start = 0.0
+        self._elapsed = 0.0
+        self._peak_memory = 0
+
+    def start(self) -> "PipelineProfiler":
+        if not self.enabled:
+            return self
+        self._started_at = datetime.now()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        if not self.enabled or self._started_at is None:
+            return
+        self._elapsed = time.perf_counter() - self._start
+        if self._profile is not None:
+            self._profile.disable()
+            os.makedirs(os.path.dirname(os.path.abspath(self.cprofile_path)), exist_ok=True)
+            self._profile.dump_stats(self.cprofile_path)
+            self._profile = None
+        if tracemalloc.is_tracing():
+            self._peak_memory = max(self._peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None) -> Iterator[StageRecord]:
+        """Time a block; set rows up front or call record.add_rows() inside it."""
+        record = self.stages.get(name)
+        if record is None:
+            record = StageRecord(name)
+            if self.enabled:
+                self.stages[name] = record
+        if rows is not None:
+            record.add_rows(rows)
+        if not self.enabled:
+            yield record
+            return
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # Overall peak so far survives the per-stage reset
+            self._peak_memory = max(self._peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds += time.perf_counter() - start
+            record.calls += 1
+            if tracing:
+                record.peak_memory_bytes = max(record.peak_memory_bytes, tracemalloc.get_traced_memory()[1])
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Yield from iterable, timing each next() as stage name and counting len(item) rows."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as record:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                if hasattr(item, "__len__"):
+                    record.add_rows(len(item))
+            yield item
+
+    def report(self) -> Dict[str, Any]:
+        stages = [record.as_dict() for record in self.stages.values()]
+        peak = max([self._peak_memory] + [stage["peak_memory_bytes"] for stage in stages])
+        return {
+            "pipeline": self.pipeline,
+            "started_at": self._started_at.isoformat(timespec="seconds") if self._started_at else None,
+            "total_seconds": round(self._elapsed, 6),
+            "peak_memory_bytes": peak,
+            "stages": stages,
+            "meta": {"python": platform.python_version(), **self.meta},
+            "cprofile": self.cprofile_path,
+        }
+
+    def log_summary(self) -> None:
+        report = self.report()
+        logger.info(
+            f"Profile of {self.pipeline}: {report['total_seconds']:.3f}s, "
+            f"peak {report['peak_memory_bytes'] / 2**20:.1f} MiB"
+        )
+        for stage in report["stages"]:
+            share = stage["seconds"] / report["total_seconds"] * 100 if report["total_seconds"] else 0
+            rate = f"{stage['rows_per_second']:>12,.0f} rows/s" if stage["rows_per_second"] else " " * 19
+            logger.info(
+                f"  {stage['name']:<28} {stage['seconds']:9.3f}s {share:5.1f}%  {rate}  "
+                f"peak {stage['peak_memory_bytes'] / 2**20:8.1f} MiB"
+            )
+        if self.cprofile_path:
+            logger.info(f"  cProfile stats: {self.cprofile_path} (python -m pstats {self.cprofile_path})")
+            if logger.isEnabledFor(logging.DEBUG):
+                pstats.Stats(self.cprofile_path).sort_stats("cumulative").print_stats(15)
+
+    def write_report(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the JSON report (default profiles/<pipeline>_<timestamp>.json) and append to the history file."""
+        if not self.enabled:
+            return None
+        report = self.report()
+        if path is None:
+            stamp = (self._started_at or datetime.now()).strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(DEFAULT_PROFILE_DIR, f"{self.pipeline}_{stamp}.json")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        summary = {
+            "started_at": report["started_at"],
+            "total_seconds": report["total_seconds"],
+            "peak_memory_bytes": report["peak_memory_bytes"],
+            "stages": {stage["name"]: stage["seconds"] for stage in report["stages"]},
+            "rows": self.meta.get("rows"),
+            "report": os.path.abspath(path),
+        }
+        with open(os.path.join(directory, f"{self.pipeline}_history.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        logger.info(f"Profile report written to {path}")
+        return path
+
+    def __enter__(self) -> "PipelineProfiler":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -1,19 +1,30 @@
 import argparse
+import logging
+import sqlite3
 from pathlib import Path
+from typing import Dict, List, Optional
 
 import pandas as pd
 
-from db_utils import get_connection, get_db_path, resolve_table_name
-
-FORM_TYPE_CODE_MAP = {
-    "0": "990",
-    "0.0": "990",
-    "1": "990EO",
-    "1.0": "990EO",
-    "2": "990PF",
-    "2.0": "990PF",
-}
-
+from db_utils import (
+    DETAIL_KEY_COLUMNS,
+    bump_table_version,
+    detail_table_name,
+    ensure_index,
+    get_connection,
+    get_db_path,
+    prepare_shadow_table,
+    quote_identifier,
+    resolve_table_name,
+    split_hot_detail_columns,
+    swap_tables,
+    validate_shadow_table,
+)
+from field_normalization import normalize_form_types
+from logging_setup import configure_logging
+from pipeline_profiler import PipelineProfiler
+from sqlite_loader import analyze_tables, bulk_load_dataframe, bulk_load_pragmas, dataframe_to_records
+from summary_cube import dataset_for_table, refresh_summary_cube
 
 REQUIRED_COLUMNS = [
     "ein",
@@ -26,16 +37,20 @@ REQUIRED_COLUMNS = [
     "employees",
 ]
 
+UPSERT_KEY_COLUMNS = ["ein", "fiscal_year"]
+IMPORT_MODES = ("replace", "incremental")
+# "to_sql" is the old pandas path, kept to measure the bulk loader against (--profile)
+LOADERS = ("bulk", "to_sql")
+
+logger = logging.getLogger(__name__)
+
 
 def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     cleaned = df.copy()
     cleaned["ein"] = cleaned["ein"].astype(str).str.replace(".0", "", regex=False).str.zfill(9)
 
     if "propublica_form_type" in cleaned.columns:
-        form_type = cleaned["propublica_form_type"].where(cleaned["propublica_form_type"].notna(), "")
-        form_type = form_type.astype(str).str.strip()
-        form_type = form_type.replace({"nan": "", "None": ""}).replace(FORM_TYPE_CODE_MAP)
-        cleaned["propublica_form_type"] = form_type.astype("string")
+        cleaned["propublica_form_type"] = normalize_form_types(cleaned["propublica_form_type"]).astype("string")
 
     integer_columns = ["fiscal_year", "fiscal_month", "propublica_filing_count"]
     float_columns = [
@@ -60,31 +75,287 @@ def normalize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return cleaned
 
 
-def import_propublica_snapshot(csv_path: Path, dataset: str = "propublica") -> None:
+def sqlite_column_type(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def create_table_indexes(conn: sqlite3.Connection, table_name: str) -> None:
+    ensure_index(conn, table_name, f"idx_{table_name}_ein", ["ein"])
+    ensure_index(conn, table_name, f"idx_{table_name}_fiscal_year_month", ["fiscal_year", "fiscal_month"])
+    ensure_index(conn, table_name, f"idx_{table_name}_state_city", ["st", "city"])
+    # Leaderboards walk these backwards instead of sorting the whole scope
+    ensure_index(conn, table_name, f"idx_{table_name}_fiscal_year_revenue", ["fiscal_year", "part_i_summary_12_total_revenue_cy"])
+    ensure_index(conn, table_name, f"idx_{table_name}_fiscal_year_employees", ["fiscal_year", "employees"])
+
+
+def ensure_upsert_table(
+    conn: sqlite3.Connection,
+    table_name: str,
+    df: pd.DataFrame,
+    secondary_indexes: bool = True,
+) -> None:
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name = ?", (table_name,))
+    if cursor.fetchone() is None:
+        column_defs = ", ".join(f"{quote_identifier(column)} {sqlite_column_type(df[column])}" for column in df.columns)
+        cursor.execute(f"CREATE TABLE {quote_identifier(table_name)} ({column_defs})")
+    else:
+        cursor.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        for column in df.columns:
+            if column not in existing_columns:
+                cursor.execute(
+                    f"ALTER TABLE {quote_identifier(table_name)} ADD COLUMN {quote_identifier(column)} {sqlite_column_type(df[column])}"
+                )
+
+    if secondary_indexes:
+        create_table_indexes(conn, table_name)
+    try:
+        ensure_index(conn, table_name, f"idx_{table_name}_ein_fiscal_year", ["ein", "fiscal_year"], unique=True)
+    except sqlite3.IntegrityError as exc:
+        raise ValueError(
+            f"Table '{table_name}' has duplicate (ein, fiscal_year) rows; run a full import before upserting"
+        ) from exc
+
+
+def stage_dataframe(conn: sqlite3.Connection, df: pd.DataFrame, staging_name: str = "propublica_import_staging") -> str:
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{quote_identifier(staging_name)}")
+    column_defs = ", ".join(f"{quote_identifier(column)} {sqlite_column_type(df[column])}" for column in df.columns)
+    cursor.execute(f"CREATE TEMP TABLE {quote_identifier(staging_name)} ({column_defs})")
+    placeholders = ", ".join("?" for _ in df.columns)
+    cursor.executemany(
+        f"INSERT INTO temp.{quote_identifier(staging_name)} VALUES ({placeholders})",
+        dataframe_to_records(df),
+    )
+    return staging_name
+
+
+def merge_staged_rows(
+    conn: sqlite3.Connection,
+    table_name: str,
+    staging_name: str,
+    columns: List[str],
+    detail_columns: Optional[List[str]] = None,
+) -> Dict[str, int]:
+    """
+    MERGE the staging table into the hot table (and its detail table) and report what changed.
+
+    Rows are matched on ein + fiscal_year using IS so that an EIN's
+    placeholder row (fiscal_year NULL) matches its previous placeholder.
+    Placeholders cannot hit the unique index, so they are replaced outright.
+    A row counts as updated if any hot or detail value differs. Staged rows
+    repeating an (ein, fiscal_year) key collapse to the last one first, and
+    removed_placeholders counts live placeholders dropped because their EIN
+    now has dated filings only.
+    """
+    staging = f"temp.{quote_identifier(staging_name)}"
+    targets = [("live", table_name, columns)]
+    if detail_columns and len(detail_columns) > len(DETAIL_KEY_COLUMNS):
+        targets.append(("detail", detail_table_name(table_name), detail_columns))
+
+    joins = []
+    changed_conditions = []
+    for position, (alias, target_name, target_columns) in enumerate(targets):
+        join_type = "JOIN" if position == 0 else "LEFT JOIN"
+        joins.append(
+            f"{join_type} {quote_identifier(target_name)} AS {alias} "
+            f"ON {alias}.ein = staged.ein AND {alias}.fiscal_year IS staged.fiscal_year"
+        )
+        changed_conditions.extend(
+            f"{alias}.{quote_identifier(column)} IS NOT staged.{quote_identifier(column)}"
+            for column in target_columns
+            if column not in UPSERT_KEY_COLUMNS
+        )
+    changed_condition = " OR ".join(changed_conditions) or "0"
+
+    cursor = conn.cursor()
+    # Last row wins, as it would through ON CONFLICT; GROUP BY treats NULL years as one key
+    cursor.execute(
+        f"DELETE FROM {staging} WHERE rowid NOT IN "
+        f"(SELECT MAX(rowid) FROM {staging} GROUP BY ein, fiscal_year)"
+    )
+    cursor.execute(
+        f"""
+        SELECT COUNT(*) FROM {quote_identifier(table_name)}
+        WHERE fiscal_year IS NULL
+          AND ein IN (SELECT ein FROM {staging})
+          AND ein NOT IN (SELECT ein FROM {staging} WHERE fiscal_year IS NULL)
+        """
+    )
+    removed_placeholders = cursor.fetchone()[0]
+    cursor.execute(
+        f"""
+        SELECT
+            COUNT(*),
+            COUNT(matched.ein),
+            COALESCE(SUM(matched.changed), 0)
+        FROM {staging} AS staged
+        LEFT JOIN (
+            SELECT staged.rowid AS staged_rowid, staged.ein AS ein, MAX({changed_condition}) AS changed
+            FROM {staging} AS staged
+            {" ".join(joins)}
+            GROUP BY staged.rowid
+        ) AS matched ON matched.staged_rowid = staged.rowid
+        """
+    )
+    total, matched, updated = cursor.fetchone()
+
+    for _, target_name, target_columns in targets:
+        write_staged_rows(conn, target_name, staging, target_columns)
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+
+    return {
+        "inserted": total - matched,
+        "updated": updated,
+        "unchanged": matched - updated,
+        "removed_placeholders": removed_placeholders,
+    }
+
+
+def write_staged_rows(conn: sqlite3.Connection, table_name: str, staging: str, columns: List[str]) -> None:
+    live = quote_identifier(table_name)
+    value_columns = [column for column in columns if column not in UPSERT_KEY_COLUMNS]
+    column_list = ", ".join(quote_identifier(column) for column in columns)
+    update_clause = ", ".join(
+        f"{quote_identifier(column)} = excluded.{quote_identifier(column)}" for column in value_columns
+    )
+    update_filter = " OR ".join(
+        f"{live}.{quote_identifier(column)} IS NOT excluded.{quote_identifier(column)}" for column in value_columns
+    )
+    cursor = conn.cursor()
+    cursor.execute(
+        f"DELETE FROM {live} WHERE fiscal_year IS NULL AND ein IN (SELECT ein FROM {staging})"
+    )
+    conflict_action = "DO NOTHING"
+    if update_clause:
+        conflict_action = f"DO UPDATE SET {update_clause} WHERE {update_filter}"
+    cursor.execute(
+        f"INSERT INTO {live} ({column_list}) SELECT {column_list} FROM {staging} WHERE true "
+        f"ON CONFLICT(ein, fiscal_year) {conflict_action}"
+    )
+
+
+def upsert_backend_rows(conn: sqlite3.Connection, table_name: str, df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Insert or update normalized backend rows keyed on (ein, fiscal_year).
+
+    Hot columns go to table_name and the rest to its detail table.
+    Everything, including the dataset version bump, runs in one transaction;
+    the caller commits (``with conn``).
+    """
+    if df.empty:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "removed_placeholders": 0}
+    missing_columns = [column for column in UPSERT_KEY_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Upsert rows are missing key columns: {', '.join(missing_columns)}")
+
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    hot_columns, detail_columns = split_hot_detail_columns(df.columns)
+    ensure_upsert_table(conn, table_name, df[hot_columns])
+    ensure_upsert_table(conn, detail_table_name(table_name), df[detail_columns], secondary_indexes=False)
+    staging_name = stage_dataframe(conn, df)
+    counts = merge_staged_rows(conn, table_name, staging_name, hot_columns, detail_columns)
+    if counts["inserted"] or counts["updated"] or counts["removed_placeholders"]:
+        bump_table_version(conn, table_name)
+        bump_table_version(conn, detail_table_name(table_name))
+        dataset = dataset_for_table(table_name)
+        if dataset is not None:
+            # Rows never change fiscal_year (it is part of the key), so only these years' cells can move
+            refresh_summary_cube(conn, dataset, df["fiscal_year"].unique())
+    return counts
+
+
+def import_propublica_snapshot(
+    csv_path: Path,
+    dataset: str = "propublica",
+    mode: str = "replace",
+    profiler: Optional[PipelineProfiler] = None,
+    loader: str = "bulk",
+) -> None:
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unsupported import mode '{mode}'. Valid modes: {', '.join(IMPORT_MODES)}")
+    if loader not in LOADERS:
+        raise ValueError(f"Unsupported loader '{loader}'. Valid loaders: {', '.join(LOADERS)}")
+
+    profiler = profiler or PipelineProfiler("propublica_pipeline")
     table_name = resolve_table_name(dataset)
-    df = pd.read_csv(csv_path, dtype={"ein": str})
+    with profiler.stage("read_csv") as stage:
+        df = pd.read_csv(csv_path, dtype={"ein": str})
+        stage.add_rows(len(df))
 
     missing_columns = [column for column in REQUIRED_COLUMNS if column not in df.columns]
     if missing_columns:
         missing = ", ".join(missing_columns)
         raise ValueError(f"Snapshot is missing required columns: {missing}")
 
-    cleaned_df = normalize_dataframe(df)
+    with profiler.stage("normalize", rows=len(df)):
+        cleaned_df = normalize_dataframe(df)
+    profiler.meta["rows"] = len(cleaned_df)
 
+    counts = None
     with get_connection() as conn:
-        cleaned_df.to_sql(table_name, conn, if_exists="replace", index=False)
-        cursor = conn.cursor()
-        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table_name}_ein ON "{table_name}" (ein)')
-        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table_name}_fiscal_year_month ON "{table_name}" (fiscal_year, fiscal_month)')
-        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table_name}_state_city ON "{table_name}" (st, city)')
+        if mode == "incremental":
+            with profiler.stage("merge_rows", rows=len(cleaned_df)):
+                counts = upsert_backend_rows(conn, table_name, cleaned_df)
+        else:
+            hot_columns, detail_columns = split_hot_detail_columns(cleaned_df.columns)
+            detail_name = detail_table_name(table_name)
+            shadow_name = prepare_shadow_table(conn, table_name)
+            detail_shadow_name = prepare_shadow_table(conn, detail_name)
+            if loader == "to_sql":
+                with profiler.stage("insert_rows", rows=len(cleaned_df)):
+                    cleaned_df[hot_columns].to_sql(shadow_name, conn, index=False)
+                    cleaned_df[detail_columns].to_sql(detail_shadow_name, conn, index=False)
+            else:
+                column_types = {column: sqlite_column_type(cleaned_df[column]) for column in cleaned_df.columns}
+                with profiler.stage("insert_rows", rows=len(cleaned_df)), bulk_load_pragmas(conn):
+                    bulk_load_dataframe(conn, shadow_name, cleaned_df[hot_columns], column_types)
+                    bulk_load_dataframe(conn, detail_shadow_name, cleaned_df[detail_columns], column_types)
+            with profiler.stage("create_indexes", rows=len(cleaned_df)), bulk_load_pragmas(conn):
+                create_table_indexes(conn, shadow_name)
+                try:
+                    # Unique when possible so later incremental imports reuse it as the upsert key
+                    ensure_index(conn, shadow_name, f"idx_{shadow_name}_ein_fiscal_year", UPSERT_KEY_COLUMNS, unique=True)
+                except sqlite3.IntegrityError:
+                    ensure_index(conn, shadow_name, f"idx_{shadow_name}_ein_fiscal_year", UPSERT_KEY_COLUMNS)
+                ensure_index(conn, detail_shadow_name, f"idx_{detail_shadow_name}_ein_fiscal_year", DETAIL_KEY_COLUMNS)
+            with profiler.stage("validate", rows=len(cleaned_df)):
+                row_count = validate_shadow_table(conn, shadow_name, REQUIRED_COLUMNS, min_rows=max(1, len(cleaned_df)))
+                validate_shadow_table(conn, detail_shadow_name, DETAIL_KEY_COLUMNS, min_rows=row_count)
+            # The cube is rebuilt inside the swap transaction, so the new version never
+            # serves the old cube; its time counts toward the swap_tables stage.
+            with profiler.stage("swap_tables", rows=row_count):
+                swap_tables(
+                    conn,
+                    {table_name: shadow_name, detail_name: detail_shadow_name},
+                    before_commit=lambda swap_conn: refresh_summary_cube(swap_conn, dataset),
+                )
+            with profiler.stage("analyze", rows=row_count):
+                analyze_tables(conn, [table_name, detail_name])
         conn.commit()
 
-    print("=== ProPublica Backend Import Complete ===")
-    print(f"CSV: {csv_path}")
-    print(f"Database: {get_db_path()}")
-    print(f"Imported table: {table_name}")
-    print(f"Rows: {len(cleaned_df)}")
-    print(f"Columns: {len(cleaned_df.columns)}")
+    logger.info("=== ProPublica Backend Import Complete ===")
+    logger.info(f"CSV: {csv_path}")
+    logger.info(f"Database: {get_db_path()}")
+    logger.info(f"Imported table: {table_name}")
+    logger.info(f"Mode: {mode}")
+    if mode == "replace":
+        logger.info(f"Loader: {loader}")
+    logger.info(f"Rows: {len(cleaned_df)}")
+    logger.info(f"Columns: {len(cleaned_df.columns)}")
+    if counts is not None:
+        logger.info(f"Inserted: {counts['inserted']}")
+        logger.info(f"Updated: {counts['updated']}")
+        logger.info(f"Unchanged: {counts['unchanged']}")
+        logger.info(f"Removed placeholders: {counts['removed_placeholders']}")
 
 
 def main() -> None:
@@ -99,9 +370,39 @@ def main() -> None:
         default="propublica",
         help="Target dataset key. Defaults to 'propublica'.",
     )
+    parser.add_argument(
+        "--mode",
+        choices=IMPORT_MODES,
+        default="replace",
+        help="'replace' rebuilds the table; 'incremental' merges rows on ein + fiscal_year in one transaction.",
+    )
+    parser.add_argument(
+        "--loader",
+        choices=LOADERS,
+        default="bulk",
+        help="Replace-mode writer: 'bulk' (explicit tables, executemany, relaxed pragmas) or pandas 'to_sql'.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each stage, record rows/second and peak memory (tracemalloc) and write a JSON report.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="Report path. Defaults to backend/profiles/propublica_pipeline_<timestamp>.json.",
+    )
+    parser.add_argument("--cprofile", help="With --profile, also dump cProfile stats for the whole run here.")
+    parser.add_argument("--log-level", default="INFO", help="Logging level (DEBUG, INFO, WARNING, ...).")
     args = parser.parse_args()
+    configure_logging(level=args.log_level, log_format="text")
 
-    import_propublica_snapshot(Path(args.csv), args.dataset)
+    profiler = PipelineProfiler("propublica_pipeline", enabled=args.profile, cprofile_path=args.cprofile)
+    profiler.meta.update({"csv": args.csv, "dataset": args.dataset, "mode": args.mode, "loader": args.loader})
+    with profiler:
+        import_propublica_snapshot(Path(args.csv), args.dataset, args.mode, profiler, args.loader)
+    if args.profile:
+        profiler.log_summary()
+        profiler.write_report(args.profile_output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+"""
+Mergeable quantile sketches for revenue and employee distributions.
+
+Each (dataset, fiscal_year, st, metric) cell stores a small log-bucketed
+sketch (DDSketch-style: every value falls in bucket ceil(log_gamma(|v|)),
+so any quantile estimate is within relative_accuracy of a true value).
+Sketches merge by adding bucket counts, which lets the API answer
+percentiles and histograms for any slice by combining a handful of rows,
+independent of how many filings the slice covers.
+"""
+import json
+import math
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from db_utils import ensure_index, fiscal_year_condition, get_connection, table_exists
+
+
+SKETCH_TABLE = "quantile_sketches"
+SKETCH_METRICS = {
+    "revenue": "revenue",
+    "employees": "employees",
+}
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _bucket_value(self, key: int) -> float:
+        # Midpoint (in relative terms) of (gamma^(key-1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add_many(self, values: Iterable[float]) -> "QuantileSketch":
+        array = np.asarray(pd.to_numeric(pd.Series(values, dtype=object), errors="coerce"), dtype=float)
+        array = array[np.isfinite(array)]
+        if array.size == 0:
+            return self
+
+        for store, selected in ((self.positive, array[array > 0]), (self.negative, -array[array < 0])):
+            if selected.size:
+                keys, counts = np.unique(np.ceil(np.log(selected) / self._log_gamma).astype(np.int64), return_counts=True)
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    store[key] = store.get(key, 0) + count
+        self.zero_count += int((array == 0).sum())
+        self.count += int(array.size)
+        self.total += float(array.sum())
+        low, high = float(array.min()), float(array.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        for attr, pick in (("min", min), ("max", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        return self
+
+    def _ordered_buckets(self):
+        """(representative value, count) from smallest to largest value."""
+        for key in sorted(self.negative, reverse=True):
+            yield -self._bucket_value(key), self.negative[key]
+        if self.zero_count:
+            yield 0.0, self.zero_count
+        for key in sorted(self.positive):
+            yield self._bucket_value(key), self.positive[key]
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        value = self.max
+        for value, count in self._ordered_buckets():
+            seen += count
+            if seen > rank:
+                break
+        return min(max(value, self.min), self.max)
+
+    def histogram(self, bins: int = 10) -> List[Dict[str, Any]]:
+        """Equal-width histogram over [min, max], each bucket counted at its representative value."""
+        if self.count == 0 or bins < 1:
+            return []
+        low, high = self.min, self.max
+        width = (high - low) / bins if high > low else 1.0
+        counts = [0] * bins
+        for value, count in self._ordered_buckets():
+            index = int((min(max(value, low), high) - low) / width) if high > low else 0
+            counts[min(index, bins - 1)] += count
+        return [
+            {"lower": low + i * width, "upper": low + (i + 1) * width if high > low else high, "count": counts[i]}
+            for i in range(bins)
+        ]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "relative_accuracy": self.relative_accuracy,
+                "positive": [[key, count] for key, count in sorted(self.positive.items())],
+                "negative": [[key, count] for key, count in sorted(self.negative.items())],
+                "zero_count": self.zero_count,
+                "count": self.count,
+                "sum": self.total,
+                "min": self.min,
+                "max": self.max,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "QuantileSketch":
+        data = json.loads(payload)
+        sketch = cls(data["relative_accuracy"])
+        sketch.positive = {int(key): int(count) for key, count in data["positive"]}
+        sketch.negative = {int(key): int(count) for key, count in data["negative"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.total = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+def ensure_sketch_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SKETCH_TABLE} (
+            dataset TEXT NOT NULL,
+            fiscal_year INTEGER,
+            st TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            value_count INTEGER NOT NULL,
+            sketch TEXT NOT NULL
+        )
+        """
+    )
+    ensure_index(conn, SKETCH_TABLE, f"idx_{SKETCH_TABLE}_cell", ["dataset", "metric", "fiscal_year", "st"])
+
+
+def refresh_sketches(
+    conn: sqlite3.Connection,
+    dataset: str,
+    source: pd.DataFrame,
+    fiscal_years: Optional[List[Any]] = None,
+) -> int:
+    """
+    Rebuild sketches for the given years from an already-loaded source frame
+    (columns fiscal_year, st, revenue, employees). The caller commits.
+    """
+    ensure_sketch_table(conn)
+    condition, params = fiscal_year_condition(fiscal_years)
+    conn.execute(f"DELETE FROM {SKETCH_TABLE} WHERE dataset = ? AND {condition}", [dataset] + params)
+
+    rows = []
+    for (fiscal_year, st), cell in source.groupby(["fiscal_year", "st"], dropna=False):
+        for metric, column in SKETCH_METRICS.items():
+            sketch = QuantileSketch().add_many(cell[column])
+            if sketch.count:
+                year = None if pd.isna(fiscal_year) else int(fiscal_year)
+                rows.append((dataset, year, st, metric, sketch.count, sketch.to_json()))
+    conn.executemany(
+        f"INSERT INTO {SKETCH_TABLE} (dataset, fiscal_year, st, metric, value_count, sketch) VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    return len(rows)
+
+
+def load_merged_sketch(
+    dataset: str,
+    metric: str,
+    fiscal_years: Optional[List[int]] = None,
+    states: Optional[List[str]] = None,
+) -> QuantileSketch:
+    if metric not in SKETCH_METRICS:
+        raise ValueError(f"Unsupported metric '{metric}'. Valid metrics: {', '.join(SKETCH_METRICS)}")
+    conditions = ["dataset = ?", "metric = ?"]
+    params: List[Any] = [dataset, metric]
+    if fiscal_years:
+        condition, year_params = fiscal_year_condition(fiscal_years)
+        conditions.append(condition)
+        params.extend(year_params)
+    if states:
+        conditions.append(f"st IN ({', '.join('?' for _ in states)})")
+        params.extend(states)
+
+    merged = QuantileSketch()
+    if not table_exists(SKETCH_TABLE):
+        return merged
+    with get_connection() as conn:
+        cursor = conn.execute(f"SELECT sketch FROM {SKETCH_TABLE} WHERE {' AND '.join(conditions)}", params)
+        for (payload,) in cursor.fetchall():
+            merged.merge(QuantileSketch.from_json(payload))
+    return merged
@@ -0,0 +1,128 @@
+"""
+nonprofits 表的列类型推断与值转换。
+
+CSV 以字符串读入，根据抽样数据为每个语义列决定 INTEGER / REAL / TEXT，
+建表时显式声明类型，导入时按该类型转换，并统计无法转换的值。
+"""
+import logging
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+DEFAULT_SAMPLE_ROWS = 10000
+# 抽样中至少这么大比例的非空值能解析为数字，才把该列视为数值列；
+# 其余少量脏值（如 "N/A"）在导入时置为 NULL 并计入转换失败
+NUMERIC_THRESHOLD = 0.95
+# 标识类列即使全是数字也必须保留为文本（例如前导零）
+TEXT_COLUMNS = {'ein', 'zip'}
+FIXED_COLUMN_TYPES = {'fiscal_year': 'INTEGER', 'fiscal_month': 'INTEGER'}
+# 数值列中这些标记视为缺失；文本列里 "NA"、"None"、"-" 可能是真实取值，只把空串和 nan 视为缺失
+BLANK_VALUES = {'', 'nan', 'none', 'null', 'n/a', 'na', '-'}
+TEXT_BLANK_VALUES = {'', 'nan'}
+
+logger = logging.getLogger(__name__)
+
+
+def _clean_text(series: pd.Series, blank_values=BLANK_VALUES) -> pd.Series:
+    """统一为去空白的字符串，空白和 blank_values 中的缺失标记变为 NA"""
+    text = series.astype('string').str.strip()
+    return text.mask(text.str.lower().isin(blank_values))
+
+
+def _numeric_candidates(text: pd.Series) -> pd.Series:
+    """去掉千分位逗号和货币符号，括号负数 (123) 转为 -123"""
+    cleaned = text.str.replace(r'[,$\s]', '', regex=True)
+    return cleaned.str.replace(r'^\((.*)\)$', r'-\1', regex=True)
+
+
+def infer_column_type(series: pd.Series) -> str:
+    """根据一列抽样数据推断 SQLite 类型"""
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+
+    text = _clean_text(series).dropna()
+    if text.empty:
+        return 'TEXT'
+    # 带前导零的纯数字（邮编、编号）按文本保存
+    if text.str.fullmatch(r'0\d+').any():
+        return 'TEXT'
+
+    numeric = pd.to_numeric(_numeric_candidates(text), errors='coerce')
+    parsed = numeric.notna()
+    if parsed.mean() < NUMERIC_THRESHOLD:
+        return 'TEXT'
+    values = numeric[parsed]
+    if (values == values.round()).all() and not text[parsed].str.contains(r'[.eE]', regex=True).any():
+        return 'INTEGER'
+    return 'REAL'
+
+
+def infer_schema(sample: pd.DataFrame) -> Dict[str, str]:
+    """为样本中的每一列推断类型，返回 {列名: SQLite 类型}"""
+    column_types = {}
+    for column in sample.columns:
+        if column in FIXED_COLUMN_TYPES:
+            column_types[column] = FIXED_COLUMN_TYPES[column]
+        elif column in TEXT_COLUMNS:
+            column_types[column] = 'TEXT'
+        else:
+            column_types[column] = infer_column_type(sample[column])
+    return column_types
+
+
+def coerce_dataframe(df: pd.DataFrame, column_types: Dict[str, str], failures: Optional[Dict[str, List]] = None):
+    """
+    按推断出的类型转换整张表（或一个数据块）。
+    无法转换为数字的非空值置为 NULL，并按列累计到 failures: {列名: [失败次数, 示例值列表]}。
+    """
+    failures = {} if failures is None else failures
+    df = df.copy()
+    for column, column_type in column_types.items():
+        if column not in df.columns or column in FIXED_COLUMN_TYPES:
+            continue
+        series = df[column]
+        if column_type == 'TEXT':
+            df[column] = _clean_text(series, TEXT_BLANK_VALUES).astype(object).where(lambda s: s.notna(), None)
+            continue
+        if pd.api.types.is_numeric_dtype(series):
+            numeric = pd.to_numeric(series, errors='coerce')
+        else:
+            text = _clean_text(series)
+            numeric = pd.to_numeric(_numeric_candidates(text), errors='coerce')
+            failed = text.notna() & numeric.isna()
+            if failed.any():
+                entry = failures.setdefault(column, [0, []])
+                entry[0] += int(failed.sum())
+                for value in text[failed].unique()[:5]:
+                    if len(entry[1]) < 5 and value not in entry[1]:
+                        entry[1].append(value)
+        if column_type == 'INTEGER' and (numeric.dropna() == numeric.dropna().round()).all():
+            df[column] = numeric.astype('Int64')
+        else:
+            # INTEGER 列中偶尔出现的小数保留原值（SQLite 会按 REAL 存储），不丢数据
+            df[column] = numeric.astype('Float64')
+    return df, failures
+
+
+def report_schema(column_types: Dict[str, str]):
+    """打印类型推断结果"""
+    counts = {}
+    for column_type in column_types.values():
+        counts[column_type] = counts.get(column_type, 0) + 1
+    summary = ', '.join(f"{column_type} {count}" for column_type, count in sorted(counts.items()))
+    logger.info(f"  > 列类型推断结果: {summary}")
+    for column, column_type in column_types.items():
+        logger.debug(f"    {column}: {column_type}")
+
+
+def report_coercion_failures(failures: Dict[str, List]):
+    """打印转换失败统计"""
+    if not failures:
+        logger.info("  > 类型转换: 无失败值")
+        return
+    logger.info(f"  > 类型转换失败（已置为 NULL）: {len(failures)} 列")
+    for column, (count, examples) in sorted(failures.items(), key=lambda item: -item[1][0]):
+        logger.debug(f"    {column}: {count} 个值，例如 {examples}")
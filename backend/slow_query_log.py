@@ -0,0 +1,99 @@
+"""
+Ring buffer of statements slower than a configurable threshold.
+
+db_instrumentation reports every finished statement here; anything at or
+over the threshold is kept with its SQL, parameter shapes (never values),
+duration, rows returned, SQLite VM steps and EXPLAIN QUERY PLAN output.
+Browse it through GET /api/admin/slow-queries (registered only when
+IRS_ENABLE_ADMIN is set, behind a bearer token from /api/login plus the
+IRS_ADMIN_TOKEN value in an X-Admin-Token header).
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+
+DEFAULT_THRESHOLD_MS = float(os.environ.get("IRS_SLOW_QUERY_MS", "200"))
+DEFAULT_CAPACITY = int(os.environ.get("IRS_SLOW_QUERY_CAPACITY", "200"))
+
+
+def parameter_shape(parameters: Any) -> Dict[str, Any]:
+    """Count and types of the bound parameters, e.g. {"count": 3, "types": ["int", "str", "str"]}."""
+    if parameters is None:
+        return {"count": 0, "types": []}
+    if isinstance(parameters, dict):
+        return {"count": len(parameters), "types": {name: type(value).__name__ for name, value in parameters.items()}}
+    values = list(parameters)
+    return {"count": len(values), "types": [type(value).__name__ for value in values]}
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = DEFAULT_THRESHOLD_MS, capacity: int = DEFAULT_CAPACITY):
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._recorded = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._entries.maxlen
+
+    def is_slow(self, duration: float) -> bool:
+        return self.threshold_ms >= 0 and duration * 1000 >= self.threshold_ms
+
+    def record(
+        self,
+        sql: str,
+        parameters: Any,
+        duration: float,
+        rows: int,
+        vm_steps: Optional[int],
+        plan: Optional[Sequence[str]],
+    ) -> None:
+        entry = {
+            "recorded_at": time.time(),
+            "sql": " ".join(sql.split()),
+            "parameters": parameter_shape(parameters),
+            "duration_ms": round(duration * 1000, 3),
+            "rows_returned": rows,
+            "vm_steps": vm_steps,
+            "plan": list(plan) if plan is not None else None,
+            # SCAN without USING ... INDEX reads every row of that table
+            "full_scan": any(step.strip().startswith("SCAN") and "USING" not in step for step in plan) if plan else None,
+        }
+        with self._lock:
+            self._recorded += 1
+            entry["id"] = self._recorded
+            self._entries.append(entry)
+
+    def entries(self, limit: int = 50, min_ms: float = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            selected = [entry for entry in self._entries if entry["duration_ms"] >= min_ms]
+        return list(reversed(selected))[:limit]
+
+    def configure(self, threshold_ms: Optional[float] = None, capacity: Optional[int] = None) -> None:
+        with self._lock:
+            if threshold_ms is not None:
+                self.threshold_ms = threshold_ms
+            if capacity is not None and capacity != self._entries.maxlen:
+                self._entries = deque(self._entries, maxlen=capacity)
+
+    def clear(self) -> int:
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+        return cleared
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "capacity": self._entries.maxlen,
+                "buffered": len(self._entries),
+                "recorded_total": self._recorded,
+            }
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,139 @@
+import logging
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from db_utils import quote_identifier
+
+
+DEFAULT_BATCH_ROWS = 50_000
+
+# Applied while shadow tables are filled and indexed. Only durability is
+# relaxed: synchronous=OFF skips the fsyncs, while the rollback journal stays
+# on disk (or the WAL, if the database already uses it). If the importing
+# process dies mid-load (exception, kill -9, OOM), the next connection rolls
+# the hot journal back and the database, including users and the live tables,
+# is intact. An OS crash or power cut during the load can still corrupt the
+# whole irs.db file, so take a copy first when that risk matters.
+# temp_store and cache_size only keep sort/index work in memory; pages that do
+# spill to the database file are journaled like any other write.
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def column_values(series: pd.Series) -> np.ndarray:
+    """Object array of Python values sqlite3 can bind; missing values become None."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # str() per distinct timestamp rather than per row; code -1 (NaT) picks the trailing None
+        codes, uniques = pd.factorize(series)
+        labels = np.array([str(value) for value in uniques] + [None], dtype=object)
+        return labels[codes]
+    values = series.to_numpy(dtype=object, copy=True)
+    missing = series.isna().to_numpy()
+    if missing.any():
+        values[missing] = None
+    return values
+
+
+def dataframe_to_records(df: pd.DataFrame) -> List[Tuple[Any, ...]]:
+    """Convert a DataFrame into plain Python tuples that sqlite3 can bind (NaN/NA/NaT -> None)."""
+    return list(zip(*(column_values(df.iloc[:, position]) for position in range(df.shape[1]))))
+
+
+def create_table(
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: List[str],
+    column_types: Optional[Dict[str, str]] = None,
+) -> None:
+    column_types = column_types or {}
+    column_defs = ", ".join(
+        f"{quote_identifier(column)} {column_types.get(column, '')}".rstrip() for column in columns
+    )
+    conn.execute(f"CREATE TABLE {quote_identifier(table_name)} ({column_defs})")
+
+
+def insert_dataframe(
+    conn: sqlite3.Connection,
+    table_name: str,
+    df: pd.DataFrame,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> int:
+    """
+    executemany the frame into an existing table; the caller owns the transaction.
+
+    Rows are converted batch_rows at a time so a large frame never exists twice
+    in memory as Python tuples.
+    """
+    if df.empty:
+        return 0
+    column_list = ", ".join(quote_identifier(column) for column in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    sql = f"INSERT INTO {quote_identifier(table_name)} ({column_list}) VALUES ({placeholders})"
+    for start in range(0, len(df), batch_rows):
+        conn.executemany(sql, dataframe_to_records(df.iloc[start:start + batch_rows]))
+    return len(df)
+
+
+@contextmanager
+def bulk_load_pragmas(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Relax durability (BULK_LOAD_PRAGMAS) for a bulk load and restore the previous settings.
+
+    Commits on success and rolls back on error before restoring, so the
+    previous settings apply again outside the load transaction. The journal
+    mode is left alone, so an interrupted load is always recoverable.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    previous = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS}
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        for name, value in previous.items():
+            try:
+                conn.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.Error as exc:
+                logger.warning(f"Could not restore PRAGMA {name} = {value}: {exc}")
+
+
+def bulk_load_dataframe(
+    conn: sqlite3.Connection,
+    table_name: str,
+    df: pd.DataFrame,
+    column_types: Optional[Dict[str, str]] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> int:
+    """Create table_name with explicit column types and fill it in one transaction (no indexes)."""
+    # BEGIN first: sqlite3 would otherwise autocommit the CREATE TABLE, leaving
+    # an empty table behind when the load is interrupted
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    create_table(conn, table_name, list(df.columns), column_types)
+    return insert_dataframe(conn, table_name, df, batch_rows)
+
+
+def analyze_tables(conn: sqlite3.Connection, table_names: Iterable[str]) -> None:
+    """
+    Refresh planner statistics (sqlite_stat1) for freshly loaded tables.
+
+    Run it on the live names after a swap: SQLite keeps statistics under the
+    table name they were gathered for and RENAME does not carry them over.
+    """
+    for table_name in table_names:
+        conn.execute(f"ANALYZE {quote_identifier(table_name)}")
+    conn.commit()
@@ -0,0 +1,311 @@
+"""
+Pre-aggregated statistics per dataset x fiscal_year x st x form_type.
+
+Dashboard numbers (record counts, revenue totals, min/max/avg, state counts)
+are answered from a few hundred cube rows instead of scanning the dataset.
+Import paths refresh only the fiscal years they touched; full reloads
+refresh the whole dataset inside the table swap transaction. Quantile sketches
+(quantile_sketch.py) are rebuilt from the same source rows.
+"""
+import argparse
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from db_utils import (
+    DATASET_TABLES,
+    get_available_datasets,
+    ensure_index,
+    fiscal_year_condition,
+    get_connection,
+    quote_identifier,
+    resolve_table_name,
+    table_exists,
+)
+from quantile_sketch import SKETCH_TABLE, ensure_sketch_table, refresh_sketches
+from sqlite_loader import dataframe_to_records
+
+
+CUBE_TABLE = "summary_cube"
+CUBE_DIMENSIONS = ["fiscal_year", "st", "form_type"]
+REVENUE_COLUMN = "part_i_summary_12_total_revenue_cy"
+EMPLOYEES_COLUMN = "employees"
+FORM_TYPE_COLUMN = "propublica_form_type"
+REVENUE_QUANTILES = {"revenue_p25": 0.25, "revenue_p50": 0.5, "revenue_p75": 0.75}
+
+CUBE_COLUMNS = {
+    "dataset": "TEXT NOT NULL",
+    "fiscal_year": "INTEGER",
+    "st": "TEXT NOT NULL",
+    "form_type": "TEXT NOT NULL",
+    "record_count": "INTEGER NOT NULL",
+    "revenue_count": "INTEGER NOT NULL",
+    "revenue_sum": "REAL",
+    "revenue_min": "REAL",
+    "revenue_max": "REAL",
+    "positive_revenue_count": "INTEGER NOT NULL",
+    "positive_revenue_sum": "REAL",
+    "positive_revenue_min": "REAL",
+    "positive_revenue_max": "REAL",
+    "revenue_p25": "REAL",
+    "revenue_p50": "REAL",
+    "revenue_p75": "REAL",
+    "employees_count": "INTEGER NOT NULL",
+    "employees_sum": "REAL",
+    "employees_min": "REAL",
+    "employees_max": "REAL",
+}
+
+
+def dataset_for_table(table_name: str) -> Optional[str]:
+    for dataset, dataset_table in DATASET_TABLES.items():
+        if dataset_table == table_name:
+            return dataset
+    return None
+
+
+def ensure_cube_table(conn: sqlite3.Connection) -> None:
+    column_defs = ", ".join(f"{column} {column_type}" for column, column_type in CUBE_COLUMNS.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {CUBE_TABLE} ({column_defs})")
+    ensure_index(conn, CUBE_TABLE, f"idx_{CUBE_TABLE}_dataset_cell", ["dataset"] + CUBE_DIMENSIONS)
+
+
+def load_cube_source(
+    conn: sqlite3.Connection,
+    table_name: str,
+    fiscal_years: Optional[Iterable[Any]] = None,
+) -> pd.DataFrame:
+    """Read only the narrow columns the cube needs, for the requested years."""
+    cursor = conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+    available = {row[1] for row in cursor.fetchall()}
+
+    def column_or(column: str, fallback: str) -> str:
+        return quote_identifier(column) if column in available else fallback
+
+    condition, params = fiscal_year_condition(fiscal_years)
+    sql = (
+        f"SELECT fiscal_year, "
+        f"COALESCE({column_or('st', 'NULL')}, '') AS st, "
+        f"COALESCE({column_or(FORM_TYPE_COLUMN, 'NULL')}, '') AS form_type, "
+        f"{column_or(REVENUE_COLUMN, 'NULL')} AS revenue, "
+        f"{column_or(EMPLOYEES_COLUMN, 'NULL')} AS employees "
+        f"FROM {quote_identifier(table_name)} WHERE {condition}"
+    )
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def aggregate_cube(source: pd.DataFrame) -> pd.DataFrame:
+    source = source.copy()
+    source["fiscal_year"] = pd.to_numeric(source["fiscal_year"], errors="coerce").astype("Int64")
+    source["revenue"] = pd.to_numeric(source["revenue"], errors="coerce")
+    source["employees"] = pd.to_numeric(source["employees"], errors="coerce")
+    source["positive_revenue"] = source["revenue"].where(source["revenue"] > 0)
+
+    grouped = source.groupby(CUBE_DIMENSIONS, dropna=False)
+    cube = grouped.agg(
+        record_count=("revenue", "size"),
+        revenue_count=("revenue", "count"),
+        revenue_sum=("revenue", "sum"),
+        revenue_min=("revenue", "min"),
+        revenue_max=("revenue", "max"),
+        positive_revenue_count=("positive_revenue", "count"),
+        positive_revenue_sum=("positive_revenue", "sum"),
+        positive_revenue_min=("positive_revenue", "min"),
+        positive_revenue_max=("positive_revenue", "max"),
+        employees_count=("employees", "count"),
+        employees_sum=("employees", "sum"),
+        employees_min=("employees", "min"),
+        employees_max=("employees", "max"),
+    )
+    for prefix in ("revenue", "positive_revenue", "employees"):
+        # pandas sums an all-NULL group to 0; keep it NULL like SQL SUM does
+        cube[f"{prefix}_sum"] = cube[f"{prefix}_sum"].where(cube[f"{prefix}_count"] > 0)
+    quantiles = grouped["revenue"].quantile(list(REVENUE_QUANTILES.values())).unstack()
+    quantiles.columns = list(REVENUE_QUANTILES)
+    cube = cube.join(quantiles).reset_index()
+    return cube[[column for column in CUBE_COLUMNS if column != "dataset"]]
+
+
+def refresh_summary_cube(
+    conn: sqlite3.Connection,
+    dataset: str,
+    fiscal_years: Optional[Iterable[Any]] = None,
+) -> int:
+    """
+    Recompute cube rows for a dataset (all years, or only fiscal_years).
+
+    Runs on the caller's connection without committing, so an incremental
+    import can refresh the cube inside its own transaction.
+    """
+    table_name = resolve_table_name(dataset)
+    if fiscal_years is not None:
+        fiscal_years = list(fiscal_years)
+    ensure_cube_table(conn)
+    condition, params = fiscal_year_condition(fiscal_years)
+    conn.execute(f"DELETE FROM {CUBE_TABLE} WHERE dataset = ? AND {condition}", [dataset] + params)
+
+    source = load_cube_source(conn, table_name, fiscal_years)
+    refresh_sketches(conn, dataset, source, fiscal_years)
+    cube = aggregate_cube(source)
+    if cube.empty:
+        return 0
+    cube.insert(0, "dataset", dataset)
+    column_list = ", ".join(cube.columns)
+    placeholders = ", ".join("?" for _ in cube.columns)
+    conn.executemany(
+        f"INSERT INTO {CUBE_TABLE} ({column_list}) VALUES ({placeholders})",
+        dataframe_to_records(cube),
+    )
+    return len(cube)
+
+
+def ensure_summary_cube(dataset: str) -> None:
+    """
+    Build the cube for databases loaded before the cube existed.
+
+    Run once from the command line (python summary_cube.py); the API only
+    reads the cube and never builds it inside a request.
+    """
+    table_name = resolve_table_name(dataset)
+    if not table_exists(table_name):
+        return
+    with get_connection() as conn:
+        ensure_cube_table(conn)
+        ensure_sketch_table(conn)
+        for table in (CUBE_TABLE, SKETCH_TABLE):
+            if conn.execute(f"SELECT 1 FROM {table} WHERE dataset = ? LIMIT 1", (dataset,)).fetchone() is None:
+                refresh_summary_cube(conn, dataset)
+                break
+
+
+def summarize_cells(cells: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine cube rows into one set of statistics (averages derived from sums)."""
+
+    def total(column: str):
+        values = [cell[column] for cell in cells if cell[column] is not None]
+        return sum(values) if values else None
+
+    def extreme(column: str, pick):
+        values = [cell[column] for cell in cells if cell[column] is not None]
+        return pick(values) if values else None
+
+    def average(sum_column: str, count_column: str):
+        count = total(count_column) or 0
+        return (total(sum_column) or 0) / count if count else None
+
+    summary = {
+        "record_count": total("record_count") or 0,
+        "revenue": {
+            "count": total("revenue_count") or 0,
+            "sum": total("revenue_sum"),
+            "min": extreme("revenue_min", min),
+            "max": extreme("revenue_max", max),
+            "avg": average("revenue_sum", "revenue_count"),
+        },
+        "positive_revenue": {
+            "count": total("positive_revenue_count") or 0,
+            "sum": total("positive_revenue_sum"),
+            "min": extreme("positive_revenue_min", min),
+            "max": extreme("positive_revenue_max", max),
+            "avg": average("positive_revenue_sum", "positive_revenue_count"),
+        },
+        "employees": {
+            "count": total("employees_count") or 0,
+            "sum": total("employees_sum"),
+            "min": extreme("employees_min", min),
+            "max": extreme("employees_max", max),
+            "avg": average("employees_sum", "employees_count"),
+        },
+        "cells": len(cells),
+    }
+    # Exact quantiles are stored per cell and cannot be merged across cells.
+    if len(cells) == 1:
+        summary["revenue"]["quantiles"] = {
+            name: cells[0][name] for name in REVENUE_QUANTILES
+        }
+    return summary
+
+
+def cube_has_rows(dataset: str) -> bool:
+    """False for databases loaded before the cube existed and not yet built."""
+    if not table_exists(CUBE_TABLE):
+        return False
+    with get_connection() as conn:
+        return conn.execute(f"SELECT 1 FROM {CUBE_TABLE} WHERE dataset = ? LIMIT 1", (dataset,)).fetchone() is not None
+
+
+def load_cube_cells(
+    dataset: str,
+    fiscal_years: Optional[List[int]] = None,
+    states: Optional[List[str]] = None,
+    form_types: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    if not table_exists(CUBE_TABLE):
+        return []
+    conditions = ["dataset = ?"]
+    params: List[Any] = [dataset]
+    if fiscal_years:
+        condition, year_params = fiscal_year_condition(fiscal_years)
+        conditions.append(condition)
+        params.extend(year_params)
+    for column, values in (("st", states), ("form_type", form_types)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+
+    with get_connection() as conn:
+        cursor = conn.execute(
+            f"SELECT * FROM {CUBE_TABLE} WHERE {' AND '.join(conditions)} "
+            f"ORDER BY fiscal_year DESC, st, form_type",
+            params,
+        )
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def slice_cube(
+    dataset: str,
+    group_by: Optional[List[str]] = None,
+    fiscal_years: Optional[List[int]] = None,
+    states: Optional[List[str]] = None,
+    form_types: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Filter the cube and roll it up to the requested dimensions."""
+    group_by = [dimension for dimension in (group_by or []) if dimension in CUBE_DIMENSIONS]
+    cells = load_cube_cells(dataset, fiscal_years, states, form_types)
+
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for cell in cells:
+        groups.setdefault(tuple(cell[dimension] for dimension in group_by), []).append(cell)
+
+    return {
+        "dataset": dataset,
+        "group_by": group_by,
+        "totals": summarize_cells(cells),
+        "states_count": len({cell["st"] for cell in cells if cell["st"]}),
+        "groups": [
+            {**dict(zip(group_by, key)), **summarize_cells(group_cells)}
+            for key, group_cells in groups.items()
+        ] if group_by else [],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or rebuild the summary cube and quantile sketches")
+    parser.add_argument("--dataset", action="append", help="Dataset to build (repeatable; default: all loaded datasets)")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute even when the dataset already has cube rows")
+    args = parser.parse_args()
+
+    for dataset in args.dataset or get_available_datasets():
+        if args.rebuild:
+            with get_connection() as conn:
+                cells = refresh_summary_cube(conn, dataset)
+            print(f"{dataset}: rebuilt {cells} cube cells")
+        else:
+            ensure_summary_cube(dataset)
+            print(f"{dataset}: cube present")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Harvester modules (harvest_sinks) write into backend tables; appended so backend names win
+sys.path.append(os.path.join(os.path.dirname(BACKEND_DIR), "data_harvester"))
+# db_utils reads IRS_DB_PATH at import; never let a test touch backend/irs.db
+os.environ["IRS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="irs-tests-"), "irs.db")
+
+import db_utils  # noqa: E402
+from utils.cache import response_cache  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point every get_connection() at a fresh database for one test."""
+    path = str(tmp_path / "irs.db")
+    monkeypatch.setattr(db_utils, "DB_PATH", path)
+    response_cache.clear()
+    yield path
+    response_cache.clear()
+
+
+@pytest.fixture
+def conn(db_path):
+    connection = db_utils.get_connection()
+    yield connection
+    connection.close()
@@ -0,0 +1,54 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "admin-token")
+    monkeypatch.setattr(main, "METRICS_TOKEN", "metrics-token")
+    app = FastAPI()
+
+    @app.get("/admin", dependencies=[Depends(main.require_admin)])
+    async def admin():
+        return {"ok": True}
+
+    app.add_api_route("/metrics", main.metrics, methods=["GET"], dependencies=[Depends(main.require_metrics_token)])
+    return TestClient(app)
+
+
+def bearer(token, **headers):
+    return {"Authorization": f"Bearer {token}", **headers}
+
+
+def test_login_token_alone_is_not_admin(client):
+    user_token = main.create_access_token({"sub": "someone"})
+    assert client.get("/admin", headers=bearer(user_token)).status_code == 403
+    assert client.get("/admin", headers=bearer(user_token, **{"X-Admin-Token": "wrong"})).status_code == 403
+    assert client.get("/admin", headers=bearer(user_token, **{"X-Admin-Token": "admin-token"})).status_code == 200
+
+
+def test_admin_token_still_needs_a_login(client):
+    assert client.get("/admin", headers=bearer("admin-token", **{"X-Admin-Token": "admin-token"})).status_code == 401
+
+
+def test_metrics_takes_only_its_static_token(client):
+    assert client.get("/metrics", headers=bearer(main.create_access_token({"sub": "someone"}))).status_code == 401
+    response = client.get("/metrics", headers=bearer("metrics-token"))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.parametrize(
+    "secret_key, admin_token, message",
+    [
+        (main.DEFAULT_SECRET_KEY, "admin-token", "IRS_SECRET_KEY"),
+        ("test-secret", "", "IRS_ADMIN_TOKEN"),
+    ],
+)
+def test_admin_config_is_refused(secret_key, admin_token, message):
+    with pytest.raises(RuntimeError, match=message):
+        main.check_admin_config(secret_key, admin_token)
@@ -0,0 +1,52 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.filter import router
+
+EXPENSES = "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy"
+
+
+@pytest.fixture
+def client(conn):
+    conn.execute(
+        "CREATE TABLE propublica_nonprofits (ein TEXT, campus TEXT, st TEXT, fiscal_year INTEGER, "
+        "fiscal_month INTEGER, part_i_summary_12_total_revenue_cy REAL)"
+    )
+    conn.execute(f"CREATE TABLE propublica_nonprofits_detail (ein TEXT, fiscal_year INTEGER, {EXPENSES} REAL)")
+    rows = [("000000001", 2022, 10.0), ("000000001", 2023, 20.0), ("000000002", 2023, 30.0)]
+    conn.executemany("INSERT INTO propublica_nonprofits VALUES (?, 'Org', 'CA', ?, 6, 1.0)", [row[:2] for row in rows])
+    conn.executemany("INSERT INTO propublica_nonprofits_detail VALUES (?, ?, ?)", rows)
+    conn.commit()
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return TestClient(app)
+
+
+def test_selected_detail_field_comes_back_populated(client):
+    listed = client.post(
+        "/api/filter/enhanced", json={"dataset": "propublica", "fiscal_year": 2023}
+    ).json()["results"]
+    assert listed and all(EXPENSES not in row for row in listed)
+
+    response = client.post(
+        "/api/filter/details",
+        json={
+            "dataset": "propublica",
+            "keys": [{"ein": row["ein"], "fiscal_year": row["fiscal_year"]} for row in listed],
+            "fields": [EXPENSES],
+        },
+    )
+    assert response.status_code == 200
+    values = {(row["ein"], row["fiscal_year"]): row[EXPENSES] for row in response.json()["results"]}
+    # Only the requested years, not every filing of the EIN
+    assert values == {("000000001", 2023): 20.0, ("000000002", 2023): 30.0}
+
+
+def test_hot_or_unknown_fields_are_rejected(client):
+    for field in ("campus", "no_such_field"):
+        response = client.post(
+            "/api/filter/details",
+            json={"dataset": "propublica", "keys": [{"ein": "000000001", "fiscal_year": 2023}], "fields": [field]},
+        )
+        assert response.status_code == 400
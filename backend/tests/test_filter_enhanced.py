@@ -0,0 +1,120 @@
+import logging
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.filter as filter_api
+
+
+@pytest.fixture
+def client(conn, monkeypatch):
+    conn.execute(
+        "CREATE TABLE nonprofits (ein TEXT, campus TEXT, city TEXT, st TEXT, fiscal_year INTEGER, "
+        "fiscal_month INTEGER, part_i_summary_12_total_revenue_cy REAL, employees INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO nonprofits VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (f"{index:09d}", f"Org {index}", "Austin", "TX", 2023, 6, None if index % 4 == 0 else index * 100.0, index)
+            for index in range(10)
+        ],
+    )
+    conn.commit()
+    explained = []
+    describe_sort_plan = filter_api.describe_sort_plan
+
+    def recording_describe_sort_plan(*args):
+        explained.append(args[1])
+        return describe_sort_plan(*args)
+
+    monkeypatch.setattr(filter_api, "describe_sort_plan", recording_describe_sort_plan)
+    app = FastAPI()
+    app.include_router(filter_api.router, prefix="/api")
+    test_client = TestClient(app)
+    test_client.explained = explained
+    return test_client
+
+
+def post(client, **body):
+    return client.post("/api/filter/enhanced", json={"fiscal_year": 2023, **body})
+
+
+@pytest.mark.parametrize("page_size", ["abc", [5], -1, filter_api.MAX_PAGE_SIZE + 1])
+def test_invalid_page_size_is_400(client, page_size):
+    response = post(client, page_size=page_size)
+    assert response.status_code == 400
+    assert "page_size" in response.json()["detail"]
+
+
+def test_default_count_is_exact(client):
+    body = post(client, financial_filters={"min_revenue": 500}).json()
+    assert body["total"] == 4
+    assert body["total_exact"] is True
+
+
+def test_sort_plan_only_when_explain_requested(client):
+    body = post(client, page_size=3).json()
+    assert "sort_plan" not in body
+    assert client.explained == []
+
+    body = post(client, page_size=3, explain=True).json()
+    assert body["sort_plan"] in ("index", "partial", "sort")
+    assert len(client.explained) == 1
+
+
+def test_cursor_pages_cover_every_row_once(client):
+    eins, cursor = [], None
+    while True:
+        body = post(client, page_size=3, sort="employees:desc", cursor=cursor).json()
+        eins.extend(row["ein"] for row in body["results"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert eins == [f"{index:09d}" for index in range(9, -1, -1)]
+
+
+def test_cursor_from_other_sort_is_400(client):
+    cursor = post(client, page_size=3, sort="employees:desc").json()["next_cursor"]
+    response = post(client, page_size=3, sort="employees:asc", cursor=cursor)
+    assert response.status_code == 400
+
+
+def test_estimated_count_without_cube_is_exact(client):
+    body = post(client, count_mode="estimated", financial_filters={"min_revenue": 500}).json()
+    assert body["total"] == 4
+    assert body["total_exact"] is True
+
+
+def test_cube_read_error_is_logged_and_counted_exactly(client, monkeypatch, caplog):
+    def broken_cube(*args, **kwargs):
+        raise sqlite3.OperationalError("database disk image is malformed")
+
+    monkeypatch.setattr(filter_api, "cube_has_rows", lambda dataset: True)
+    monkeypatch.setattr(filter_api, "load_cube_cells", broken_cube)
+    with caplog.at_level(logging.WARNING, logger=filter_api.logger.name):
+        body = post(client, count_mode="estimated").json()
+    assert body["total"] == 10
+    assert body["total_exact"] is True
+    assert "summary cube read failed" in caplog.text
+
+
+def test_ndjson_count_failure_closes_connection(client, monkeypatch):
+    opened = []
+    get_connection = filter_api.get_connection
+
+    def recording_get_connection(*args, **kwargs):
+        conn = get_connection(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    def failing_count(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(filter_api, "get_connection", recording_get_connection)
+    monkeypatch.setattr(filter_api, "count_matches", failing_count)
+    assert post(client, format="ndjson").status_code == 500
+    assert len(opened) == 1
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        opened[0].execute("SELECT 1")
@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from db_utils import get_table_version
+from harvest_sinks import SqliteSink
+
+
+COLUMNS = ["ein", "tax_year"]
+TYPES = {"tax_year": "int"}
+
+
+def live_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT ein, tax_year FROM propublica_filings ORDER BY ein").fetchall()
+
+
+def tables(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+
+@pytest.fixture
+def harvested(db_path):
+    with SqliteSink(COLUMNS, TYPES, db_path=db_path) as sink:
+        sink.write([{"ein": "000000001", "tax_year": 2022}])
+    return db_path
+
+
+def test_replace_keeps_live_table_until_close(harvested):
+    sink = SqliteSink(COLUMNS, TYPES, db_path=harvested)
+    sink.write([{"ein": "000000002", "tax_year": 2023}])
+    assert live_rows(harvested) == [("000000001", 2022)]
+
+    sink.close()
+    assert live_rows(harvested) == [("000000002", 2023)]
+    assert tables(harvested) == ["dataset_versions", "propublica_filings"]
+    with sqlite3.connect(harvested) as conn:
+        assert get_table_version(conn, "propublica_filings") == 2
+
+
+def test_failed_harvest_leaves_live_table(harvested):
+    with pytest.raises(RuntimeError):
+        with SqliteSink(COLUMNS, TYPES, db_path=harvested) as sink:
+            sink.write([{"ein": "000000002", "tax_year": 2023}])
+            raise RuntimeError("harvest failed")
+    assert live_rows(harvested) == [("000000001", 2022)]
+    assert tables(harvested) == ["dataset_versions", "propublica_filings"]
+
+
+def test_empty_harvest_leaves_live_table(harvested):
+    SqliteSink(COLUMNS, TYPES, db_path=harvested).close()
+    assert live_rows(harvested) == [("000000001", 2022)]
+
+
+def test_append_mode_adds_rows_and_bumps_version(harvested):
+    with SqliteSink(COLUMNS, TYPES, db_path=harvested, replace=False) as sink:
+        sink.write([{"ein": "000000002", "tax_year": 2023}])
+    assert live_rows(harvested) == [("000000001", 2022), ("000000002", 2023)]
+    with sqlite3.connect(harvested) as conn:
+        assert get_table_version(conn, "propublica_filings") == 2
+
+
+def test_default_path_follows_irs_db_path(db_path):
+    with SqliteSink(COLUMNS, TYPES) as sink:
+        sink.write([{"ein": "000000001", "tax_year": 2022}])
+    assert sink.db_path.samefile(db_path)
+    assert live_rows(db_path) == [("000000001", 2022)]
+
+
+def test_build_sinks_aborts_built_sinks_when_a_later_one_fails(harvested, tmp_path, monkeypatch):
+    import propublica_poc_harvester as harvester
+
+    def failing_parquet_sink(*args, **kwargs):
+        raise RuntimeError("Parquet output requires pyarrow")
+
+    monkeypatch.setattr(harvester, "OUTPUT_DIR", tmp_path / "output")
+    monkeypatch.setattr(harvester, "ParquetSink", failing_parquet_sink)
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        harvester.build_sinks(["sqlite", "parquet"], 100, harvested)
+    assert tables(harvested) == ["dataset_versions", "propublica_filings"]
@@ -0,0 +1,36 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.organizations import router
+from harvest_sinks import SqliteSink
+
+
+FILING_COLUMNS = ["ein", "tax_year", "filing_date", "total_revenue"]
+FILING_TYPES = {"tax_year": "int", "total_revenue": "float"}
+
+
+def harvest(db_path, revenue):
+    with SqliteSink(FILING_COLUMNS, FILING_TYPES, db_path=db_path) as sink:
+        sink.write([{"ein": "000000001", "tax_year": 2023, "filing_date": "2024-05-01", "total_revenue": revenue}])
+
+
+@pytest.fixture
+def client(conn):
+    conn.execute("CREATE TABLE propublica_nonprofits (ein TEXT, campus TEXT, fiscal_year INTEGER, fiscal_month INTEGER)")
+    conn.execute("INSERT INTO propublica_nonprofits VALUES ('000000001', 'Org', 2023, 6)")
+    conn.commit()
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return TestClient(app)
+
+
+def test_rewritten_filings_are_not_served_from_cache(client, db_path):
+    harvest(db_path, 100.0)
+    first = client.get("/api/organizations/1", params={"dataset": "propublica"})
+    assert first.json()["filings"][0]["total_revenue"] == 100.0
+
+    harvest(db_path, 250.0)
+    second = client.get("/api/organizations/1", params={"dataset": "propublica"})
+    assert second.json()["filings"][0]["total_revenue"] == 250.0
+    assert second.headers["ETag"] != first.headers["ETag"]
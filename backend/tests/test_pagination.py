@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+from utils.pagination import (
+    ROWID_COLUMN,
+    decode_cursor,
+    encode_cursor,
+    keyset_condition,
+    order_by_clause,
+    page_rows,
+)
+
+
+ROWS = [
+    (3, "b"), (1, "a"), (None, "c"), (3, None), (2, "a"),
+    (None, None), (1, "a"), (3, "a"), (2, None), (None, "a"),
+]
+
+
+@pytest.fixture
+def memory_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (score INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", ROWS)
+    yield conn
+    conn.close()
+
+
+def fetch_all_pages(conn, sort_keys, page_size):
+    """Walk the table page by page through encoded cursors, returning rowids in order."""
+    seen, cursor = [], None
+    while True:
+        condition, params = "1 = 1", []
+        if cursor is not None:
+            values, rowid = decode_cursor(cursor, sort_keys)
+            condition, params = keyset_condition(sort_keys, values, rowid)
+        result = conn.execute(
+            f"SELECT rowid AS {ROWID_COLUMN}, * FROM items WHERE {condition} "
+            f"ORDER BY {order_by_clause(sort_keys)} LIMIT ?",
+            params + [page_size + 1],
+        )
+        columns = [description[0] for description in result.description]
+        rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        rowids = [row[ROWID_COLUMN] for row in rows[:page_size]]
+        page, cursor = page_rows(rows, sort_keys, page_size)
+        assert all(ROWID_COLUMN not in row for row in page)
+        seen.extend(rowids)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize(
+    "sort_keys",
+    [
+        [("score", "ASC")],
+        [("score", "DESC")],
+        [("score", "DESC"), ("name", "ASC")],
+        [("score", "ASC"), ("name", "DESC")],
+        [("name", "DESC"), ("score", "DESC")],
+    ],
+)
+@pytest.mark.parametrize("page_size", [1, 3, 4])
+def test_keyset_pages_match_full_ordering(memory_table, sort_keys, page_size):
+    expected = [
+        row[0]
+        for row in memory_table.execute(f"SELECT rowid FROM items ORDER BY {order_by_clause(sort_keys)}")
+    ]
+    assert fetch_all_pages(memory_table, sort_keys, page_size) == expected
+
+
+def test_cursor_round_trip_keeps_null_values():
+    sort_keys = [("score", "DESC"), ("name", "ASC")]
+    token = encode_cursor(sort_keys, {"score": None, "name": "a", ROWID_COLUMN: 7})
+    assert decode_cursor(token, sort_keys) == ([None, "a"], 7)
+
+
+def test_cursor_rejects_different_sort():
+    token = encode_cursor([("score", "DESC")], {"score": 1, ROWID_COLUMN: 1})
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(token, [("score", "ASC")])
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(token, [("score", "DESC"), ("name", "ASC")])
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "e30=", ""])
+def test_cursor_rejects_garbage(token):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(token, [("score", "ASC")])
+
+
+def test_keyset_condition_null_value_skips_impossible_branch():
+    # Nothing sorts after NULL in a DESC key except ties broken by later keys
+    sql, params = keyset_condition([("score", "DESC"), ("name", "ASC")], [None, "b"], 5)
+    assert sql.count(" OR ") == 1
+    assert params == [None, "b", None, "b", 5]
+
+
+def test_page_rows_last_page_has_no_cursor():
+    rows = [{"score": 1, ROWID_COLUMN: 1}, {"score": 2, ROWID_COLUMN: 2}]
+    page, cursor = page_rows(rows, [("score", "ASC")], page_size=2)
+    assert cursor is None
+    assert page == [{"score": 1}, {"score": 2}]
@@ -0,0 +1,145 @@
+import pandas as pd
+import pytest
+
+from db_utils import get_table_version
+from propublica_pipeline import (
+    ensure_upsert_table,
+    merge_staged_rows,
+    normalize_dataframe,
+    stage_dataframe,
+    upsert_backend_rows,
+    write_staged_rows,
+)
+from summary_cube import CUBE_TABLE
+
+
+TABLE = "propublica_nonprofits"
+DETAIL = "propublica_nonprofits_detail"
+EXPENSES = "part_ix_statement_of_functional_expenses_25_total_functional_expenses_cy"
+
+
+def filing(ein, fiscal_year, revenue=100.0, expenses=50.0, st="CA"):
+    return {
+        "ein": ein,
+        "campus": f"Org {ein}",
+        "city": "Oakland",
+        "st": st,
+        "fiscal_year": fiscal_year,
+        "fiscal_month": 6,
+        "part_i_summary_12_total_revenue_cy": revenue,
+        "employees": 10,
+        "propublica_form_type": "990",
+        EXPENSES: expenses,
+    }
+
+
+def upsert(conn, *rows):
+    with conn:
+        return upsert_backend_rows(conn, TABLE, normalize_dataframe(pd.DataFrame(list(rows))))
+
+
+def select(conn, sql):
+    return conn.execute(sql).fetchall()
+
+
+def versions(conn):
+    return get_table_version(conn, TABLE), get_table_version(conn, DETAIL)
+
+
+def test_insert_update_and_unchanged_counts(conn):
+    assert upsert(conn, filing("1", 2022), filing("2", 2022)) == {"inserted": 2, "updated": 0, "unchanged": 0, "removed_placeholders": 0}
+    assert versions(conn) == (1, 1)
+
+    assert upsert(conn, filing("1", 2022), filing("2", 2022)) == {"inserted": 0, "updated": 0, "unchanged": 2, "removed_placeholders": 0}
+    assert versions(conn) == (1, 1)
+
+    # One detail-only change and one hot change, plus a new year
+    counts = upsert(conn, filing("1", 2022, expenses=75.0), filing("2", 2022, revenue=200.0), filing("2", 2023))
+    assert counts == {"inserted": 1, "updated": 2, "unchanged": 0, "removed_placeholders": 0}
+    assert versions(conn) == (2, 2)
+    assert select(conn, f"SELECT {EXPENSES} FROM {DETAIL} WHERE ein = '000000001'") == [(75.0,)]
+    assert select(conn, f"SELECT part_i_summary_12_total_revenue_cy FROM {TABLE} WHERE ein = '000000002' AND fiscal_year = 2022") == [(200.0,)]
+    assert select(conn, f"SELECT COUNT(*) FROM {TABLE}") == [(3,)]
+    assert select(conn, f"SELECT COUNT(*) FROM {DETAIL}") == [(3,)]
+
+
+def test_dated_filing_replaces_null_year_placeholder(conn):
+    upsert(conn, filing("1", None), filing("2", 2022))
+
+    counts = upsert(conn, filing("1", 2023))
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 0, "removed_placeholders": 1}
+    for table in (TABLE, DETAIL):
+        assert select(conn, f"SELECT ein, fiscal_year FROM {table} ORDER BY ein") == [
+            ("000000001", 2023),
+            ("000000002", 2022),
+        ]
+
+
+def test_placeholder_replaces_previous_placeholder(conn):
+    upsert(conn, filing("1", None))
+
+    assert upsert(conn, filing("1", None)) == {"inserted": 0, "updated": 0, "unchanged": 1, "removed_placeholders": 0}
+    assert upsert(conn, filing("1", None, revenue=300.0)) == {"inserted": 0, "updated": 1, "unchanged": 0, "removed_placeholders": 0}
+    assert select(conn, f"SELECT fiscal_year, part_i_summary_12_total_revenue_cy FROM {TABLE}") == [(None, 300.0)]
+    assert select(conn, f"SELECT COUNT(*) FROM {DETAIL}") == [(1,)]
+
+
+def test_duplicate_staged_keys_count_once_and_last_row_wins(conn):
+    counts = upsert(conn, filing("1", 2022), filing("1", 2022, revenue=200.0), filing("2", None), filing("2", None, revenue=300.0))
+    assert counts == {"inserted": 2, "updated": 0, "unchanged": 0, "removed_placeholders": 0}
+    assert select(conn, f"SELECT ein, fiscal_year, part_i_summary_12_total_revenue_cy FROM {TABLE} ORDER BY ein") == [
+        ("000000001", 2022, 200.0),
+        ("000000002", None, 300.0),
+    ]
+    assert select(conn, f"SELECT COUNT(*) FROM {DETAIL}") == [(2,)]
+
+
+def test_cube_refresh_only_touches_imported_years(conn):
+    upsert(conn, filing("1", 2022), filing("2", 2023))
+    # Mark the 2022 cell; an incremental import of 2023 rows must leave it alone
+    conn.execute(f"UPDATE {CUBE_TABLE} SET record_count = 999 WHERE fiscal_year = 2022")
+    conn.commit()
+
+    upsert(conn, filing("3", 2023), filing("4", 2023, st="NV"))
+    cells = select(conn, f"SELECT fiscal_year, st, record_count FROM {CUBE_TABLE} ORDER BY fiscal_year, st")
+    assert cells == [(2022, "CA", 999), (2023, "CA", 2), (2023, "NV", 1)]
+
+
+def test_unchanged_import_skips_cube_refresh(conn):
+    upsert(conn, filing("1", 2022))
+    conn.execute(f"UPDATE {CUBE_TABLE} SET record_count = 999")
+    conn.commit()
+
+    upsert(conn, filing("1", 2022))
+    assert select(conn, f"SELECT record_count FROM {CUBE_TABLE}") == [(999,)]
+
+
+def stage(conn, rows):
+    df = normalize_dataframe(pd.DataFrame(rows))
+    ensure_upsert_table(conn, TABLE, df, secondary_indexes=False)
+    return stage_dataframe(conn, df), list(df.columns)
+
+
+def test_merge_staged_rows_without_detail_table(conn):
+    staging, columns = stage(conn, [filing("1", 2022), filing("2", 2022)])
+    assert merge_staged_rows(conn, TABLE, staging, columns) == {"inserted": 2, "updated": 0, "unchanged": 0, "removed_placeholders": 0}
+
+    staging, columns = stage(conn, [filing("1", 2022, expenses=1.0), filing("2", 2022)])
+    assert merge_staged_rows(conn, TABLE, staging, columns) == {"inserted": 0, "updated": 1, "unchanged": 1, "removed_placeholders": 0}
+    assert select(conn, f"SELECT {EXPENSES} FROM {TABLE} ORDER BY ein") == [(1.0,), (50.0,)]
+
+
+def test_write_staged_rows_with_key_columns_only_ignores_duplicates(conn):
+    staging, _ = stage(conn, [{"ein": "1", "fiscal_year": 2022}])
+    write_staged_rows(conn, TABLE, f"temp.{staging}", ["ein", "fiscal_year"])
+    staging, _ = stage(conn, [{"ein": "1", "fiscal_year": 2022}, {"ein": "2", "fiscal_year": 2022}])
+    write_staged_rows(conn, TABLE, f"temp.{staging}", ["ein", "fiscal_year"])
+    assert select(conn, f"SELECT ein, fiscal_year FROM {TABLE} ORDER BY ein") == [
+        ("000000001", 2022),
+        ("000000002", 2022),
+    ]
+
+
+def test_missing_key_columns_are_rejected(conn):
+    with pytest.raises(ValueError, match="fiscal_year"):
+        upsert_backend_rows(conn, TABLE, pd.DataFrame([{"ein": "1"}]))
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from schema_inference import coerce_dataframe, infer_schema
+
+
+def test_text_columns_keep_sentinel_like_values():
+    df = pd.DataFrame({
+        "ein": ["001234567", " ", "nan", "NA"],
+        "campus": ["NA", "None", "-", ""],
+    })
+    coerced, failures = coerce_dataframe(df, {"ein": "TEXT", "campus": "TEXT"})
+    assert coerced["ein"].tolist() == ["001234567", None, None, "NA"]
+    assert coerced["campus"].tolist() == ["NA", "None", "-", None]
+    assert failures == {}
+
+
+def test_numeric_columns_treat_sentinels_as_missing():
+    df = pd.DataFrame({"employees": ["12", "N/A", "-", "none", "1,200", "abc"]})
+    column_types = infer_schema(pd.DataFrame({"employees": ["1", "2", "3"]}))
+    coerced, failures = coerce_dataframe(df, column_types)
+    assert column_types == {"employees": "INTEGER"}
+    assert coerced["employees"].tolist() == [12, pd.NA, pd.NA, pd.NA, 1200, pd.NA]
+    assert failures == {"employees": [1, ["abc"]]}
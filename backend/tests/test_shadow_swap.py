@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+from db_utils import (
+    get_dataset_version,
+    get_table_version,
+    prepare_shadow_table,
+    swap_tables,
+    validate_shadow_table,
+)
+
+
+def table_names(conn):
+    return sorted(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+
+def build_shadow(conn, table_name, rows):
+    shadow_name = prepare_shadow_table(conn, table_name)
+    conn.execute(f'CREATE TABLE "{shadow_name}" (ein TEXT, fiscal_year INTEGER)')
+    conn.executemany(f'INSERT INTO "{shadow_name}" VALUES (?, ?)', rows)
+    conn.commit()
+    return shadow_name
+
+
+def test_swap_replaces_live_table_and_bumps_version(conn):
+    first = build_shadow(conn, "nonprofits", [("1", 2022)])
+    assert first == "nonprofits__v1"
+    assert swap_tables(conn, {"nonprofits": first}) == {"nonprofits": 1}
+
+    second = build_shadow(conn, "nonprofits", [("2", 2023), ("3", 2023)])
+    assert second == "nonprofits__v2"
+    assert swap_tables(conn, {"nonprofits": second}) == {"nonprofits": 2}
+
+    assert conn.execute("SELECT ein FROM nonprofits ORDER BY ein").fetchall() == [("2",), ("3",)]
+    assert get_dataset_version("default") == 2
+    # The previous live table is retired and dropped; no shadow is left behind
+    assert table_names(conn) == ["dataset_versions", "nonprofits"]
+
+
+def test_swap_moves_hot_and_detail_tables_together(conn):
+    layout = {
+        "nonprofits": build_shadow(conn, "nonprofits", [("1", 2022)]),
+        "nonprofits_detail": build_shadow(conn, "nonprofits_detail", [("1", 2022)]),
+    }
+    assert swap_tables(conn, layout) == {"nonprofits": 1, "nonprofits_detail": 1}
+    assert table_names(conn) == ["dataset_versions", "nonprofits", "nonprofits_detail"]
+
+
+def test_before_commit_sees_swapped_tables_in_the_same_transaction(conn):
+    shadow_name = build_shadow(conn, "nonprofits", [("1", 2022), ("2", 2022)])
+    seen = []
+
+    def before_commit(swap_conn):
+        assert swap_conn.in_transaction
+        seen.append(swap_conn.execute("SELECT COUNT(*) FROM nonprofits").fetchone()[0])
+        seen.append(get_table_version(swap_conn, "nonprofits"))
+
+    swap_tables(conn, {"nonprofits": shadow_name}, before_commit=before_commit)
+    assert seen == [2, 1]
+
+
+def test_failed_before_commit_keeps_previous_table(conn):
+    swap_tables(conn, {"nonprofits": build_shadow(conn, "nonprofits", [("1", 2022)])})
+    shadow_name = build_shadow(conn, "nonprofits", [("2", 2023)])
+
+    def before_commit(swap_conn):
+        raise RuntimeError("cube refresh failed")
+
+    with pytest.raises(RuntimeError):
+        swap_tables(conn, {"nonprofits": shadow_name}, before_commit=before_commit)
+    assert conn.execute("SELECT ein FROM nonprofits").fetchall() == [("1",)]
+    assert get_table_version(conn, "nonprofits") == 1
+    assert shadow_name in table_names(conn)
+
+
+def test_prepare_drops_leftover_shadow_and_retired_tables(conn):
+    conn.execute('CREATE TABLE "nonprofits__v7" (ein TEXT)')
+    conn.execute('CREATE TABLE "nonprofits__retired" (ein TEXT)')
+    conn.commit()
+
+    assert prepare_shadow_table(conn, "nonprofits") == "nonprofits__v1"
+    assert table_names(conn) == []
+
+
+@pytest.mark.parametrize(
+    "create_sql, required, min_rows, message",
+    [
+        (None, ["ein"], 1, "was not created"),
+        ("CREATE TABLE shadow (ein TEXT)", ["ein", "fiscal_year"], 1, "missing required columns: fiscal_year"),
+        ("CREATE TABLE shadow (ein TEXT, fiscal_year INTEGER)", ["ein"], 1, "has 0 rows; expected at least 1"),
+    ],
+)
+def test_validate_rejects_bad_shadow(conn, create_sql, required, min_rows, message):
+    if create_sql:
+        conn.execute(create_sql)
+    with pytest.raises(ValueError, match=message):
+        validate_shadow_table(conn, "shadow", required, min_rows=min_rows)
+
+
+def test_validate_returns_row_count(conn):
+    conn.execute("CREATE TABLE shadow (ein TEXT, fiscal_year INTEGER)")
+    conn.executemany("INSERT INTO shadow VALUES (?, ?)", [("1", 2022), ("2", 2022)])
+    assert validate_shadow_table(conn, "shadow", ["ein", "fiscal_year"], min_rows=2) == 2
+
+
+def test_swap_rolls_back_when_shadow_is_missing(conn):
+    swap_tables(conn, {"nonprofits": build_shadow(conn, "nonprofits", [("1", 2022)])})
+    with pytest.raises(sqlite3.OperationalError):
+        swap_tables(conn, {"nonprofits": "nonprofits__v9"})
+    assert conn.execute("SELECT ein FROM nonprofits").fetchall() == [("1",)]
+    assert get_table_version(conn, "nonprofits") == 1
@@ -0,0 +1,61 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+
+from sqlite_loader import BULK_LOAD_PRAGMAS, bulk_load_dataframe, bulk_load_pragmas
+
+# Fills a shadow table under bulk_load_pragmas, then dies without cleanup like kill -9 / OOM
+KILLED_LOAD = """
+import os, signal, sys
+sys.path.insert(0, {backend!r})
+import pandas as pd
+from db_utils import get_connection
+from sqlite_loader import bulk_load_dataframe, bulk_load_pragmas
+conn = get_connection()
+with bulk_load_pragmas(conn):
+    df = pd.DataFrame({{"ein": [str(i) for i in range(200_000)], "value": range(200_000)}})
+    bulk_load_dataframe(conn, "shadow", df, {{"ein": "TEXT", "value": "INTEGER"}})
+    conn.execute("UPDATE users SET name = 'clobbered'")
+    os.kill(os.getpid(), signal.SIGKILL)
+"""
+
+
+def test_pragmas_keep_journal_on_disk_and_are_restored(conn):
+    assert "journal_mode" not in BULK_LOAD_PRAGMAS
+    before = conn.execute("PRAGMA synchronous").fetchone()[0]
+    with bulk_load_pragmas(conn):
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == before
+
+
+def test_error_inside_load_rolls_back(conn):
+    try:
+        with bulk_load_pragmas(conn):
+            bulk_load_dataframe(conn, "shadow", pd.DataFrame({"ein": ["1"]}))
+            raise RuntimeError("load failed")
+    except RuntimeError:
+        pass
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'shadow'").fetchone() is None
+
+
+def test_killed_load_leaves_database_intact(db_path):
+    with sqlite3.connect(db_path) as setup:
+        setup.execute("CREATE TABLE users (name TEXT)")
+        setup.execute("INSERT INTO users VALUES ('alice')")
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", KILLED_LOAD.format(backend=backend_dir)],
+        env={**os.environ, "IRS_DB_PATH": db_path},
+    )
+    assert result.returncode == -signal.SIGKILL
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("SELECT name FROM users").fetchall() == [("alice",)]
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'shadow'").fetchone() is None
@@ -0,0 +1,51 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.export as export_api
+from summary_cube import ensure_summary_cube
+from utils.cache import response_cache
+from utils.helpers import get_database_stats
+
+
+@pytest.fixture
+def loaded(conn):
+    # A database loaded before the summary cube existed: data table, no cube rows
+    conn.execute(
+        "CREATE TABLE nonprofits (ein TEXT, campus TEXT, st TEXT, fiscal_year INTEGER, "
+        "part_i_summary_12_total_revenue_cy REAL, employees INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO nonprofits VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("000000001", "A", "TX", 2023, 100.0, 1),
+            ("000000002", "B", "TX", 2023, 300.0, 2),
+            ("000000003", "C", "CA", 2022, 0.0, 3),
+        ],
+    )
+    conn.commit()
+    return conn
+
+
+def export_status():
+    app = FastAPI()
+    app.include_router(export_api.router, prefix="/api")
+    body = TestClient(app).get("/api/export/status").json()
+    return body["total_records"], body["states_count"], body["income_stats"]
+
+
+def test_status_and_stats_scan_until_the_cube_is_built(loaded):
+    expected_status = (3, 2, {"min": 100.0, "max": 300.0, "avg": 200.0})
+    assert export_status() == expected_status
+    stats = get_database_stats()
+    assert stats["total_records"] == 3
+    assert stats["st_distribution"] == {"TX": 2, "CA": 1}
+    assert stats["income_statistics"]["non_zero_count"] == 2
+
+    ensure_summary_cube("default")
+    response_cache.clear()
+    assert export_status() == expected_status
+    cube_stats = get_database_stats()
+    assert cube_stats["total_records"] == 3
+    assert cube_stats["st_distribution"] == {"TX": 2, "CA": 1}
+    assert cube_stats["income_statistics"]["non_zero_count"] == 2
@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from db_utils import get_dataset_version
+
+
+class DatasetCache:
+    """
+    Small in-process LRU cache for API responses.
+
+    Keys include the dataset version, so a reload or incremental import
+    (which bumps the version) makes every older entry unreachable without any
+    explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        dataset: Optional[str],
+        key: Hashable,
+        compute: Callable[[], Any],
+    ) -> Any:
+        cache_key = (namespace, dataset, get_dataset_version(dataset), key)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                return self._entries[cache_key]
+
+        value = compute()
+
+        with self._lock:
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = DatasetCache()
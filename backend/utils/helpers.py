@@ -1,15 +1,13 @@
-import sqlite3
 import json
 import logging
 from typing import Dict, List, Any, Optional, Union
 from datetime import datetime
 import re
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from db_utils import get_connection, resolve_table_name
+from summary_cube import cube_has_rows, slice_cube
+
+# Handlers are installed by logging_setup.configure_logging
 logger = logging.getLogger(__name__)
 
 def validate_pagination_params(page: int, page_size: int, max_page_size: int = 1000) -> tuple:
@@ -123,53 +121,86 @@ def sanitize_sql_input(input_str: str) -> str:
     
     return input_str.strip()
 
-def get_database_stats() -> Dict[str, Any]:
+def scan_database_stats(table_name: str) -> Dict[str, Any]:
     """
-    获取数据库统计信息
-    
+    通过 COUNT/GROUP BY 扫描计算统计信息
+
+    Args:
+        table_name: 数据表名
+
     Returns:
-        数据库统计信息
+        与 get_database_stats 相同结构的统计信息
     """
-    try:
-        conn = sqlite3.connect('irs.db')
+    logger.warning("summary cube is empty for %s; scanning", table_name)
+    with get_connection() as conn:
         cursor = conn.cursor()
-        
+
         # 总记录数
-        cursor.execute("SELECT COUNT(*) FROM nonprofits")
+        cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
         total_count = cursor.fetchone()[0]
-        
-        # 各州统计
-        cursor.execute("""
-            SELECT st, COUNT(*) as count 
-            FROM nonprofits 
-            WHERE st IS NOT NULL 
-            GROUP BY st 
-            ORDER BY count DESC 
+
+        # 各州统计（前10）
+        cursor.execute(f"""
+            SELECT st, COUNT(*) as count
+            FROM "{table_name}"
+            WHERE st IS NOT NULL AND st != ''
+            GROUP BY st
+            ORDER BY count DESC
             LIMIT 10
         """)
         st_stats = dict(cursor.fetchall())
-        
+
         # 收入统计
-        cursor.execute("""
-            SELECT 
+        cursor.execute(f"""
+            SELECT
                 MIN(part_i_summary_12_total_revenue_cy) as min_income,
                 MAX(part_i_summary_12_total_revenue_cy) as max_income,
                 AVG(part_i_summary_12_total_revenue_cy) as avg_income,
                 COUNT(CASE WHEN part_i_summary_12_total_revenue_cy > 0 THEN 1 END) as non_zero_income_count
-            FROM nonprofits
+            FROM "{table_name}"
         """)
         income_stats = cursor.fetchone()
-        
-        conn.close()
-        
+
+    return {
+        "total_records": total_count,
+        "st_distribution": st_stats,
+        "income_statistics": {
+            "min": income_stats[0],
+            "max": income_stats[1],
+            "avg": income_stats[2],
+            "non_zero_count": income_stats[3]
+        },
+        "last_updated": datetime.now().isoformat()
+    }
+
+def get_database_stats() -> Dict[str, Any]:
+    """
+    获取数据库统计信息
+    
+    Returns:
+        数据库统计信息
+    """
+    try:
+        if not cube_has_rows("default"):
+            # 旧库尚未生成统计立方体时退回全表扫描（python summary_cube.py 可补建）
+            return scan_database_stats(resolve_table_name("default"))
+
+        # 从统计立方体汇总，不再对 nonprofits 全表扫描
+        summary = slice_cube("default", group_by=["st"])
+        totals = summary["totals"]
+
+        # 各州统计（前10）
+        st_counts = [(group["st"], group["record_count"]) for group in summary["groups"] if group["st"]]
+        st_stats = dict(sorted(st_counts, key=lambda item: item[1], reverse=True)[:10])
+
         return {
-            "total_records": total_count,
+            "total_records": totals["record_count"],
             "st_distribution": st_stats,
             "income_statistics": {
-                "min": income_stats[0],
-                "max": income_stats[1],
-                "avg": income_stats[2],
-                "non_zero_count": income_stats[3]
+                "min": totals["revenue"]["min"],
+                "max": totals["revenue"]["max"],
+                "avg": totals["revenue"]["avg"],
+                "non_zero_count": totals["positive_revenue"]["count"]
             },
             "last_updated": datetime.now().isoformat()
         }
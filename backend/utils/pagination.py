@@ -0,0 +1,83 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# (column, "ASC" | "DESC"); rowid is always appended as the final tiebreaker so
+# every row has a unique position in the ordering. It follows the direction of
+# the last key: an index on (..., column) stores ties in rowid order, so
+# "column DESC, rowid DESC" can be read straight off the index.
+SortKey = Tuple[str, str]
+ROWID_COLUMN = "_rowid"
+
+
+def rowid_direction(sort_keys: Sequence[SortKey]) -> str:
+    return sort_keys[-1][1] if sort_keys else "ASC"
+
+
+def order_by_clause(sort_keys: Sequence[SortKey]) -> str:
+    keys = [f'"{column}" {direction}' for column, direction in sort_keys]
+    return ", ".join(keys + [f"rowid {rowid_direction(sort_keys)}"])
+
+
+def encode_cursor(sort_keys: Sequence[SortKey], row: Dict[str, Any]) -> str:
+    """Opaque token holding the sort values and rowid of the last row on a page."""
+    payload = {
+        "keys": [[column, direction] for column, direction in sort_keys],
+        "values": [row[column] for column, _ in sort_keys],
+        "rowid": row[ROWID_COLUMN],
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str, sort_keys: Sequence[SortKey]) -> Tuple[List[Any], int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8"))
+        keys = [tuple(key) for key in payload["keys"]]
+        values, rowid = list(payload["values"]), int(payload["rowid"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if keys != list(sort_keys) or len(values) != len(keys):
+        raise ValueError("Cursor does not match the requested sort order")
+    return values, rowid
+
+
+def keyset_condition(sort_keys: Sequence[SortKey], values: Sequence[Any], rowid: int) -> Tuple[str, List[Any]]:
+    """
+    WHERE fragment selecting rows strictly after (values, rowid) in the given order.
+
+    Expanded as (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ... so NULLs,
+    which SQLite sorts first ascending and last descending, page correctly.
+    """
+    branches = []
+    params: List[Any] = []
+    prefix: List[str] = []
+    prefix_params: List[Any] = []
+    for (column, direction), value in zip(sort_keys, values):
+        quoted = f'"{column}"'
+        if value is None:
+            after = f"{quoted} IS NOT NULL" if direction == "ASC" else None
+            after_params: List[Any] = []
+        elif direction == "ASC":
+            after, after_params = f"{quoted} > ?", [value]
+        else:
+            after, after_params = f"({quoted} < ? OR {quoted} IS NULL)", [value]
+        if after is not None:
+            branches.append("(" + " AND ".join(prefix + [after]) + ")")
+            params.extend(prefix_params + after_params)
+        prefix.append(f"{quoted} IS ?")
+        prefix_params.append(value)
+    rowid_after = "rowid > ?" if rowid_direction(sort_keys) == "ASC" else "rowid < ?"
+    branches.append("(" + " AND ".join(prefix + [rowid_after]) + ")")
+    params.extend(prefix_params + [rowid])
+    return "(" + " OR ".join(branches) + ")", params
+
+
+def page_rows(rows: List[Dict[str, Any]], sort_keys: Sequence[SortKey], page_size: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Split a page_size + 1 fetch into the page and the next cursor (None on the last page)."""
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = encode_cursor(sort_keys, rows[-1]) if has_more and rows else None
+    for row in rows:
+        row.pop(ROWID_COLUMN, None)
+    return rows, next_cursor
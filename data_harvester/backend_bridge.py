@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+
+# The harvester scripts run from this folder, while the database helpers live in
+# ../backend as top-level modules. Appending (not prepending) keeps harvester
+# modules first on the path if names ever collide.
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
@@ -1,5 +1,6 @@
-﻿import logging
-import re
+﻿import argparse
+import logging
+import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
@@ -7,10 +8,15 @@ from pathlib import Path
 import pandas as pd
 import requests
 
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from field_normalization import normalize_ein
+from harvest_sinks import CsvSink, HarvestSink, iter_completed
+
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-BASE_URL = "https://990-infrastructure.gtdata.org/"
+# GT_API_BASE_URL points the harvester at another host, e.g. mock_api_server.py
+BASE_URL = os.environ.get("GT_API_BASE_URL", "https://990-infrastructure.gtdata.org/")
 API_ENDPOINT = "irs-data/990basic120fields"
 SCRIPT_DIR = Path(__file__).resolve().parent
 CSV_FILE_PATH = SCRIPT_DIR.parent / "backend" / "data" / "nonprofits_100.csv"
@@ -20,17 +26,6 @@ SHEET_NAME = "990 Basic 120 Fields "
 DEFAULT_WORKERS = 8
 
 
-def normalize_ein(value) -> str:
-    if pd.isna(value):
-        return ""
-    digits = re.sub(r"\D", "", str(value))
-    if not digits:
-        return ""
-    if len(digits) > 9:
-        digits = digits[-9:]
-    return digits.zfill(9)
-
-
 def build_session() -> requests.Session:
     session = requests.Session()
     session.trust_env = False
@@ -73,9 +68,9 @@ def extract_results(payload: dict) -> list:
     return results if isinstance(results, list) else []
 
 
-def fetch_all_data_for_ein(session: requests.Session, ein: str) -> tuple[str, list, str]:
+def fetch_all_data_for_ein(session: requests.Session, ein: str, base_url: str = BASE_URL) -> tuple[str, list, str]:
     try:
-        response = session.get(BASE_URL + API_ENDPOINT, params={"ein": ein}, timeout=30)
+        response = session.get(base_url.rstrip("/") + "/" + API_ENDPOINT, params={"ein": ein}, timeout=30)
         response.raise_for_status()
         results = extract_results(response.json())
         return ein, results, ""
@@ -87,14 +82,14 @@ def fetch_all_data_for_ein(session: requests.Session, ein: str) -> tuple[str, li
         return ein, [], str(exc)
 
 
-def fetch_all_targets(targets: pd.DataFrame, workers: int) -> tuple[list, pd.DataFrame]:
+def fetch_all_targets(targets: pd.DataFrame, workers: int, base_url: str = BASE_URL) -> tuple[list, pd.DataFrame]:
     session = build_session()
     all_records = []
     audit_rows = []
 
     with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
         future_map = {
-            executor.submit(fetch_all_data_for_ein, session, row.ein): row
+            executor.submit(fetch_all_data_for_ein, session, row.ein, base_url): row
             for row in targets.itertuples(index=False)
         }
         for future in as_completed(future_map):
@@ -117,6 +112,48 @@ def fetch_all_targets(targets: pd.DataFrame, workers: int) -> tuple[list, pd.Dat
     return all_records, audit_df
 
 
+def stream_all_targets(
+    targets: pd.DataFrame,
+    workers: int,
+    sink: HarvestSink,
+    mapping: dict,
+    base_url: str = BASE_URL,
+) -> tuple[int, pd.DataFrame]:
+    """
+    Like fetch_all_targets, but each EIN's records are renamed and written to sink
+    as soon as they arrive, so memory stays flat however many EINs are harvested.
+    """
+    session = build_session()
+    row_count = 0
+    audit_rows = []
+    workers = max(1, workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        completed = iter_completed(
+            executor,
+            lambda row: fetch_all_data_for_ein(session, row.ein, base_url),
+            targets.itertuples(index=False),
+            max_pending=workers * 2,
+        )
+        for row, (ein, records, error) in completed:
+            status = "ok" if records else ("error" if error else "empty")
+            sink.write([{mapping.get(key, key): value for key, value in record.items()} for record in records])
+            row_count += len(records)
+            audit_rows.append(
+                {
+                    "ein": ein,
+                    "target_company": row.company_name,
+                    "status": status,
+                    "record_count": len(records),
+                    "error": error,
+                }
+            )
+            logging.info("EIN %s -> %s (%s rows)", ein, status, len(records))
+
+    audit_df = pd.DataFrame(audit_rows).sort_values(by=["status", "ein"]).reset_index(drop=True)
+    return row_count, audit_df
+
+
 def rename_columns(df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
     renamed = df.rename(columns={col: mapping.get(col, col) for col in df.columns})
     renamed.sort_index(axis=1, inplace=True)
@@ -133,7 +170,37 @@ def export_outputs(df: pd.DataFrame, audit_df: pd.DataFrame) -> tuple[Path, Path
     return data_path, audit_path
 
 
+def build_stream_sink(mapping: dict) -> CsvSink:
+    # A streamed CSV can't widen its header later, so the columns are the data
+    # dictionary's (sorted like rename_columns) and unlisted fields are dropped.
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    date_tag = datetime.now().strftime("%Y%m%d")
+    return CsvSink(OUTPUT_DIR / f"all_nonprofits_data_{date_tag}.csv", sorted(set(mapping.values())))
+
+
+def export_audit(audit_df: pd.DataFrame) -> Path:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    date_tag = datetime.now().strftime("%Y%m%d")
+    audit_path = OUTPUT_DIR / f"bulk_harvest_audit_{date_tag}.csv"
+    audit_df.to_csv(audit_path, index=False, encoding="utf-8-sig")
+    return audit_path
+
+
+def print_audit_counts(audit_df: pd.DataFrame) -> None:
+    print(f"API ok: {int((audit_df['status'] == 'ok').sum())}")
+    print(f"API empty: {int((audit_df['status'] == 'empty').sum())}")
+    print(f"API error: {int((audit_df['status'] == 'error').sum())}")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest GT 990 basic fields for the target EINs.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write rows to a CSV as each EIN completes instead of one XLSX at the end.",
+    )
+    args = parser.parse_args()
+
     print("====== Bulk GT Data Harvest ======")
 
     targets = get_targets_from_csv(CSV_FILE_PATH)
@@ -141,23 +208,29 @@ if __name__ == "__main__":
         raise SystemExit("No valid EINs found in target CSV.")
 
     column_mapping = load_column_mapping(DICTIONARY_FILE_PATH, SHEET_NAME)
-    all_companies_data, audit_df = fetch_all_targets(targets, workers=DEFAULT_WORKERS)
-
-    if not all_companies_data:
-        raise SystemExit("No data returned from GT API for the target list.")
-
-    df = pd.DataFrame(all_companies_data)
-    cleaned_df = rename_columns(df, column_mapping)
-    data_path, audit_path = export_outputs(cleaned_df, audit_df)
-
-    ok_count = int((audit_df["status"] == "ok").sum())
-    empty_count = int((audit_df["status"] == "empty").sum())
-    error_count = int((audit_df["status"] == "error").sum())
-
-    print(f"Target EINs: {len(targets)}")
-    print(f"Returned rows: {len(cleaned_df)}")
-    print(f"API ok: {ok_count}")
-    print(f"API empty: {empty_count}")
-    print(f"API error: {error_count}")
-    print(f"Saved combined export: {data_path}")
-    print(f"Saved audit export: {audit_path}")
+
+    if args.stream:
+        with build_stream_sink(column_mapping) as sink:
+            row_count, audit_df = stream_all_targets(targets, DEFAULT_WORKERS, sink, column_mapping)
+        audit_path = export_audit(audit_df)
+
+        print(f"Target EINs: {len(targets)}")
+        print(f"Returned rows: {row_count}")
+        print_audit_counts(audit_df)
+        print(f"Saved streamed export: {sink.describe()}")
+        print(f"Saved audit export: {audit_path}")
+    else:
+        all_companies_data, audit_df = fetch_all_targets(targets, workers=DEFAULT_WORKERS)
+
+        if not all_companies_data:
+            raise SystemExit("No data returned from GT API for the target list.")
+
+        df = pd.DataFrame(all_companies_data)
+        cleaned_df = rename_columns(df, column_mapping)
+        data_path, audit_path = export_outputs(cleaned_df, audit_df)
+
+        print(f"Target EINs: {len(targets)}")
+        print(f"Returned rows: {len(cleaned_df)}")
+        print_audit_counts(audit_df)
+        print(f"Saved combined export: {data_path}")
+        print(f"Saved audit export: {audit_path}")
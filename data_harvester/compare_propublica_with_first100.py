@@ -7,6 +7,9 @@ from typing import Optional
 
 import pandas as pd
 
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from field_normalization import normalize_ein
+
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 ROOT_DIR = SCRIPT_DIR.parent
@@ -22,17 +25,6 @@ def latest_matching_file(pattern: str) -> Path:
     return matches[-1]
 
 
-def normalize_ein(value) -> str:
-    if pd.isna(value):
-        return ""
-    digits = re.sub(r"\D", "", str(value))
-    if not digits:
-        return ""
-    if len(digits) > 9:
-        digits = digits[-9:]
-    return digits.zfill(9)
-
-
 def normalize_name(value: str) -> str:
     text = re.sub(r"[^a-z0-9 ]+", " ", str(value).lower())
     return re.sub(r"\s+", " ", text).strip()
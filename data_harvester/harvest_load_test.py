@@ -0,0 +1,118 @@
+"""
+Offline load test for the harvesters.
+
+Starts mock_api_server.py in-process, builds a target list of synthetic EINs, runs
+propublica_poc_harvester.fetch_all_targets and bulk_data_harvester.fetch_all_targets
+against it and reports EINs/second plus the status mix seen by the harvester and
+the server (so 429s and 500s injected by the mock are visible next to the throughput).
+
+Usage:
+    python harvest_load_test.py --eins 2000 --workers 6 --latency-ms 80 --throttle-rate 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from dataclasses import asdict
+from typing import Any
+
+import pandas as pd
+
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+import bulk_data_harvester
+import propublica_poc_harvester
+from benchmarks.synthetic_data import EIN_OFFSET, EIN_STRIDE
+from mock_api_server import MockApiServer, add_config_arguments, config_from_args
+
+
+HARVESTERS = ("propublica", "gt")
+
+
+def synthetic_targets(count: int, unknown_rate: float = 0.0) -> pd.DataFrame:
+    """Target list in the shape get_targets_from_csv returns; unknown_rate of the EINs 404."""
+    org_ids = pd.Series(range(count))
+    eins = (org_ids * EIN_STRIDE + EIN_OFFSET).astype(str).str.zfill(9)
+    unknown = org_ids < int(count * unknown_rate)
+    # Off-stride EINs never map back to a synthetic organization
+    eins[unknown] = (org_ids[unknown] * EIN_STRIDE + EIN_OFFSET + 1).astype(str).str.zfill(9)
+    return pd.DataFrame({"company_name": "Synthetic " + org_ids.astype(str), "ein": eins})
+
+
+def run_propublica(server: MockApiServer, targets: pd.DataFrame, workers: int, timeout: int) -> dict[str, Any]:
+    start = time.perf_counter()
+    filings_df, audit_df = propublica_poc_harvester.fetch_all_targets(
+        targets, timeout=timeout, workers=workers, base_url=server.propublica_base_url
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "rows": len(filings_df),
+        "harvester_status": audit_df["status"].value_counts().to_dict() if not audit_df.empty else {},
+    }
+
+
+def run_gt(server: MockApiServer, targets: pd.DataFrame, workers: int, timeout: int) -> dict[str, Any]:
+    start = time.perf_counter()
+    records, audit_df = bulk_data_harvester.fetch_all_targets(targets, workers=workers, base_url=server.gt_base_url)
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "rows": len(records),
+        "harvester_status": audit_df["status"].value_counts().to_dict() if not audit_df.empty else {},
+    }
+
+
+RUNNERS = {"propublica": run_propublica, "gt": run_gt}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the harvesters against the local mock API and report EINs/sec.")
+    parser.add_argument("--eins", type=int, default=500, help="Number of target EINs.")
+    parser.add_argument("--unknown-rate", type=float, default=0.0, help="Fraction of targets the mock answers 404.")
+    parser.add_argument("--harvesters", default=",".join(HARVESTERS), help="Comma-separated: propublica, gt.")
+    parser.add_argument("--workers", type=int, default=propublica_poc_harvester.DEFAULT_WORKERS)
+    parser.add_argument("--timeout", type=int, default=30, help="HTTP timeout seconds.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the harvesters' per-EIN INFO logging.")
+    parser.add_argument("--output", type=str, default="", help="Also write the results as JSON here.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    harvesters = [name.strip() for name in args.harvesters.split(",") if name.strip()]
+    unknown = sorted(set(harvesters) - set(HARVESTERS))
+    if unknown:
+        parser.error(f"Unknown harvester: {', '.join(unknown)}")
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    config = config_from_args(args)
+    targets = synthetic_targets(args.eins, args.unknown_rate)
+    results = {}
+    for name in harvesters:
+        # A fresh server per harvester so the status counts and rate limiter are not shared
+        with MockApiServer(config) as server:
+            result = RUNNERS[name](server, targets, args.workers, args.timeout)
+            result["server"] = server.stats.snapshot()
+        result["eins"] = len(targets)
+        result["eins_per_second"] = len(targets) / result["seconds"] if result["seconds"] else None
+        results[name] = result
+
+    print("====== Harvester Load Test ======")
+    print(f"Mock config: {json.dumps(asdict(config))}")
+    print(f"Workers: {args.workers}")
+    for name, result in results.items():
+        print(f"\n[{name}]")
+        print(f"EINs: {result['eins']}  Seconds: {result['seconds']:.2f}  EINs/sec: {result['eins_per_second']:.1f}")
+        print(f"Rows harvested: {result['rows']}")
+        print(f"Harvester status: {result['harvester_status']}")
+        print(f"Server responses: {result['server']['status']}  Bytes sent: {result['server']['bytes_sent']:,}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": asdict(config), "workers": args.workers, "results": results}, f, indent=2, default=str)
+        print(f"\nSaved results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
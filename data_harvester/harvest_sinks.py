@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import csv
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from db_utils import (
+    bump_table_version,
+    drop_shadow_tables,
+    ensure_index,
+    get_db_path,
+    prepare_shadow_table,
+    quote_identifier,
+    swap_tables,
+    validate_shadow_table,
+)
+
+
+DEFAULT_ROW_GROUP_SIZE = 10_000
+DEFAULT_COMMIT_EVERY = 5_000
+
+SQLITE_TYPES = {
+    "int": "INTEGER",
+    "float": "REAL",
+    "bool": "INTEGER",
+    "str": "TEXT",
+}
+
+
+class HarvestSink(ABC):
+    """Receives harvested rows as each EIN completes instead of at the end of the run."""
+
+    def __init__(self, columns: list[str], column_types: Optional[dict[str, str]] = None) -> None:
+        self.columns = list(columns)
+        self.column_types = dict(column_types or {})
+        self.rows_written = 0
+
+    @abstractmethod
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        """Persist one batch of canonical filing rows."""
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        """Called instead of close() when the harvest fails; keeps partial output by default."""
+        self.close()
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+    def __enter__(self) -> "HarvestSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvSink(HarvestSink):
+    def __init__(self, path: Path, columns: list[str], column_types: Optional[dict[str, str]] = None) -> None:
+        super().__init__(columns, column_types)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("w", newline="", encoding="utf-8-sig")
+        self._writer = csv.DictWriter(self._handle, fieldnames=self.columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._writer.writerows(rows)
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        if not self._handle.closed:
+            self._handle.close()
+
+    def describe(self) -> str:
+        return f"CSV {self.path}"
+
+
+class ParquetSink(HarvestSink):
+    ARROW_TYPES = {
+        "int": "int64",
+        "float": "float64",
+        "bool": "bool_",
+        "str": "string",
+    }
+
+    def __init__(
+        self,
+        path: Path,
+        columns: list[str],
+        column_types: Optional[dict[str, str]] = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> None:
+        super().__init__(columns, column_types)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet output requires pyarrow. Install with: pip install pyarrow") from exc
+
+        self._pa = pa
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = max(1, row_group_size)
+        self.schema = pa.schema(
+            [
+                (column, getattr(pa, self.ARROW_TYPES[self.column_types.get(column, "str")])())
+                for column in self.columns
+            ]
+        )
+        self._writer = pq.ParquetWriter(str(self.path), self.schema)
+        self._buffer: list[dict[str, Any]] = []
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = self._pa.Table.from_pylist(self._buffer, schema=self.schema)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._flush()
+        self._writer.close()
+        self._writer = None
+
+    def describe(self) -> str:
+        return f"Parquet {self.path}"
+
+
+class SqliteSink(HarvestSink):
+    """
+    Streams filings into a SQLite table, by default the backend's propublica_filings.
+
+    With replace=True the run is loaded into a shadow table and swapped in on
+    close() with db_utils.swap_tables, so the API keeps reading the previous
+    filings until the new set is complete. A run that wrote no rows, or was
+    aborted, leaves the live table untouched. With replace=False rows are
+    appended to the live table. Either way close() bumps the table's version
+    so cached API responses that include filings are invalidated.
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        column_types: Optional[dict[str, str]] = None,
+        db_path: Optional[Path] = None,
+        table_name: str = "propublica_filings",
+        replace: bool = True,
+        commit_every: int = DEFAULT_COMMIT_EVERY,
+    ) -> None:
+        super().__init__(columns, column_types)
+        # Same database as the API: IRS_DB_PATH, else backend/irs.db
+        self.db_path = Path(db_path if db_path is not None else get_db_path())
+        self.table_name = table_name
+        self.replace = replace
+        self.commit_every = max(1, commit_every)
+        self._pending = 0
+        self._conn = sqlite3.connect(self.db_path)
+        self._target = prepare_shadow_table(self._conn, table_name) if replace else table_name
+
+        table = quote_identifier(self._target)
+        column_defs = ", ".join(
+            f"{quote_identifier(column)} {SQLITE_TYPES[self.column_types.get(column, 'str')]}"
+            for column in self.columns
+        )
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+        self._conn.commit()
+        placeholders = ", ".join("?" for _ in self.columns)
+        column_list = ", ".join(quote_identifier(column) for column in self.columns)
+        self._insert_sql = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._conn.executemany(self._insert_sql, [tuple(row.get(column) for column in self.columns) for row in rows])
+        self.rows_written += len(rows)
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        if self.replace and not self.rows_written:
+            # Nothing harvested; swapping in an empty table would hide the previous filings
+            self.abort()
+            return
+        if "ein" in self.columns:
+            index_columns = ["ein"] + [column for column in ("tax_year",) if column in self.columns]
+            ensure_index(self._conn, self._target, f"idx_{self._target}_" + "_".join(index_columns), index_columns)
+        if self.replace:
+            validate_shadow_table(self._conn, self._target, self.columns, min_rows=self.rows_written)
+            # Also bumps the version the organizations API caches filings on
+            swap_tables(self._conn, {self.table_name: self._target})
+        else:
+            # The organizations API caches filings keyed on this version
+            bump_table_version(self._conn, self.table_name)
+            self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+    def abort(self) -> None:
+        if self._conn is None or not self.replace:
+            # Appended rows are already live; keep them like the file sinks do
+            self.close()
+            return
+        self._conn.rollback()
+        drop_shadow_tables(self._conn, self.table_name)
+        self._conn.close()
+        self._conn = None
+
+    def describe(self) -> str:
+        return f"SQLite {self.db_path} [{self.table_name}]"
+
+
+def iter_completed(
+    executor: Executor,
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_pending: int,
+) -> Iterator[tuple[Any, Any]]:
+    """Yield (item, result) pairs while keeping at most max_pending futures alive."""
+    iterator = iter(items)
+    pending: dict[Future, Any] = {}
+    max_pending = max(1, max_pending)
+
+    def submit_next() -> None:
+        for item in iterator:
+            pending[executor.submit(fn, item)] = item
+            return
+
+    while len(pending) < max_pending:
+        before = len(pending)
+        submit_next()
+        if len(pending) == before:
+            break
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            yield item, future.result()
+            submit_next()
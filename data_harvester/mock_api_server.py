@@ -0,0 +1,276 @@
+"""
+Local stand-in for the ProPublica and GT (gtdata.org) APIs, for offline harvester load tests.
+
+Serves
+  GET /nonprofits/api/v2/organizations/{ein}.json   ProPublica organization payload
+  GET /irs-data/990basic120fields?ein=...           GT 990 Basic 120 Fields response
+
+Payloads are generated on demand from backend/benchmarks/synthetic_data.py, so any
+synthetic EIN (see synthetic_data.ein_to_org_id) resolves and every other EIN is a 404.
+Latency, error rate, 429 throttling (random and/or a requests-per-second cap) and
+payload size (filings per organization, padding bytes) are configurable.
+
+Point the harvesters at it with --base-url / PROPUBLICA_API_BASE_URL and
+GT_API_BASE_URL, or use harvest_load_test.py which starts it in-process.
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from benchmarks.synthetic_data import (
+    FILINGS_PER_ORGANIZATION,
+    synthetic_organization_payload,
+)
+
+
+PROPUBLICA_PATH = re.compile(r"^/nonprofits/api/v2/organizations/(?P<ein>[0-9-]+)\.json$")
+GT_PATH = "/irs-data/990basic120fields"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# GT rows use the dictionary's variable names (reference/GTDC 990 API - Data Dictionary.xlsx)
+# for the fields the synthetic filing has, padded with null placeholders to the real width.
+GT_FIELD_COUNT = 120
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    max_rps: float = 0.0
+    retry_after: int = 1
+    filings_per_org: int = FILINGS_PER_ORGANIZATION
+    padding_bytes: int = 0
+    seed: int = 42
+
+
+class MockStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+        self.bytes_sent = 0
+
+    def record(self, status: int, size: int) -> None:
+        with self._lock:
+            key = str(status)
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.bytes_sent += size
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"requests": sum(self.counts.values()), "status": dict(self.counts), "bytes_sent": self.bytes_sent}
+
+
+class RateLimiter:
+    """Token bucket allowing max_rps requests per second with a one-second burst."""
+
+    def __init__(self, max_rps: float) -> None:
+        self.max_rps = max_rps
+        self._tokens = max_rps
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.max_rps <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps, self._tokens + (now - self._updated) * self.max_rps)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+def gt_results(ein: str, config: MockConfig) -> Optional[list[dict[str, Any]]]:
+    """GT rows (one per filing) for a synthetic EIN; None if the EIN is unknown."""
+    payload = synthetic_organization_payload(ein, config.seed, config.filings_per_org)
+    if payload is None:
+        return None
+    organization = payload["organization"]
+    results = []
+    for filing in payload["filings_with_data"]:
+        year, month = divmod(filing["tax_prd"], 100)
+        row: dict[str, Any] = {
+            "FILEREIN": ein,
+            "FILERNAME1": organization["name"],
+            "TAXYEAR": year,
+            "TAXPERBEGIN": f"{year - 1 if month < 12 else year}-{month % 12 + 1:02d}-01",
+            "TAXPEREND": f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}",
+            "URL": None,
+            "FILERUSCITY": organization["city"],
+            "FILERUSSTATE": organization["state"],
+            "FILERUSZIP": organization["zipcode"],
+            "TOTAEMPLCNTN": filing["noemployees"],
+            "TOTREVCURYEA": filing["totrevenue"],
+            "TOTEXPCURYEA": filing["totfuncexpns"],
+            "TOTFUNEXPTOT": filing["totfuncexpns"],
+            "TOASEOOYY": filing["totassetsend"],
+            "TOLIEOOYY": filing["totliabend"],
+            "NAFBEOY": filing["totnetassetend"],
+        }
+        for index in range(len(row), GT_FIELD_COUNT):
+            row[f"FIELD{index:03d}"] = None
+        results.append(row)
+    return results
+
+
+def build_handler(config: MockConfig, stats: MockStats, limiter: RateLimiter):
+    padding = "x" * config.padding_bytes
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+
+    def roll() -> float:
+        with rng_lock:
+            return rng.random()
+
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+        def send_json(self, status: int, body: Any, headers: Optional[dict[str, str]] = None) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+            stats.record(status, len(data))
+
+        def do_GET(self) -> None:  # noqa: N802
+            if config.latency_ms or config.latency_jitter_ms:
+                time.sleep(max(0.0, config.latency_ms + (roll() * 2 - 1) * config.latency_jitter_ms) / 1000)
+
+            if not limiter.allow() or roll() < config.throttle_rate:
+                self.send_json(429, {"error": "Too Many Requests"}, {"Retry-After": str(config.retry_after)})
+                return
+            if roll() < config.error_rate:
+                self.send_json(500, {"error": "Internal Server Error"})
+                return
+
+            url = urlparse(self.path)
+            match = PROPUBLICA_PATH.match(url.path)
+            if match:
+                payload = synthetic_organization_payload(match.group("ein"), config.seed, config.filings_per_org)
+                if payload is None:
+                    self.send_json(404, {"status": "404", "error": "Not Found"})
+                    return
+                if padding:
+                    payload["padding"] = padding
+                self.send_json(200, payload)
+                return
+
+            if url.path == GT_PATH:
+                ein = (parse_qs(url.query).get("ein") or [""])[0]
+                results = gt_results(ein, config) or []
+                body: dict[str, Any] = {"query": {"ein": ein}, "results": results}
+                if padding:
+                    body["padding"] = padding
+                self.send_json(200, {"statusCode": 200, "body": body})
+                return
+
+            self.send_json(404, {"error": f"Unknown path {url.path}"})
+
+    return MockHandler
+
+
+class MockApiServer:
+    """ThreadingHTTPServer running in a background thread; port 0 picks a free port."""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = DEFAULT_HOST, port: int = 0) -> None:
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        handler = build_handler(self.config, self.stats, RateLimiter(self.config.max_rps))
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def propublica_base_url(self) -> str:
+        return f"{self.url}/nonprofits/api/v2"
+
+    @property
+    def gt_base_url(self) -> str:
+        return f"{self.url}/"
+
+    def start(self) -> "MockApiServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockApiServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = MockConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Base response delay.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=defaults.latency_jitter_ms, help="Uniform +/- jitter.")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of 500 responses.")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="Fraction of random 429s.")
+    parser.add_argument("--max-rps", type=float, default=defaults.max_rps, help="429 above this rate. 0 disables.")
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after, help="Retry-After seconds on 429.")
+    parser.add_argument(
+        "--filings-per-org", type=int, default=defaults.filings_per_org, help="Filings in each payload."
+    )
+    parser.add_argument("--padding-bytes", type=int, default=defaults.padding_bytes, help="Extra bytes per payload.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(**{name: getattr(args, name) for name in asdict(MockConfig())})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic ProPublica / GT API responses locally.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockApiServer(config_from_args(args), args.host, args.port)
+    print(f"ProPublica base URL: {server.propublica_base_url}")
+    print(f"GT base URL: {server.gt_base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats.snapshot()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pandas as pd
+
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from db_utils import get_connection, get_db_path, resolve_table_name
+from harvest_sinks import HarvestSink
+from propublica_mapper import CANONICAL_COLUMN_TYPES, CANONICAL_COLUMNS
+from propublica_pipeline import normalize_dataframe, upsert_backend_rows
+from propublica_to_backend_snapshot import build_backend_snapshot_from_filings, load_target_lookup
+
+
+DEFAULT_BATCH_EINS = 200
+
+
+class BackendIngestSink(HarvestSink):
+    """
+    Upserts canonical filing rows straight into the backend ProPublica table.
+
+    Rows are buffered per EIN so that per-organization aggregates (filing
+    count, 2024+/2025+ flags) see the full filing history, then go through the
+    same build_backend_snapshot_from_filings + normalize_dataframe path as the
+    CSV import.
+    """
+
+    def __init__(self, dataset: str = "propublica", batch_eins: int = DEFAULT_BATCH_EINS) -> None:
+        super().__init__(CANONICAL_COLUMNS, CANONICAL_COLUMN_TYPES)
+        self.dataset = dataset
+        self.table_name = resolve_table_name(dataset)
+        self.batch_eins = max(1, batch_eins)
+        self.target_lookup = load_target_lookup()
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0, "removed_placeholders": 0}
+        self._buffer: list[dict[str, Any]] = []
+        self._buffered_eins = 0
+        self._conn = get_connection()
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self._buffer.extend(rows)
+        self._buffered_eins += 1
+        if self._buffered_eins >= self.batch_eins:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        filings_df = pd.DataFrame(self._buffer, columns=self.columns)
+        backend_df = normalize_dataframe(build_backend_snapshot_from_filings(filings_df, self.target_lookup))
+        with self._conn:
+            batch_counts = upsert_backend_rows(self._conn, self.table_name, backend_df)
+        for key, value in batch_counts.items():
+            self.counts[key] += value
+        self.rows_written += len(backend_df)
+        self._buffer = []
+        self._buffered_eins = 0
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._flush()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def describe(self) -> str:
+        return (
+            f"SQLite {get_db_path()} [{self.table_name}] (upsert: {self.counts['inserted']} inserted, "
+            f"{self.counts['updated']} updated, {self.counts['unchanged']} unchanged, "
+            f"{self.counts['removed_placeholders']} placeholders removed)"
+        )
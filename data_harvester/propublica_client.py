@@ -1,10 +1,12 @@
 import json
+import os
 from typing import Any
 
 import requests
 
 
-BASE_URL = "https://projects.propublica.org/nonprofits/api/v2"
+# PROPUBLICA_API_BASE_URL points the harvesters at another host, e.g. mock_api_server.py
+BASE_URL = os.environ.get("PROPUBLICA_API_BASE_URL", "https://projects.propublica.org/nonprofits/api/v2").rstrip("/")
 DEFAULT_TIMEOUT = 30
 
 
@@ -27,8 +29,9 @@ def fetch_organization_payload(
     session: requests.Session,
     ein: str,
     timeout: int = DEFAULT_TIMEOUT,
+    base_url: str = BASE_URL,
 ) -> dict[str, Any]:
-    response = session.get(f"{BASE_URL}/organizations/{ein}.json", timeout=timeout)
+    response = session.get(f"{base_url}/organizations/{ein}.json", timeout=timeout)
     response.raise_for_status()
     try:
         payload = response.json()
@@ -1,22 +1,22 @@
 import argparse
+import sqlite3
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from db_utils import get_db_path, quote_identifier
+from field_normalization import normalize_eins, normalize_form_types
+
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 OUTPUT_DIR = SCRIPT_DIR / "output" / "propublica"
 REPORT_DIR = OUTPUT_DIR / "reports"
 TARGET_CSV = SCRIPT_DIR.parent / "backend" / "data" / "nonprofits_100.csv"
-FORM_TYPE_CODE_MAP = {
-    "0": "990",
-    "0.0": "990",
-    "1": "990EO",
-    "1.0": "990EO",
-    "2": "990PF",
-    "2.0": "990PF",
-}
+FILINGS_TABLE = "propublica_filings"
 
 
 def latest_matching_file(pattern: str) -> Path:
@@ -27,8 +27,7 @@ def latest_matching_file(pattern: str) -> Path:
 
 
 def normalize_ein_series(series: pd.Series) -> pd.Series:
-    cleaned = series.where(series.notna(), "").astype(str).str.replace(r"\D", "", regex=True).str[-9:]
-    cleaned = cleaned.where(cleaned != "", "").str.zfill(9)
+    cleaned = normalize_eins(series)
     return cleaned.where(cleaned != "000000000", "")
 
 
@@ -47,19 +46,15 @@ def load_targets(path: Path) -> pd.DataFrame:
 
 
 def load_filings(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, dtype={"ein": str, "form_type": str})
+    return normalize_filings(pd.read_csv(path, dtype={"ein": str, "form_type": str}))
+
+
+def normalize_filings(df: pd.DataFrame) -> pd.DataFrame:
     df["ein"] = normalize_ein_series(df["ein"])
     df["tax_year"] = pd.to_numeric(df["tax_year"], errors="coerce").astype("Int64")
     df["filing_date"] = pd.to_datetime(df["filing_date"], errors="coerce")
     if "form_type" in df.columns:
-        df["form_type"] = (
-            df["form_type"]
-            .where(df["form_type"].notna(), "")
-            .astype(str)
-            .str.strip()
-            .replace({"nan": "", "None": ""})
-            .replace(FORM_TYPE_CODE_MAP)
-        )
+        df["form_type"] = normalize_form_types(df["form_type"])
     numeric_cols = ["total_revenue", "total_expenses", "total_assets", "net_assets", "employee_count"]
     for col in numeric_cols:
         if col in df.columns:
@@ -67,19 +62,96 @@ def load_filings(path: Path) -> pd.DataFrame:
     return df
 
 
-def select_latest_filings(filings_df: pd.DataFrame) -> pd.DataFrame:
-    working = filings_df.copy()
-    working["form_type_sort"] = pd.to_numeric(working["form_type"], errors="coerce")
-    working = working.sort_values(
-        by=["ein", "tax_year", "filing_date", "form_type_sort"],
-        ascending=[True, False, False, True],
-        na_position="last",
-    )
-    latest = working.drop_duplicates(subset=["ein"], keep="first").reset_index(drop=True)
+def latest_filing_key(filings_df: pd.DataFrame) -> np.ndarray:
+    """
+    One int64 per filing that is larger for the filing to prefer within an EIN:
+    latest tax_year, then latest filing_date, then the lowest numeric form type,
+    with missing values losing to any real value.
+
+    Each part is replaced by its dense code from a sorted factorize, so the
+    combined key stays small enough for int64 and one groupby can pick the
+    winner without sorting the frame.
+    """
+    year_codes, years = pd.factorize(filings_df["tax_year"], sort=True)
+    date_codes, dates = pd.factorize(filings_df["filing_date"], sort=True)
+    # Only a handful of distinct form types: convert those, then map the codes back
+    type_codes, types = pd.factorize(filings_df["form_type"])
+    unique_form_codes, forms = pd.factorize(pd.to_numeric(pd.Series(types), errors="coerce"), sort=True)
+    form_codes = np.append(unique_form_codes, -1)[type_codes]
+    # Missing values factorize to -1, so +1 ranks them below every real value
+    year_rank = year_codes.astype(np.int64) + 1
+    date_rank = date_codes.astype(np.int64) + 1
+    # Lower form types win, so invert their order
+    form_rank = np.where(form_codes < 0, 0, len(forms) - form_codes).astype(np.int64)
+    return (year_rank * (len(dates) + 1) + date_rank) * (len(forms) + 1) + form_rank
+
+
+def add_latest_columns(latest: pd.DataFrame) -> pd.DataFrame:
     latest["latest_available"] = latest["tax_year"].notna()
     latest["revenue_minus_expenses"] = latest["total_revenue"] - latest["total_expenses"]
     latest["asset_minus_net_assets"] = latest["total_assets"] - latest["net_assets"]
-    return latest.drop(columns=["form_type_sort"])
+    return latest
+
+
+def select_latest_filings(filings_df: pd.DataFrame, per_ein: int = 1) -> pd.DataFrame:
+    """
+    Latest filing per EIN (see latest_filing_key), ordered by EIN. Ties keep the
+    first filing in input order.
+
+    With per_ein > 1 the latest per_ein filings of each EIN are returned, newest
+    first, with their position in filing_rank (1 = latest).
+    """
+    key = pd.Series(latest_filing_key(filings_df))
+    grouped = key.groupby(filings_df["ein"].to_numpy(), sort=True, dropna=False)
+    if per_ein <= 1:
+        positions = grouped.idxmax().to_numpy()
+        return add_latest_columns(filings_df.iloc[positions].reset_index(drop=True))
+
+    rank = grouped.rank(method="first", ascending=False).to_numpy(dtype=np.int64)
+    selected = np.flatnonzero(rank <= per_ein)
+    order = selected[np.lexsort((rank[selected], grouped.ngroup().to_numpy()[selected]))]
+    latest = filings_df.iloc[order].reset_index(drop=True)
+    latest["filing_rank"] = rank[order]
+    return add_latest_columns(latest)
+
+
+def select_latest_filings_sql(
+    db_path: Optional[Path] = None,
+    table_name: str = FILINGS_TABLE,
+    per_ein: int = 1,
+) -> pd.DataFrame:
+    """
+    Same selection as select_latest_filings, done in SQLite with ROW_NUMBER() over
+    a filings table written by harvest_sinks.SqliteSink, so only the selected rows
+    are loaded. filing_date is compared as text, which matches the ISO dates the
+    harvester stores. db_path defaults to the API's database (IRS_DB_PATH or
+    backend/irs.db), where SqliteSink writes by default.
+    """
+    table = quote_identifier(table_name)
+    # Numeric form types only (990 sorts, 990EO / 990PF count as missing), like pd.to_numeric
+    form_type_sort = (
+        "CASE WHEN trim(form_type) <> '' AND trim(form_type) NOT GLOB '*[^0-9.]*' "
+        "THEN CAST(form_type AS REAL) END"
+    )
+    sql = f"""
+        SELECT * FROM (
+            SELECT f.*, ROW_NUMBER() OVER (
+                PARTITION BY ein
+                ORDER BY tax_year DESC NULLS LAST,
+                         NULLIF(filing_date, '') DESC NULLS LAST,
+                         {form_type_sort} ASC NULLS LAST,
+                         f.rowid
+            ) AS filing_rank
+            FROM {table} AS f
+        )
+        WHERE filing_rank <= ?
+        ORDER BY ein, filing_rank
+    """
+    with sqlite3.connect(db_path if db_path is not None else get_db_path()) as conn:
+        latest = pd.read_sql_query(sql, conn, params=(max(per_ein, 1),), dtype={"ein": str, "form_type": str})
+    if per_ein <= 1:
+        latest = latest.drop(columns=["filing_rank"])
+    return add_latest_columns(normalize_filings(latest))
 
 
 def build_snapshot(targets_df: pd.DataFrame, latest_df: pd.DataFrame, audit_df: pd.DataFrame) -> pd.DataFrame:
@@ -101,9 +173,12 @@ def build_snapshot(targets_df: pd.DataFrame, latest_df: pd.DataFrame, audit_df:
     merged["record_status"] = merged["status"].fillna("missing")
     merged["latest_tax_year"] = pd.to_numeric(merged["latest_tax_year"], errors="coerce").astype("Int64")
     merged["tax_year"] = pd.to_numeric(merged["tax_year"], errors="coerce").astype("Int64")
+    # Trend snapshots (latest N filings per EIN) keep each filing's rank next to the EIN
+    rank_columns = ["filing_rank"] if "filing_rank" in merged.columns else []
     return merged[
         [
             "ein",
+            *rank_columns,
             "target_company",
             "organization_name",
             "target_city",
@@ -127,13 +202,13 @@ def build_snapshot(targets_df: pd.DataFrame, latest_df: pd.DataFrame, audit_df:
             "source",
             "raw_available",
         ]
-    ].sort_values(by=["record_status", "ein"]).reset_index(drop=True)
+    ].sort_values(by=["record_status", "ein", *rank_columns], kind="stable").reset_index(drop=True)
 
 
-def save_snapshot(snapshot_df: pd.DataFrame) -> tuple[Path, Path]:
+def save_snapshot(snapshot_df: pd.DataFrame, name: str = "propublica_latest_snapshot") -> tuple[Path, Path]:
     date_tag = datetime.now().strftime("%Y%m%d")
-    csv_path = OUTPUT_DIR / f"propublica_latest_snapshot_{date_tag}.csv"
-    xlsx_path = OUTPUT_DIR / f"propublica_latest_snapshot_{date_tag}.xlsx"
+    csv_path = OUTPUT_DIR / f"{name}_{date_tag}.csv"
+    xlsx_path = OUTPUT_DIR / f"{name}_{date_tag}.xlsx"
     snapshot_df.to_csv(csv_path, index=False, encoding="utf-8-sig")
     excel_df = snapshot_df.copy()
     if "filing_date" in excel_df.columns:
@@ -142,7 +217,7 @@ def save_snapshot(snapshot_df: pd.DataFrame) -> tuple[Path, Path]:
         excel_df.to_excel(xlsx_path, index=False)
     except PermissionError:
         time_tag = datetime.now().strftime("%Y%m%d_%H%M%S")
-        xlsx_path = OUTPUT_DIR / f"propublica_latest_snapshot_{time_tag}.xlsx"
+        xlsx_path = OUTPUT_DIR / f"{name}_{time_tag}.xlsx"
         excel_df.to_excel(xlsx_path, index=False)
     return csv_path, xlsx_path
 
@@ -191,24 +266,45 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Build latest-filing ProPublica snapshot from existing harvest outputs.")
     parser.add_argument("--filings", type=str, default="", help="Optional filings CSV path.")
     parser.add_argument("--audit", type=str, default="", help="Optional audit CSV path.")
+    parser.add_argument(
+        "--filings-db",
+        type=str,
+        default="",
+        help="Select from a SQLite filings table (harvester --sink sqlite) with a window query instead of a CSV.",
+    )
+    parser.add_argument("--filings-table", type=str, default=FILINGS_TABLE, help="Filings table in --filings-db.")
+    parser.add_argument(
+        "--latest-n",
+        type=int,
+        default=1,
+        help="Keep the latest N filings per EIN (trend view, adds filing_rank). Defaults to 1.",
+    )
     args = parser.parse_args()
+    if args.latest_n < 1:
+        parser.error("--latest-n must be at least 1")
 
-    filings_path = Path(args.filings) if args.filings else latest_matching_file("propublica_filings_*.csv")
     audit_path = Path(args.audit) if args.audit else latest_matching_file("propublica_audit_*.csv")
-
     targets_df = load_targets(TARGET_CSV)
-    filings_df = load_filings(filings_path)
+    if args.filings_db:
+        filings_source = f"{args.filings_db} [{args.filings_table}]"
+        latest_df = select_latest_filings_sql(Path(args.filings_db), args.filings_table, args.latest_n)
+    else:
+        filings_path = Path(args.filings) if args.filings else latest_matching_file("propublica_filings_*.csv")
+        filings_source = str(filings_path)
+        latest_df = select_latest_filings(load_filings(filings_path), args.latest_n)
     audit_df = pd.read_csv(audit_path, dtype={"ein": str})
-    latest_df = select_latest_filings(filings_df)
     snapshot_df = build_snapshot(targets_df, latest_df, audit_df)
-    csv_path, xlsx_path = save_snapshot(snapshot_df)
-    report_path = save_report(snapshot_df)
+    name = "propublica_latest_snapshot" if args.latest_n == 1 else f"propublica_latest{args.latest_n}_snapshot"
+    csv_path, xlsx_path = save_snapshot(snapshot_df, name)
+    # The report describes each EIN's latest filing only
+    latest_only = snapshot_df[snapshot_df["filing_rank"].fillna(1) == 1] if args.latest_n > 1 else snapshot_df
+    report_path = save_report(latest_only)
 
     print("====== ProPublica Latest Snapshot ======")
-    print(f"Input filings: {filings_path}")
+    print(f"Input filings: {filings_source}")
     print(f"Input audit: {audit_path}")
     print(f"Snapshot rows: {len(snapshot_df)}")
-    print(f"Rows with latest filing: {int(snapshot_df['tax_year'].notna().sum())}")
+    print(f"Rows with latest filing: {int(latest_only['tax_year'].notna().sum())}")
     print(f"Saved snapshot CSV: {csv_path}")
     print(f"Saved snapshot XLSX: {xlsx_path}")
     print(f"Saved report MD: {report_path}")
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from typing import Any
 
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from field_normalization import FORM_TYPE_CODE_MAP
+
 
 CANONICAL_COLUMNS = [
     "source",
@@ -20,16 +23,23 @@ CANONICAL_COLUMNS = [
     "raw_available",
 ]
 
-FORM_TYPE_CODE_MAP = {
-    "0": "990",
-    "0.0": "990",
-    "1": "990EO",
-    "1.0": "990EO",
-    "2": "990PF",
-    "2.0": "990PF",
+CANONICAL_COLUMN_TYPES = {
+    "source": "str",
+    "ein": "str",
+    "organization_name": "str",
+    "tax_year": "int",
+    "filing_date": "str",
+    "tax_prd": "str",
+    "form_type": "str",
+    "total_revenue": "float",
+    "total_expenses": "float",
+    "total_assets": "float",
+    "net_assets": "float",
+    "employee_count": "float",
+    "is_latest_filing_for_ein": "bool",
+    "raw_available": "bool",
 }
 
-
 def clean_number(value: Any) -> int | float | None:
     if value in (None, ""):
         return None
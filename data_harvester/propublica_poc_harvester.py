@@ -1,6 +1,5 @@
 import argparse
 import logging
-import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
@@ -8,8 +7,16 @@ from pathlib import Path
 import pandas as pd
 import requests
 
-from propublica_client import build_session, fetch_organization_payload
-from propublica_mapper import CANONICAL_COLUMNS, payload_to_canonical_rows, summarize_payload
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from field_normalization import normalize_ein
+from harvest_sinks import CsvSink, HarvestSink, ParquetSink, SqliteSink, iter_completed
+from propublica_client import BASE_URL, build_session, fetch_organization_payload
+from propublica_mapper import (
+    CANONICAL_COLUMN_TYPES,
+    CANONICAL_COLUMNS,
+    payload_to_canonical_rows,
+    summarize_payload,
+)
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -18,17 +25,7 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 CSV_FILE_PATH = SCRIPT_DIR.parent / "backend" / "data" / "nonprofits_100.csv"
 OUTPUT_DIR = SCRIPT_DIR / "output" / "propublica"
 DEFAULT_WORKERS = 6
-
-
-def normalize_ein(value) -> str:
-    if pd.isna(value):
-        return ""
-    digits = re.sub(r"\D", "", str(value))
-    if not digits:
-        return ""
-    if len(digits) > 9:
-        digits = digits[-9:]
-    return digits.zfill(9)
+SINK_CHOICES = ("csv", "parquet", "sqlite", "backend")
 
 
 def get_targets_from_csv(file_path: Path) -> pd.DataFrame:
@@ -44,10 +41,10 @@ def get_targets_from_csv(file_path: Path) -> pd.DataFrame:
     return targets
 
 
-def fetch_one(session: requests.Session, row, timeout: int) -> tuple[list[dict], dict]:
+def fetch_one(session: requests.Session, row, timeout: int, base_url: str = BASE_URL) -> tuple[list[dict], dict]:
     ein = row.ein
     try:
-        payload = fetch_organization_payload(session, ein, timeout=timeout)
+        payload = fetch_organization_payload(session, ein, timeout=timeout, base_url=base_url)
         filing_rows = payload_to_canonical_rows(ein, payload)
         summary = summarize_payload(ein, payload)
         summary.update(
@@ -88,14 +85,19 @@ def fetch_one(session: requests.Session, row, timeout: int) -> tuple[list[dict],
         return [], summary
 
 
-def fetch_all_targets(targets: pd.DataFrame, timeout: int, workers: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+def fetch_all_targets(
+    targets: pd.DataFrame,
+    timeout: int,
+    workers: int,
+    base_url: str = BASE_URL,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     session = build_session()
     all_rows: list[dict] = []
     audit_rows: list[dict] = []
 
     with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
         future_map = {
-            executor.submit(fetch_one, session, row, timeout): row for row in targets.itertuples(index=False)
+            executor.submit(fetch_one, session, row, timeout, base_url): row for row in targets.itertuples(index=False)
         }
         for future in as_completed(future_map):
             row = future_map[future]
@@ -125,6 +127,86 @@ def fetch_all_targets(targets: pd.DataFrame, timeout: int, workers: int) -> tupl
     return filings_df, audit_df
 
 
+def stream_all_targets(
+    targets: pd.DataFrame,
+    timeout: int,
+    workers: int,
+    sinks: list[HarvestSink],
+    base_url: str = BASE_URL,
+) -> tuple[int, pd.DataFrame]:
+    session = build_session()
+    row_count = 0
+    audit_rows: list[dict] = []
+    workers = max(1, workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        completed = iter_completed(
+            executor,
+            lambda row: fetch_one(session, row, timeout, base_url),
+            targets.itertuples(index=False),
+            max_pending=workers * 2,
+        )
+        for row, (filing_rows, audit_row) in completed:
+            for sink in sinks:
+                sink.write(filing_rows)
+            row_count += len(filing_rows)
+            audit_rows.append(audit_row)
+            logging.info(
+                "EIN %s -> %s (%s filings, latest=%s)",
+                row.ein,
+                audit_row["status"],
+                audit_row["filing_count"],
+                audit_row["latest_tax_year"],
+            )
+
+    audit_df = pd.DataFrame(audit_rows)
+    if not audit_df.empty:
+        audit_df = audit_df.sort_values(by=["status", "ein"]).reset_index(drop=True)
+    return row_count, audit_df
+
+
+def build_sinks(sink_names: list[str], row_group_size: int, sqlite_db: str) -> list[HarvestSink]:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    date_tag = datetime.now().strftime("%Y%m%d")
+    sinks: list[HarvestSink] = []
+    try:
+        for name in dict.fromkeys(sink_names):
+            if name == "csv":
+                sinks.append(
+                    CsvSink(OUTPUT_DIR / f"propublica_filings_{date_tag}.csv", CANONICAL_COLUMNS, CANONICAL_COLUMN_TYPES)
+                )
+            elif name == "parquet":
+                sinks.append(
+                    ParquetSink(
+                        OUTPUT_DIR / f"propublica_filings_{date_tag}.parquet",
+                        CANONICAL_COLUMNS,
+                        CANONICAL_COLUMN_TYPES,
+                        row_group_size=row_group_size,
+                    )
+                )
+            elif name == "sqlite":
+                sink_kwargs = {"db_path": Path(sqlite_db)} if sqlite_db else {}
+                sinks.append(SqliteSink(CANONICAL_COLUMNS, CANONICAL_COLUMN_TYPES, **sink_kwargs))
+            elif name == "backend":
+                from propublica_backend_sink import BackendIngestSink
+
+                sinks.append(BackendIngestSink())
+    except BaseException:
+        # e.g. pyarrow missing for parquet: don't leave an earlier sink's shadow table or open file behind
+        for sink in sinks:
+            sink.abort()
+        raise
+    return sinks
+
+
+def export_audit(audit_df: pd.DataFrame) -> Path:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    date_tag = datetime.now().strftime("%Y%m%d")
+    audit_path = OUTPUT_DIR / f"propublica_audit_{date_tag}.csv"
+    audit_df.to_csv(audit_path, index=False, encoding="utf-8-sig")
+    return audit_path
+
+
 def export_outputs(filings_df: pd.DataFrame, audit_df: pd.DataFrame) -> tuple[Path, Path, Path]:
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     date_tag = datetime.now().strftime("%Y%m%d")
@@ -147,16 +229,77 @@ def main() -> None:
     parser.add_argument("--sample-size", type=int, default=10, help="How many target EINs to check. 0 means all.")
     parser.add_argument("--timeout", type=int, default=30, help="HTTP timeout seconds.")
     parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent workers.")
+    parser.add_argument(
+        "--sink",
+        action="append",
+        choices=SINK_CHOICES,
+        default=[],
+        help=(
+            "Stream filings to this sink as each EIN completes (repeatable). Skips the XLSX export. "
+            "'backend' upserts straight into the backend propublica_nonprofits table."
+        ),
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=10_000,
+        help="Rows per Parquet row group when streaming to parquet.",
+    )
+    parser.add_argument(
+        "--sqlite-db",
+        type=str,
+        default="",
+        help="SQLite database for the sqlite sink. Defaults to IRS_DB_PATH, else backend/irs.db.",
+    )
+    parser.add_argument(
+        "--targets-csv",
+        type=str,
+        default=str(CSV_FILE_PATH),
+        help="Four-row header CSV with the target EINs. Defaults to backend/data/nonprofits_100.csv.",
+    )
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        default=BASE_URL,
+        help="ProPublica API base URL (e.g. a local mock_api_server.py).",
+    )
     args = parser.parse_args()
 
-    targets = get_targets_from_csv(CSV_FILE_PATH)
+    targets = get_targets_from_csv(Path(args.targets_csv))
     if targets.empty:
         raise SystemExit("No valid EINs found in target CSV.")
 
     if args.sample_size and args.sample_size > 0:
         targets = targets.head(args.sample_size).copy()
 
-    filings_df, audit_df = fetch_all_targets(targets, timeout=args.timeout, workers=args.workers)
+    if args.sink:
+        sinks = build_sinks(args.sink, args.row_group_size, args.sqlite_db)
+        try:
+            row_count, audit_df = stream_all_targets(
+                targets, timeout=args.timeout, workers=args.workers, sinks=sinks, base_url=args.base_url
+            )
+        except BaseException:
+            # The SQLite sink drops its shadow table instead of swapping in a partial harvest
+            for sink in sinks:
+                sink.abort()
+            raise
+        for sink in sinks:
+            sink.close()
+        audit_path = export_audit(audit_df)
+        ok_count = int((audit_df["status"] == "ok").sum()) if not audit_df.empty else 0
+
+        print("====== ProPublica POC Harvest (streaming) ======")
+        print(f"Checked EINs: {len(targets)}")
+        print(f"Successful EINs: {ok_count}")
+        print(f"Rows streamed: {row_count}")
+        for sink in sinks:
+            print(f"Saved filings: {sink.describe()} ({sink.rows_written} rows)")
+        print(f"Saved audit CSV: {audit_path}")
+        return
+
+    filings_df, audit_df = fetch_all_targets(
+        targets, timeout=args.timeout, workers=args.workers, base_url=args.base_url
+    )
     filings_xlsx_path, filings_csv_path, audit_path = export_outputs(filings_df, audit_df)
 
     ok_count = int((audit_df["status"] == "ok").sum()) if not audit_df.empty else 0
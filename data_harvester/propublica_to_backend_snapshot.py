@@ -5,18 +5,14 @@ from typing import Optional
 
 import pandas as pd
 
+import backend_bridge  # noqa: F401  (puts backend/ on sys.path)
+from field_normalization import normalize_eins, normalize_form_types
+from fiscal_dates import parse_tax_period_months
+
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 OUTPUT_DIR = SCRIPT_DIR / "output" / "propublica"
 TARGET_CSV = SCRIPT_DIR.parent / "backend" / "data" / "nonprofits_100.csv"
-FORM_TYPE_CODE_MAP = {
-    "0": "990",
-    "0.0": "990",
-    "1": "990EO",
-    "1.0": "990EO",
-    "2": "990PF",
-    "2.0": "990PF",
-}
 
 
 def latest_matching_file(pattern: str) -> Path:
@@ -26,45 +22,11 @@ def latest_matching_file(pattern: str) -> Path:
     return matches[-1]
 
 
-def parse_fiscal_month(value) -> Optional[int]:
-    if pd.isna(value):
-        return None
-    text = str(value).strip()
-    if text == "":
-        return None
-    digits = "".join(ch for ch in text if ch.isdigit())
-    if len(digits) >= 6:
-        try:
-            month = int(digits[4:6])
-            return month if 1 <= month <= 12 else None
-        except ValueError:
-            return None
-    return None
-
-
-def normalize_form_type(value) -> str:
-    if pd.isna(value):
-        return ""
-    text = str(value).strip()
-    if text in {"", "nan", "None"}:
-        return ""
-    return FORM_TYPE_CODE_MAP.get(text, text)
-
-
-def normalize_ein(value) -> str:
-    if pd.isna(value):
-        return ""
-    digits = "".join(ch for ch in str(value) if ch.isdigit())
-    if not digits:
-        return ""
-    return digits[-9:].zfill(9)
-
-
 def load_target_lookup() -> pd.DataFrame:
     raw = pd.read_csv(TARGET_CSV, skiprows=5, header=None, dtype=str)
     lookup = pd.DataFrame(
         {
-            "ein": raw.iloc[:, 8].apply(normalize_ein),
+            "ein": normalize_eins(raw.iloc[:, 8]),
             "campus": raw.iloc[:, 2].astype(str).str.strip(),
             "city": raw.iloc[:, 4].astype(str).str.strip(),
             "st": raw.iloc[:, 5].astype(str).str.strip().str.upper(),
@@ -78,7 +40,7 @@ def build_backend_snapshot(snapshot_df: pd.DataFrame) -> pd.DataFrame:
     df = snapshot_df.copy()
     df["filing_date"] = pd.to_datetime(df["filing_date"], errors="coerce")
     df["fiscal_year"] = pd.to_numeric(df["tax_year"], errors="coerce").astype("Int64")
-    df["fiscal_month"] = df["tax_prd"].apply(parse_fiscal_month).astype("Int64")
+    df["fiscal_month"] = parse_tax_period_months(df["tax_prd"])
     df["ein"] = df["ein"].astype(str).str.zfill(9)
 
     backend_df = pd.DataFrame(
@@ -99,7 +61,7 @@ def build_backend_snapshot(snapshot_df: pd.DataFrame) -> pd.DataFrame:
                 df["net_assets"], errors="coerce"
             ),
             "employees": pd.to_numeric(df["employee_count"], errors="coerce"),
-            "propublica_form_type": df["form_type"].apply(normalize_form_type),
+            "propublica_form_type": normalize_form_types(df["form_type"]),
             "propublica_filing_date": df["filing_date"],
             "propublica_tax_prd": df["tax_prd"],
             "propublica_record_status": df["record_status"],
@@ -112,12 +74,15 @@ def build_backend_snapshot(snapshot_df: pd.DataFrame) -> pd.DataFrame:
     return backend_df.sort_values(by=["propublica_record_status", "ein"]).reset_index(drop=True)
 
 
-def build_backend_snapshot_from_filings(filings_df: pd.DataFrame) -> pd.DataFrame:
+def build_backend_snapshot_from_filings(
+    filings_df: pd.DataFrame,
+    target_lookup: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
     df = filings_df.copy()
-    df["ein"] = df["ein"].apply(normalize_ein)
+    df["ein"] = normalize_eins(df["ein"])
     df["filing_date"] = pd.to_datetime(df["filing_date"], errors="coerce")
     df["fiscal_year"] = pd.to_numeric(df["tax_year"], errors="coerce").astype("Int64")
-    df["fiscal_month"] = df["tax_prd"].apply(parse_fiscal_month).astype("Int64")
+    df["fiscal_month"] = parse_tax_period_months(df["tax_prd"])
     df["raw_available"] = df["raw_available"].fillna(False).astype(bool)
     df = (
         df.sort_values(by=["ein", "fiscal_year", "filing_date"], ascending=[True, True, True])
@@ -125,18 +90,24 @@ def build_backend_snapshot_from_filings(filings_df: pd.DataFrame) -> pd.DataFram
         .reset_index(drop=True)
     )
 
+    dated = df[df["fiscal_year"].notna()]
     year_summary = (
-        df[df["fiscal_year"].notna()]
-        .groupby("ein")["fiscal_year"]
+        dated.assign(
+            has_2024_plus=(dated["fiscal_year"] >= 2024).astype(bool),
+            has_2025_plus=(dated["fiscal_year"] >= 2025).astype(bool),
+        )
+        .groupby("ein")
         .agg(
-            propublica_filing_count="count",
-            propublica_has_2024_plus=lambda years: bool((years >= 2024).any()),
-            propublica_has_2025_plus=lambda years: bool((years >= 2025).any()),
+            propublica_filing_count=("fiscal_year", "count"),
+            propublica_has_2024_plus=("has_2024_plus", "any"),
+            propublica_has_2025_plus=("has_2025_plus", "any"),
         )
         .reset_index()
     )
 
-    df = df.merge(load_target_lookup(), on="ein", how="left")
+    if target_lookup is None:
+        target_lookup = load_target_lookup()
+    df = df.merge(target_lookup, on="ein", how="left")
     df = df.merge(year_summary, on="ein", how="left")
     df["campus"] = df["campus"].fillna(df["organization_name"])
     df["city"] = df["city"].fillna("")
@@ -160,7 +131,7 @@ def build_backend_snapshot_from_filings(filings_df: pd.DataFrame) -> pd.DataFram
                 df["net_assets"], errors="coerce"
             ),
             "employees": pd.to_numeric(df["employee_count"], errors="coerce"),
-            "propublica_form_type": df["form_type"].apply(normalize_form_type),
+            "propublica_form_type": normalize_form_types(df["form_type"]),
             "propublica_filing_date": df["filing_date"],
             "propublica_tax_prd": df["tax_prd"],
             "propublica_record_status": df["raw_available"].map({True: "ok", False: "missing_filing"}),
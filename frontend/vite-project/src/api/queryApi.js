@@ -83,6 +83,67 @@ export async function filterOrganizations(payload) {
   return response.data;
 }
 
+export async function streamOrganizations(payload, onRows, { maxRows = Infinity } = {}) {
+  // axios buffers the whole body, so use fetch to read the NDJSON stream incrementally.
+  // Once maxRows have arrived the stream is cancelled and truncated is reported.
+  const response = await fetch(`${API_BASE_URL}/filter/enhanced`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      dataset: QUERY_DATASET,
+      ...payload,
+      format: 'ndjson',
+    }),
+  });
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    throw new Error(body.detail || `Request failed with status ${response.status}`);
+  }
+
+  const total = response.headers.get('X-Total-Count');
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  let received = 0;
+  let truncated = false;
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffered.split('\n');
+    buffered = done ? '' : lines.pop();
+    const rows = lines.filter(Boolean).slice(0, maxRows - received).map((line) => JSON.parse(line));
+    if (rows.length > 0) {
+      received += rows.length;
+      onRows(rows);
+    }
+    if (done) {
+      break;
+    }
+    if (received >= maxRows) {
+      truncated = true;
+      await reader.cancel();
+      break;
+    }
+  }
+
+  return {
+    count: received,
+    truncated,
+    total: total === null || total === '' ? null : Number(total),
+    totalExact: response.headers.get('X-Total-Exact') === 'true',
+  };
+}
+
+// List endpoints return hot columns only; fields tagged storage "detail" by /fields come from here.
+export async function getRowDetails(keys, fields) {
+  const response = await apiClient.post('/filter/details', {
+    dataset: QUERY_DATASET,
+    keys,
+    fields,
+  });
+  return response.data;
+}
+
 export async function batchSearchOrganizations(payload) {
   const response = await apiClient.post('/search/batch', {
     dataset: QUERY_DATASET,
@@ -91,6 +152,13 @@ export async function batchSearchOrganizations(payload) {
   return response.data;
 }
 
+export async function getOrganization(ein) {
+  const response = await apiClient.get(`/organizations/${encodeURIComponent(ein)}`, {
+    params: withDataset(),
+  });
+  return response.data;
+}
+
 export async function getDatasetFields() {
   const response = await apiClient.get('/fields', {
     params: withDataset(),
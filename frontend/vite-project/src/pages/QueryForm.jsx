@@ -28,13 +28,14 @@ import {
   QUERY_DATASET,
   batchSearchOrganizations,
   downloadExport,
-  filterOrganizations,
   getAvailableCities,
   getAvailableMonths,
   getRevenueBands,
   getAvailableStates,
   getAvailableYears,
   getDatasetFields,
+  getRowDetails,
+  streamOrganizations,
 } from '../api/queryApi';
 
 const { Paragraph, Text, Title } = Typography;
@@ -54,6 +55,12 @@ const DEFAULT_SELECTED_FIELDS = [
 ];
 
 const FORM_TYPE_OPTIONS = ['990', '990EO', '990PF'];
+// Matches MAX_PAGE_SIZE, the most keys /filter/details accepts
+const DETAIL_PREVIEW_LIMIT = 5000;
+// Candidate rows kept from the stream; a broad query is narrowed rather than loaded whole
+const CANDIDATE_ROW_LIMIT = 5000;
+// Streamed rows are appended to state at most this often
+const STREAM_FLUSH_INTERVAL_MS = 250;
 const STEP_ITEMS = [
   { title: 'Time', description: 'Year / month' },
   { title: 'Screen', description: 'Filter scope' },
@@ -123,6 +130,10 @@ function formatRevenueBandLabel(band) {
   return `${band.label} (${formatCurrency(band.min_revenue)} - ${formatCurrency(band.max_revenue)})`;
 }
 
+function rowDetailKey(row) {
+  return `${row.ein}|${row.fiscal_year ?? ''}`;
+}
+
 function humanizeFieldName(fieldName) {
   const overrides = {
     campus: 'Organization Name',
@@ -214,6 +225,7 @@ function QueryForm() {
   const [loadingFields, setLoadingFields] = useState(true);
   const [loadingOptions, setLoadingOptions] = useState({ months: false, states: false, cities: false, revenueBands: false });
   const [actionLoading, setActionLoading] = useState({ step2: false, export: false });
+  const [detailValues, setDetailValues] = useState({});
 
   const updateSession = (updater) => {
     setQuerySession((previousSession) => {
@@ -416,6 +428,45 @@ function QueryForm() {
     querySession.selectedEins.includes(organization.ein)
   );
 
+  // Candidate rows only carry hot columns, so selected detail fields are fetched for the previewed rows.
+  const detailFieldNames = querySession.selectedFields.filter((fieldName) =>
+    availableFields.some((field) => field.name === fieldName && field.storage === 'detail')
+  );
+  const detailRequestKey = JSON.stringify([
+    selectedOrganizations.slice(0, DETAIL_PREVIEW_LIMIT).map((organization) => [organization.ein, organization.fiscal_year ?? null]),
+    detailFieldNames,
+  ]);
+
+  useEffect(() => {
+    const [keys, fields] = JSON.parse(detailRequestKey);
+    if (keys.length === 0 || fields.length === 0) {
+      setDetailValues({});
+      return undefined;
+    }
+
+    let cancelled = false;
+    getRowDetails(keys.map(([ein, fiscalYear]) => ({ ein, fiscal_year: fiscalYear })), fields)
+      .then((response) => {
+        if (!cancelled) {
+          setDetailValues(Object.fromEntries((response.results || []).map((row) => [rowDetailKey(row), row])));
+        }
+      })
+      .catch((error) => {
+        console.error('Failed to load detail fields:', error);
+        if (!cancelled) {
+          message.warning('Some selected fields could not be loaded for the preview.');
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [detailRequestKey]);
+
+  const previewOrganizations = selectedOrganizations.map((organization) => ({
+    ...organization,
+    ...detailValues[rowDetailKey(organization)],
+  }));
+
   const sortedFields = [...availableFields].sort((leftField, rightField) => {
     const leftCategory = categorizeField(leftField.name);
     const rightCategory = categorizeField(rightField.name);
@@ -486,6 +537,8 @@ function QueryForm() {
     try {
       setActionLoading((previousState) => ({ ...previousState, step2: true }));
       let results = [];
+      let truncated = false;
+      let matchedTotal = null;
 
       if (querySession.filterMode === 'criteria') {
         const payload = {
@@ -520,8 +573,35 @@ function QueryForm() {
           };
         }
 
-        const response = await filterOrganizations(payload);
-        results = response.results || [];
+        // Rows arrive in batches; show the candidate table as soon as the first one lands
+        // and append the rest in throttled chunks rather than on every batch.
+        const streamedRows = [];
+        let pendingRows = [];
+        let lastFlush = 0;
+        updateSession({ candidateResults: [], selectedEins: [] });
+        const stream = await streamOrganizations(
+          payload,
+          (batch) => {
+            streamedRows.push(...batch);
+            pendingRows.push(...batch);
+            if (Date.now() - lastFlush < STREAM_FLUSH_INTERVAL_MS) {
+              return;
+            }
+            const chunk = pendingRows;
+            pendingRows = [];
+            lastFlush = Date.now();
+            updateSession((previousSession) => ({
+              ...previousSession,
+              candidateResults: previousSession.candidateResults.concat(chunk),
+            }));
+            setCurrentStep(2);
+          },
+          { maxRows: CANDIDATE_ROW_LIMIT }
+        );
+        results = streamedRows;
+        // A stream cut exactly at the cap may have held every match; the total says so
+        truncated = stream.truncated && (stream.total === null || stream.total > streamedRows.length);
+        matchedTotal = stream.total;
       } else {
         const searchTerms = querySession.searchText.split('\n').map((term) => term.trim()).filter(Boolean);
         if (searchTerms.length === 0) {
@@ -546,6 +626,9 @@ function QueryForm() {
 
       if (results.length === 0) {
         message.warning('No ProPublica records matched the current query. You can go back and adjust the filters.');
+      } else if (truncated) {
+        const matched = matchedTotal === null ? 'more' : matchedTotal;
+        message.warning(`Showing the first ${results.length} of ${matched} matching records. Narrow the filters to see the rest.`);
       } else {
         message.success(`Found ${results.length} ProPublica records.`);
       }
@@ -1054,7 +1137,7 @@ function QueryForm() {
             ) : (
               <Table
                 columns={previewColumns}
-                dataSource={selectedOrganizations}
+                dataSource={previewOrganizations}
                 rowKey="ein"
                 pagination={{ pageSize: 5, showSizeChanger: false }}
                 scroll={{ x: 1000 }}
@@ -1111,7 +1194,7 @@ function QueryForm() {
               <Card size="small" title="Final Preview" style={{ marginBottom: 24 }}>
                 <Table
                   columns={previewColumns}
-                  dataSource={selectedOrganizations.slice(0, 5)}
+                  dataSource={previewOrganizations.slice(0, 5)}
                   rowKey="ein"
                   pagination={false}
                   scroll={{ x: 1000 }}